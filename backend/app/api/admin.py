@@ -0,0 +1,101 @@
+from fastapi import APIRouter, Depends
+from ..core.auth import get_admin_user, token_verifier
+from ..core.logger import logging_subsystem
+from ..services.translation_service import translation_service
+from ..services.sentiment_service import sentiment_service
+from ..services.storage import storage
+from ..services.password_hasher import password_hasher
+from ..services.room_languages import room_languages
+from ..services.message_enricher import message_enricher
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(get_admin_user)])
+
+@router.get("/translation-cache")
+async def get_translation_cache():
+    """Inspect translation cache counters and sizes"""
+    return await translation_service.cache.info()
+
+@router.delete("/translation-cache")
+async def flush_translation_cache():
+    """Flush both translation cache tiers"""
+    dropped = await translation_service.cache.clear()
+    return {"status": "success", "memory_entries_dropped": dropped}
+
+@router.get("/translation-inflight")
+async def get_translation_inflight():
+    """Inspect how many identical translation calls were coalesced"""
+    return translation_service.inflight.info()
+
+@router.get("/translator-pool")
+async def get_translator_pool():
+    """Inspect pooled translator clients and their connect/transfer timings"""
+    return translation_service.pool.info()
+
+@router.get("/translation-scheduler")
+async def get_translation_scheduler():
+    """Inspect rate limit, daily quota and priority lane counters"""
+    return translation_service.scheduler.info()
+
+@router.get("/translation-providers")
+async def get_translation_providers():
+    """Inspect provider latency histograms, errors and circuit breaker state"""
+    return translation_service.providers_info()
+
+@router.get("/sentiment")
+async def get_sentiment_engine():
+    """Inspect sentiment worker queue, batching and event-loop lag"""
+    return sentiment_service.info()
+
+@router.get("/password-hasher")
+async def get_password_hasher():
+    """Inspect bcrypt worker load, rejections and timeouts"""
+    return password_hasher.info()
+
+@router.get("/storage")
+async def get_storage_io():
+    """Inspect storage backend I/O pool and write buffer counters"""
+    return storage.info()
+
+@router.get("/document-cache")
+async def get_document_cache():
+    """Inspect user, email index and conversation cache hit ratio and staleness"""
+    return {
+        'users': storage.users.info(),
+        'emails': storage.emails.info(),
+        'conversations': storage.conversations.info()
+    }
+
+@router.delete("/document-cache")
+async def flush_document_cache():
+    """Drop all cached user, email index and conversation documents"""
+    return {
+        "status": "success",
+        "users_dropped": storage.users.clear(),
+        "emails_dropped": storage.emails.clear(),
+        "conversations_dropped": storage.conversations.clear()
+    }
+
+@router.get("/message-enrichment")
+async def get_message_enrichment():
+    """Inspect background translation and sentiment: queue depth, retries and failures"""
+    return message_enricher.info()
+
+@router.get("/room-languages")
+async def get_room_languages():
+    """Inspect socket broadcast fan-out: recipients and translations per message"""
+    return room_languages.info()
+
+@router.get("/token-cache")
+async def get_token_cache():
+    """Inspect verified access token cache hits, rejections and expiries"""
+    return token_verifier.info()
+
+@router.delete("/token-cache")
+async def flush_token_cache():
+    """Drop verified tokens so the next request of each re-checks its signature"""
+    return {"status": "success", "dropped": token_verifier.clear()}
+
+@router.get("/logging")
+async def get_logging():
+    """Inspect the log writer queue and records dropped when it was full"""
+    return logging_subsystem.info()
@@ -1,14 +1,30 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from typing import Dict
+from ..core.auth import get_current_user
 from ..models.user import UserCreate, UserLogin, Token
 from ..services.auth_service import auth_service
-from ..services.firebase_service import firebase_service
+from ..services.password_hasher import PasswordHasherBusy, PasswordHasherUnavailable
+from ..services.room_languages import room_languages
+from ..services.storage import storage
+from ..services.translation_service import translation_service
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+async def _admitted(call):
+    """Turn password hasher overload into fast 429/503 responses"""
+    try:
+        return await call
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=429, detail="Too many sign-in attempts, try again shortly",
+                            headers={"Retry-After": "1"})
+    except PasswordHasherUnavailable:
+        raise HTTPException(status_code=503, detail="Sign-in is temporarily unavailable",
+                            headers={"Retry-After": "5"})
+
 @router.post("/register", response_model=Token)
 async def register(user_data: UserCreate):
     """Register a new user"""
-    result = await auth_service.register_user(user_data)
+    result = await _admitted(auth_service.register_user(user_data))
     
     if not result:
         raise HTTPException(status_code=400, detail="Email already registered")
@@ -18,7 +34,7 @@ async def register(user_data: UserCreate):
 @router.post("/login", response_model=Token)
 async def login(login_data: UserLogin):
     """Login user"""
-    result = await auth_service.login_user(login_data)
+    result = await _admitted(auth_service.login_user(login_data))
     
     if not result:
         raise HTTPException(status_code=401, detail="Invalid email or password")
@@ -30,10 +46,10 @@ async def test_auth():
     """Test authentication endpoint"""
     return {"message": "Auth API is working!"}
 
-@router.get("/search/{email}")
+@router.get("/search/{email}", dependencies=[Depends(get_current_user)])
 async def search_user(email: str):
     """Search for a user by email"""
-    user = await firebase_service.get_user_by_email(email)
+    user = await storage.get_user_by_email(email)
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -45,10 +61,10 @@ async def search_user(email: str):
         "preferred_language": user.get('preferred_language')
     }
 
-@router.get("/user/{user_id}")
+@router.get("/user/{user_id}", dependencies=[Depends(get_current_user)])
 async def get_user(user_id: str):
     """Get user by ID"""
-    user = await firebase_service.get_user_by_id(user_id)
+    user = await storage.get_user_by_id(user_id)
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -58,4 +74,21 @@ async def get_user(user_id: str):
         "name": user.get('name'),
         "email": user.get('email'),
         "preferred_language": user.get('preferred_language')
-    }
\ No newline at end of file
+    }
+
+@router.put("/user/{user_id}/language")
+async def update_language(user_id: str, data: dict, current_user: Dict = Depends(get_current_user)):
+    """Change the caller's preferred language, including for conversations they have open"""
+    if user_id != current_user['user_id']:
+        raise HTTPException(status_code=403, detail="Cannot act for another user")
+    
+    language = (data.get('preferred_language') or '').lower()
+    if language not in translation_service.language_map:
+        raise HTTPException(status_code=400, detail="Unsupported language")
+    
+    if not await storage.update_user_language(user_id, language):
+        raise HTTPException(status_code=500, detail="Failed to update language")
+    
+    # Open sockets receive broadcasts in the new language from now on
+    room_languages.set_user_language(user_id, language)
+    return {"status": "success", "preferred_language": language}
@@ -1,32 +1,52 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from typing import Any, Dict, List, Optional
+import asyncio
+import json
+import logging
 from datetime import datetime
+from ..core.auth import get_current_user
+from ..core.config import settings
 from ..models.message import Message, MessageCreate, Conversation, ConversationCreate
-from ..services.firebase_service import firebase_service
+from ..services.storage import storage
 from ..services.translation_service import translation_service
 from ..services.sentiment_service import sentiment_service
+from ..services.message_enricher import message_enricher
+from ..services.realtime import broadcast, broadcast_localized
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
+def _require_participant(user_id: str, participant1_id: str, participant2_id: str) -> None:
+    if user_id not in (participant1_id, participant2_id):
+        raise HTTPException(status_code=403, detail="Not a participant of this conversation")
+
+def _require_self(user_id: str, current_user: Dict[str, Any]) -> None:
+    if user_id != current_user['user_id']:
+        raise HTTPException(status_code=403, detail="Cannot act for another user")
+
+async def _participant_conversation(conversation_id: str, current_user: Dict[str, Any]) -> Dict[str, Any]:
+    """The conversation, if it exists and the caller takes part in it"""
+    conversation = await storage.get_conversation(conversation_id)
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    _require_participant(current_user['user_id'], conversation['participant1_id'], conversation['participant2_id'])
+    return conversation
+
 @router.post("/conversations", response_model=Conversation)
-async def create_conversation(conv_data: ConversationCreate):
+async def create_conversation(conv_data: ConversationCreate, current_user: Dict = Depends(get_current_user)):
     """Create a new conversation or return existing one"""
+    _require_participant(current_user['user_id'], conv_data.participant1_id, conv_data.participant2_id)
     try:
-        convs_ref = firebase_service.db.collection('conversations')
-        
-        query1 = convs_ref.where('participant1_id', '==', conv_data.participant1_id)\
-                         .where('participant2_id', '==', conv_data.participant2_id)\
-                         .limit(1).stream()
-        
-        query2 = convs_ref.where('participant1_id', '==', conv_data.participant2_id)\
-                         .where('participant2_id', '==', conv_data.participant1_id)\
-                         .limit(1).stream()
-        
-        for doc in query1:
-            return doc.to_dict()
+        existing = await storage.find_conversation(
+            conv_data.participant1_id,
+            conv_data.participant2_id
+        )
         
-        for doc in query2:
-            return doc.to_dict()
+        if existing:
+            return existing
         
         conversation = {
             'participant1_id': conv_data.participant1_id,
@@ -35,7 +55,7 @@ async def create_conversation(conv_data: ConversationCreate):
             'last_message_at': None
         }
         
-        result = await firebase_service.create_conversation(conversation)
+        result = await storage.create_conversation(conversation)
         
         if not result:
             raise HTTPException(status_code=500, detail="Failed to create conversation")
@@ -43,113 +63,165 @@ async def create_conversation(conv_data: ConversationCreate):
         return result
         
     except Exception as e:
-        print(f"Error: {e}")
+        logger.error("Error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/conversations/{conversation_id}", response_model=Conversation)
-async def get_conversation(conversation_id: str):
+async def get_conversation(conversation_id: str, current_user: Dict = Depends(get_current_user)):
     """Get conversation details"""
-    result = await firebase_service.get_conversation(conversation_id)
+    return await _participant_conversation(conversation_id, current_user)
+
+@router.get("/conversations/user/{user_id}")
+async def get_user_conversations(user_id: str, response: Response, limit: int = 20, cursor: Optional[str] = None,
+                                 current_user: Dict = Depends(get_current_user)):
+    """Get a page of a user's conversations, most recent first"""
+    _require_self(user_id, current_user)
+    limit = max(1, min(limit, 100))
+    entries, next_cursor = await storage.get_user_inbox(user_id, limit, cursor)
     
-    if not result:
-        raise HTTPException(status_code=404, detail="Conversation not found")
+    # Pass the header back as ?cursor= to get the next page
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
     
-    return result
+    return entries
 
-@router.get("/conversations/user/{user_id}")
-async def get_user_conversations(user_id: str):
-    """Get all conversations for a user"""
-    try:
-        convs_ref = firebase_service.db.collection('conversations')
-        
-        query1 = convs_ref.where('participant1_id', '==', user_id).stream()
-        conversations1 = [doc.to_dict() for doc in query1]
-        
-        query2 = convs_ref.where('participant2_id', '==', user_id).stream()
-        conversations2 = [doc.to_dict() for doc in query2]
-        
-        all_conversations = conversations1 + conversations2
-        
-        return all_conversations
-    except Exception as e:
-        print(f"Error getting conversations: {e}")
-        return []
+@router.put("/conversations/{conversation_id}/read")
+async def mark_conversation_read(conversation_id: str, user_id: str, current_user: Dict = Depends(get_current_user)):
+    """Reset a user's unread count for a conversation"""
+    _require_self(user_id, current_user)
+    success = await storage.mark_conversation_read(user_id, conversation_id)
+    if success:
+        return {"status": "success", "conversation_id": conversation_id}
+    raise HTTPException(status_code=500, detail="Failed to mark conversation as read")
 
 @router.post("/messages")
-async def send_message(message_data: MessageCreate):
-    """Send a message with automatic translation and sentiment analysis"""
+async def send_message(message_data: MessageCreate, current_user: Dict = Depends(get_current_user)):
+    """
+    Send a message with automatic translation and sentiment analysis.
+    With two-phase delivery the message is stored and broadcast as
+    new_message with its original text straight away, and the translation
+    and sentiment follow as message_enriched. Inline delivery does both
+    before storing.
+    """
+    _require_self(message_data.sender_id, current_user)
     try:
-        conversation = await firebase_service.get_conversation(message_data.conversation_id)
-        
-        if not conversation:
-            raise HTTPException(status_code=404, detail="Conversation not found")
+        conversation = await _participant_conversation(message_data.conversation_id, current_user)
         
         recipient_id = conversation['participant2_id'] if conversation['participant1_id'] == message_data.sender_id else conversation['participant1_id']
         
-        recipient = await firebase_service.get_user_by_id(recipient_id)
+        recipient = await storage.get_user_by_id(recipient_id)
         target_language = recipient.get('preferred_language', 'english') if recipient else 'english'
         
         if message_data.translated_language:
             target_language = message_data.translated_language
         
-        translation_result = await translation_service.translate_with_detection(
-            message_data.text,
-            target_language
-        )
-        
-        sentiment_result = sentiment_service.analyze_sentiment(message_data.text)
-        
         message = {
             'conversation_id': message_data.conversation_id,
             'sender_id': message_data.sender_id,
             'text': message_data.text,
-            'language': translation_result['source_language'],
-            'translated_text': translation_result['translated_text'],
-            'translated_language': translation_result['target_language'],
-            'sentiment': sentiment_result['sentiment'],
-            'sentiment_emoji': sentiment_result['emoji'],
-            'sentiment_score': sentiment_result['polarity'],
+            'language': message_data.language,
+            'translated_text': None,
+            'translated_language': target_language,
+            'sentiment': None,
+            'sentiment_emoji': None,
+            'sentiment_score': None,
             'timestamp': datetime.utcnow(),
             'is_voice': False,
-            'read': False
+            'read': False,
+            'enrichment': 'pending',
+            'client_message_id': message_data.client_message_id
         }
         
-        result = await firebase_service.create_message(message)
+        inline = settings.MESSAGE_DELIVERY == 'inline'
+        if inline:
+            translation_result = await translation_service.translate_with_detection(
+                message_data.text,
+                target_language
+            )
+            
+            sentiment_result = await sentiment_service.analyze_sentiment_async(message_data.text)
+            
+            message.update({
+                'language': translation_result['source_language'],
+                'translated_text': translation_result['translated_text'],
+                'translated_language': translation_result['target_language'],
+                'sentiment': sentiment_result['sentiment'],
+                'sentiment_emoji': sentiment_result['emoji'],
+                'sentiment_score': sentiment_result['polarity'],
+                'enrichment': 'done'
+            })
+        
+        result = await storage.create_message(message, recipient_id)
         
         if not result:
             raise HTTPException(status_code=500, detail="Failed to send message")
         
-        await firebase_service.update_conversation_timestamp(message_data.conversation_id)
+        if inline:
+            await broadcast_localized('new_message', message_data.conversation_id, result)
+        else:
+            # The sender's write is the only wait; translation follows as message_enriched
+            await broadcast('new_message', message_data.conversation_id, result)
+            message_enricher.submit(result)
         
         return result
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error sending message: {e}")
+        logger.error("Error sending message: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/messages/{conversation_id}")
-async def get_messages(conversation_id: str, limit: int = 50):
-    """Get messages for a conversation"""
+async def get_messages(conversation_id: str, limit: int = 50, before: Optional[str] = None,
+                       after: Optional[str] = None, latest: bool = False,
+                       current_user: Dict = Depends(get_current_user)):
+    """Get a page of messages for a conversation, oldest first within the page"""
+    await _participant_conversation(conversation_id, current_user)
+    if before and after:
+        raise HTTPException(status_code=400, detail="Use either before or after, not both")
     try:
-        messages = await firebase_service.get_messages(conversation_id, limit)
+        messages = await storage.get_messages(
+            conversation_id,
+            max(1, min(limit, 500)),
+            before=before,
+            after=after,
+            latest=latest
+        )
+        # Pick up messages whose enrichment was lost, e.g. to a restart
+        message_enricher.resume(messages)
         return messages
     except Exception as e:
-        print(f"Error getting messages: {e}")
+        logger.error("Error getting messages: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/messages/{conversation_id}/stream")
+async def stream_messages(conversation_id: str, after: Optional[str] = None, limit: Optional[int] = None,
+                          current_user: Dict = Depends(get_current_user)):
+    """Stream a conversation's messages as NDJSON, one message per line"""
+    await _participant_conversation(conversation_id, current_user)
+    async def lines():
+        async for message in storage.stream_messages(conversation_id, after=after, limit=limit):
+            yield json.dumps(jsonable_encoder(message)) + "\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 @router.put("/messages/{message_id}/read")
-async def mark_message_read(message_id: str):
+async def mark_message_read(message_id: str, current_user: Dict = Depends(get_current_user)):
     """Mark a message as read"""
+    message = await storage.get_message(message_id)
+    if not message:
+        raise HTTPException(status_code=404, detail="Message not found")
+    await _participant_conversation(message['conversation_id'], current_user)
     try:
-        success = await firebase_service.mark_message_read(message_id)
+        success = await storage.mark_message_read(message_id)
         if success:
             return {"status": "success", "message_id": message_id}
         raise HTTPException(status_code=500, detail="Failed to mark message as read")
     except Exception as e:
-        print(f"Error marking message read: {e}")
+        logger.error("Error marking message read: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/translate")
+@router.post("/translate", dependencies=[Depends(get_current_user)])
 async def translate_text(data: dict):
     """Manual translation endpoint"""
     try:
@@ -173,10 +245,61 @@ async def translate_text(data: dict):
             return result
             
     except Exception as e:
-        print(f"Translation error: {e}")
+        logger.error("Translation error: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/translate/batch", dependencies=[Depends(get_current_user)])
+async def translate_batch(data: dict):
+    """Translate a list of texts in as few provider requests as possible"""
+    try:
+        texts = data.get('texts')
+        target_lang = data.get('target_language', 'english')
+        source_lang = data.get('source_language')
+        
+        if not texts or not isinstance(texts, list):
+            raise HTTPException(status_code=400, detail="Texts are required")
+        
+        if len(texts) > settings.TRANSLATION_BATCH_MAX_TEXTS:
+            raise HTTPException(status_code=400, detail=f"At most {settings.TRANSLATION_BATCH_MAX_TEXTS} texts per request")
+        
+        if not all(isinstance(text, str) for text in texts):
+            raise HTTPException(status_code=400, detail="Texts must be strings")
+        
+        if source_lang:
+            results = await translation_service.translate_batch_detailed(texts, source_lang, target_lang)
+            for result in results:
+                result['source_language'] = source_lang
+        else:
+            # Group texts by detected language so each group is one batch
+            groups = {}
+            for index, text in enumerate(texts):
+                groups.setdefault(translation_service.detect_language(text), []).append(index)
+            
+            group_results = await asyncio.gather(*[
+                translation_service.translate_batch_detailed(
+                    [texts[i] for i in indices], detected_lang, target_lang
+                )
+                for detected_lang, indices in groups.items()
+            ])
+            
+            results = [None] * len(texts)
+            for (detected_lang, indices), batch in zip(groups.items(), group_results):
+                for index, result in zip(indices, batch):
+                    result['source_language'] = detected_lang
+                    results[index] = result
+        
+        return {
+            'target_language': target_lang,
+            'results': results
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Batch translation error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/analyze-sentiment")
+@router.post("/analyze-sentiment", dependencies=[Depends(get_current_user)])
 async def analyze_sentiment(data: dict):
     """Analyze sentiment of text"""
     try:
@@ -184,7 +307,7 @@ async def analyze_sentiment(data: dict):
         if not text:
             raise HTTPException(status_code=400, detail="Text is required")
         
-        result = sentiment_service.analyze_sentiment(text)
+        result = await sentiment_service.analyze_sentiment_async(text)
         suggestions = sentiment_service.get_emotion_suggestions(result['sentiment'])
         
         return {
@@ -192,7 +315,7 @@ async def analyze_sentiment(data: dict):
             'suggestions': suggestions
         }
     except Exception as e:
-        print(f"Sentiment analysis error: {e}")
+        logger.error("Sentiment analysis error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/languages")
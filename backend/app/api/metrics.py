@@ -0,0 +1,80 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from ..core.auth import token_verifier
+from ..core.metrics import metrics, histogram_samples
+from ..services.translation_service import translation_service
+from ..services.sentiment_service import sentiment_service
+from ..services.storage import storage
+from ..services.password_hasher import password_hasher
+from ..services.room_languages import room_languages
+from ..services.message_enricher import message_enricher
+
+router = APIRouter(tags=["Metrics"])
+
+def _counters(name, documentation, stats, keys):
+    return (name, 'counter', documentation, [(name, {'kind': key}, stats.get(key, 0)) for key in keys])
+
+def collect_service_stats():
+    """Counters and queue depths the services already keep, read at scrape time"""
+    cache = translation_service.cache.stats
+    scheduler = translation_service.scheduler.info()
+    engine = sentiment_service.engine.info() if sentiment_service.engine else {}
+    writes = storage.writes.info()
+
+    yield _counters('chat_translation_cache_total', 'Translation cache lookups by outcome',
+                    cache, ['memory_hits', 'disk_hits', 'misses', 'evictions'])
+    yield ('chat_translation_scheduler_queued', 'gauge', 'Translation calls waiting for a rate-limit token',
+           [('chat_translation_scheduler_queued', {'lane': lane}, count) for lane, count in scheduler['queued'].items()])
+    yield ('chat_translation_quota_remaining', 'gauge', 'Provider calls left in the daily quota',
+           [('chat_translation_quota_remaining', {}, scheduler['daily_remaining'])])
+
+    provider_samples = []
+    for provider in translation_service.providers:
+        latency = provider.latency
+        provider_samples += histogram_samples(
+            'chat_translation_provider_seconds', {'provider': provider.name},
+            [bound / 1000 for bound in latency.BUCKETS_MS], latency.counts, latency.sum_ms / 1000
+        )
+    yield ('chat_translation_provider_seconds', 'histogram', 'Latency of translation provider calls', provider_samples)
+    yield ('chat_translation_provider_errors_total', 'counter', 'Translation provider calls that failed',
+           [('chat_translation_provider_errors_total', {'provider': provider.name}, provider.stats['errors'])
+            for provider in translation_service.providers])
+
+    yield ('chat_sentiment_queue_depth', 'gauge', 'Texts waiting for a sentiment worker',
+           [('chat_sentiment_queue_depth', {}, engine.get('queue_depth', 0))])
+
+    enrichment = message_enricher.info()
+    yield ('chat_message_enrichment_queue_depth', 'gauge', 'Stored messages waiting for translation and sentiment',
+           [('chat_message_enrichment_queue_depth', {}, enrichment['queue_depth'])])
+    yield _counters('chat_message_enrichment_total', 'Background message enrichment by outcome',
+                    enrichment, ['submitted', 'enriched', 'retries', 'failed', 'dropped', 'resumed'])
+
+    yield _counters('chat_socket_broadcast_total', 'Socket message broadcasts, recipients and translations made for them',
+                    room_languages.stats, ['broadcasts', 'recipients', 'translations'])
+
+    yield _counters('chat_auth_token_cache_total', 'Access token verifications by outcome',
+                    token_verifier.stats, ['hits', 'misses', 'rejected', 'expired'])
+
+    yield ('chat_password_hash_pending', 'gauge', 'Password hash and verify calls queued or running',
+           [('chat_password_hash_pending', {}, password_hasher.info()['pending'])])
+    yield _counters('chat_password_hash_total', 'Password hash and verify calls by outcome',
+                    password_hasher.stats, ['calls', 'rejected', 'timeouts', 'worker_errors'])
+
+    yield ('chat_storage_executor_tasks', 'gauge', 'Storage calls waiting for or running on the I/O pool',
+           [('chat_storage_executor_tasks', {'state': 'waiting'}, storage.stats['waiting']),
+            ('chat_storage_executor_tasks', {'state': 'running'}, storage.stats['in_flight'])])
+    yield ('chat_storage_write_buffer_queued', 'gauge', 'Writes waiting for the next group commit',
+           [('chat_storage_write_buffer_queued', {}, writes['queued'])])
+    yield _counters('chat_storage_writes_total', 'Group-committed writes by outcome',
+                    writes, ['submitted', 'coalesced', 'written', 'batches', 'errors'])
+
+    for name, cache in (('users', storage.users), ('emails', storage.emails), ('conversations', storage.conversations)):
+        yield _counters(f'chat_document_cache_{name}_total', f'Cached {name} lookups by outcome',
+                        cache.stats, ['hits', 'negative_hits', 'misses'])
+
+metrics.register(collect_service_stats)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Export all metrics in the Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
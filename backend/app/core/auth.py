@@ -0,0 +1,96 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from .config import settings
+from .security import decode_access_token
+
+class TokenVerifier:
+    """
+    Bounded LRU of tokens that already passed JWT verification, keyed by
+    the SHA-256 digest of the token so raw tokens are never kept. A hit
+    costs a hash and a dict lookup instead of a signature check; entries
+    are dropped once the token's exp has passed. Failed tokens are not
+    cached, so garbage cannot push valid entries out.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+
+        # digest -> (identity, exp as a Unix timestamp)
+        self._entries: "OrderedDict[bytes, Tuple[Dict[str, Any], float]]" = OrderedDict()
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'rejected': 0,
+            'expired': 0,
+            'evictions': 0
+        }
+
+    def verify(self, token: str) -> Optional[Dict[str, Any]]:
+        """Identity ({'user_id', 'email'}) of a valid, unexpired token, else None"""
+        digest = hashlib.sha256(token.encode()).digest()
+        entry = self._entries.get(digest)
+        if entry is not None:
+            identity, expires_at = entry
+            if time.time() < expires_at:
+                self._entries.move_to_end(digest)
+                self.stats['hits'] += 1
+                return identity
+            del self._entries[digest]
+            self.stats['expired'] += 1
+            return None
+
+        self.stats['misses'] += 1
+        payload = decode_access_token(token)
+        if not payload or not payload.get('id') or 'exp' not in payload:
+            self.stats['rejected'] += 1
+            return None
+
+        identity = {'user_id': payload['id'], 'email': payload.get('sub')}
+        self._entries[digest] = (identity, float(payload['exp']))
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats['evictions'] += 1
+        return identity
+
+    def clear(self) -> int:
+        dropped = len(self._entries)
+        self._entries.clear()
+        return dropped
+
+    def info(self) -> Dict:
+        hits = self.stats['hits']
+        lookups = hits + self.stats['misses'] + self.stats['expired']
+        return {
+            **self.stats,
+            'hit_ratio': round(hits / lookups, 4) if lookups else 0.0,
+            'entries': len(self._entries),
+            'max_size': self.max_size
+        }
+
+# Create singleton instance
+token_verifier = TokenVerifier(max_size=settings.AUTH_TOKEN_CACHE_SIZE)
+
+_bearer = HTTPBearer(auto_error=False)
+
+async def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer)) -> Dict[str, Any]:
+    """FastAPI dependency: identity of the request's bearer token, or 401"""
+    identity = token_verifier.verify(credentials.credentials) if credentials else None
+    if identity is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return identity
+
+async def get_admin_user(current_user: Dict[str, Any] = Depends(get_current_user)) -> Dict[str, Any]:
+    """FastAPI dependency: the caller if their email is listed in ADMIN_EMAILS, or 403"""
+    admins = {email.strip().lower() for email in settings.ADMIN_EMAILS.split(',') if email.strip()}
+    if (current_user.get('email') or '').lower() not in admins:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
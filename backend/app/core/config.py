@@ -17,6 +17,98 @@ class Settings(BaseSettings):
     JWT_SECRET: str = "your-super-secret-key-change-this"
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
+    AUTH_TOKEN_CACHE_SIZE: int = 10000  # verified tokens kept so repeat requests skip the signature check
+    ADMIN_EMAILS: str = ""  # comma-separated accounts allowed to call /admin; empty locks it for everyone
+    
+    # Translation cache
+    TRANSLATION_CACHE_SIZE: int = 10000
+    TRANSLATION_CACHE_TTL_SECONDS: int = 60 * 60 * 24  # 1 day
+    TRANSLATION_CACHE_PATH: str = "translation-cache.sqlite3"
+    TRANSLATION_CACHE_DISK_MAX_ENTRIES: int = 100000  # oldest rows pruned beyond this
+    
+    # Batch translation
+    TRANSLATION_BATCH_MAX_CHARS: int = 4500  # provider limit is 5000
+    TRANSLATION_BATCH_CONCURRENCY: int = 4
+    TRANSLATION_BATCH_FALLBACK_MAX_ITEMS: int = 8  # items of a failed chunk retried one by one
+    TRANSLATION_BATCH_MAX_TEXTS: int = 100  # texts accepted per /chat/translate/batch request
+    
+    # Translator client pool
+    TRANSLATOR_POOL_SIZE: int = 4  # idle clients kept per language pair
+    TRANSLATOR_POOL_IDLE_SECONDS: int = 60
+    TRANSLATOR_BASE_URL: str = ""  # empty uses the provider default
+    
+    # Translation rate limiting (free tier allows ~500 requests/day)
+    TRANSLATION_RATE_PER_SECOND: float = 5.0
+    TRANSLATION_BURST: int = 10
+    TRANSLATION_DAILY_QUOTA: int = 500
+    TRANSLATION_QUOTA_RESERVE: int = 100  # kept for live messages only
+    TRANSLATION_MAX_QUEUED_LOW_PRIORITY: int = 200
+    
+    # Translation providers, hedging and circuit breaking
+    TRANSLATION_PROVIDERS: str = "google"  # google, mymemory, libre, local; later ones are failover targets
+    TRANSLATION_DEADLINE_SECONDS: float = 5.0
+    TRANSLATION_HEDGING: bool = False  # also send slow requests to the next provider
+    TRANSLATION_HEDGE_DELAY_MS: float = 800  # used until enough samples exist
+    TRANSLATION_HEDGE_DELAY_MIN_MS: float = 50
+    TRANSLATION_HEDGE_MIN_SAMPLES: int = 20
+    TRANSLATION_BREAKER_FAILURES: int = 5
+    TRANSLATION_BREAKER_COOLDOWN_SECONDS: float = 30.0
+    LIBRE_TRANSLATE_URL: str = "http://localhost:5000/translate"
+    LIBRE_TRANSLATE_API_KEY: str = ""
+    
+    # Sentiment analysis
+    SENTIMENT_ENGINE: str = "process"  # process, sync
+    SENTIMENT_WORKERS: int = 2
+    SENTIMENT_MAX_QUEUE: int = 1000
+    SENTIMENT_BATCH_SIZE: int = 32
+    SENTIMENT_BATCH_WINDOW_MS: float = 5
+    SENTIMENT_SCORER: str = "textblob"  # textblob, lexicon
+    SENTIMENT_MEMO_SIZE: int = 10000
+    
+    # Password hashing (bcrypt runs in a process pool, off the event loop)
+    BCRYPT_ROUNDS: int = 12  # existing hashes are upgraded on the next login when this changes
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 16  # queued or running calls; further logins get 429
+    PASSWORD_HASH_TIMEOUT_SECONDS: float = 5.0  # calls waiting longer get 503
+    
+    # Message delivery: two_phase stores and broadcasts the original first, then
+    # translates and scores in the background; inline does it all before storing
+    MESSAGE_DELIVERY: str = "two_phase"  # two_phase, inline
+    ENRICHMENT_WORKERS: int = 8
+    ENRICHMENT_MAX_QUEUE: int = 1000
+    ENRICHMENT_MAX_ATTEMPTS: int = 4
+    ENRICHMENT_RETRY_SECONDS: float = 0.5  # doubled after each failed attempt
+    ENRICHMENT_RESUME_AFTER_SECONDS: float = 30  # pending messages older than this are queued again when read
+    
+    # Storage backend: firestore, sqlite (single file, for small deployments) or memory (tests)
+    STORAGE_BACKEND: str = "firestore"
+    SQLITE_STORAGE_PATH: str = "chat.sqlite3"
+    
+    # Storage I/O (the clients block, so calls run on a bounded thread pool)
+    DB_IO_THREADS: int = 16
+    DB_MAX_PENDING: int = 256  # callers beyond this wait before reaching the pool
+    WRITE_BUFFER_WINDOW_MS: float = 10
+    WRITE_BUFFER_MAX_OPS: int = 400  # Firestore allows 500 writes per batch
+    CONVERSATION_LEGACY_LOOKUP: bool = True  # also query for random-ID conversations; turn off once scripts.migrate_conversation_ids has run
+    EMAIL_INDEX_LEGACY_LOOKUP: bool = True  # also query users by email; turn off once scripts.backfill_email_index has run
+    MESSAGE_STREAM_BUFFER: int = 100  # messages per storage read while streaming history
+    
+    # Read-through cache for user and conversation documents
+    DOCUMENT_CACHE_SIZE: int = 10000
+    DOCUMENT_CACHE_TTL_SECONDS: float = 300
+    DOCUMENT_CACHE_NEGATIVE_TTL_SECONDS: float = 30
+    EMAIL_CACHE_NEGATIVE_TTL_SECONDS: float = 5  # unknown emails, mostly typos in user search
+    
+    # Metrics exported at /metrics in the Prometheus text format
+    METRICS_ENABLED: bool = True
+    
+    # Logging: JSON lines written by a background thread
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: str = "socketio=WARNING,engineio=WARNING"  # per-logger overrides, e.g. app.main=DEBUG
+    LOG_RATE_LIMITS: str = "typing=1,message_read=1,send_message=20"  # records per second per event
+    LOG_REDACT_FIELDS: str = "text,translated_text,password,hashed_password,access_token,email"
+    LOG_QUEUE_SIZE: int = 10000  # records beyond this are dropped, never waited on
+    LOG_CALLER_INFO: bool = False  # file and line of each record; costs a stack walk per record
     
     class Config:
         env_file = "../.env"
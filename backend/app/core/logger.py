@@ -0,0 +1,195 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from .config import settings
+
+REDACTED = '[redacted]'
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+def _parse_pairs(value: str) -> Dict[str, str]:
+    """'a=1,b=2' -> {'a': '1', 'b': '2'}"""
+    pairs = {}
+    for item in value.split(','):
+        if '=' in item:
+            key, _, setting = item.partition('=')
+            pairs[key.strip()] = setting.strip()
+    return pairs
+
+class Redactor:
+    """Replaces configured payload fields, at any depth, before a record is written"""
+
+    def __init__(self, fields):
+        self.fields = {field.strip().lower() for field in fields if field.strip()}
+
+    def redact(self, value: Any) -> Any:
+        if not self.fields:
+            return value
+        if isinstance(value, dict):
+            return {
+                key: REDACTED if str(key).lower() in self.fields else self.redact(item)
+                for key, item in value.items()
+            }
+        if isinstance(value, (list, tuple)):
+            return [self.redact(item) for item in value]
+        return value
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the record's extra fields merged in"""
+
+    def __init__(self, redactor: Redactor):
+        super().__init__()
+        self.redactor = redactor
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and key not in entry:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(self.redactor.redact(entry), default=str, ensure_ascii=False)
+
+class EventRateLimiter:
+    """
+    Lets at most the configured number of records per second through for
+    each chatty event. The next record that passes carries how many were
+    suppressed in between. Checked before a record is created, so a
+    suppressed event costs a dict lookup and a few float operations.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, float]] = None):
+        self.limits = limits or {}
+        self._buckets: Dict[str, list] = {}  # event -> [tokens, last refill, suppressed]
+        self._lock = threading.Lock()
+
+    def allow(self, event: str) -> Optional[int]:
+        """None to suppress the record, otherwise the number suppressed since the last one"""
+        rate = self.limits.get(event)
+        if rate is None:
+            return 0
+
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(event)
+            if bucket is None:
+                bucket = self._buckets[event] = [rate, now, 0]
+            bucket[0] = min(rate, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return None
+            bucket[0] -= 1
+            suppressed, bucket[2] = bucket[2], 0
+        return suppressed
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the writer thread without formatting them on the
+    caller's thread, and drops them when the queue is full rather than block
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class _Listener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # The queue may be full; wait for room rather than lose the stop signal
+        self.queue.put(self._sentinel)
+
+class LoggingSubsystem:
+    """Queue-based JSON logging: callers enqueue records, one background thread writes them"""
+
+    def __init__(self):
+        self.handler: Optional[DroppingQueueHandler] = None
+        self.listener: Optional[logging.handlers.QueueListener] = None
+        self.limiter = EventRateLimiter()
+        self._lock = threading.Lock()
+
+    def setup(self, stream=None) -> None:
+        """Install the queue handler on the root logger; later calls are no-ops"""
+        with self._lock:
+            if self.handler is not None:
+                return
+
+            redactor = Redactor(settings.LOG_REDACT_FIELDS.split(','))
+            output = logging.StreamHandler(stream or sys.stdout)
+            output.setFormatter(JsonFormatter(redactor))
+
+            log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+            self.handler = DroppingQueueHandler(log_queue)
+            self.listener = _Listener(log_queue, output, respect_handler_level=True)
+            self.listener.start()
+            self.limiter = EventRateLimiter(
+                {event: float(rate) for event, rate in _parse_pairs(settings.LOG_RATE_LIMITS).items()}
+            )
+
+            if not settings.LOG_CALLER_INFO:
+                # Skip the stack walk for file and line of every record (see the logging HOWTO's optimization notes)
+                logging._srcfile = None
+                logging.logProcesses = False
+                logging.logMultiprocessing = False
+
+            root = logging.getLogger()
+            root.handlers = [self.handler]
+            root.setLevel(settings.LOG_LEVEL.upper())
+            for name, level in _parse_pairs(settings.LOG_LEVELS).items():
+                logging.getLogger(name).setLevel(level.upper())
+
+            atexit.register(self.shutdown)
+
+    def shutdown(self) -> None:
+        """Write out queued records and stop the writer thread"""
+        with self._lock:
+            if self.listener is not None:
+                self.listener.stop()
+                self.listener = None
+            if self.handler is not None:
+                logging.getLogger().removeHandler(self.handler)
+                self.handler = None
+
+    def info(self) -> Dict:
+        return {
+            'queued': self.handler.queue.qsize() if self.handler else 0,
+            'dropped': self.handler.dropped if self.handler else 0
+        }
+
+def log_event(logger: logging.Logger, event: str, message: str, level: int = logging.INFO, **fields) -> None:
+    """
+    Structured record tagged with an event name. Disabled levels and
+    rate-limited events return before a record is created.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    suppressed = logging_subsystem.limiter.allow(event)
+    if suppressed is None:
+        return
+    if suppressed:
+        fields['suppressed'] = suppressed
+    logger.log(level, message, extra={'event': event, **fields})
+
+# Create singleton instance
+logging_subsystem = LoggingSubsystem()
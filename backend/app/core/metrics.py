@@ -0,0 +1,252 @@
+import asyncio
+import bisect
+import functools
+import logging
+import math
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from sub-millisecond cache hits to provider timeouts
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# (sample name, labels, value)
+Sample = Tuple[str, Dict[str, str], float]
+# (metric name, type, help, samples)
+Family = Tuple[str, str, str, List[Sample]]
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + '}'
+
+class Counter:
+    """Monotonic count per label combination"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def collect(self) -> List[Family]:
+        samples = [
+            (self.name, dict(zip(self.labelnames, labels)), value)
+            for labels, value in list(self._values.items())
+        ]
+        return [(self.name, self.kind, self.documentation, samples)]
+
+class Gauge:
+    """
+    Current value per label combination, either set directly or read at
+    scrape time from collect_fn, which returns a number or a dict of label
+    tuples to numbers
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 collect_fn: Optional[Callable] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.collect_fn = collect_fn
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def collect(self) -> List[Family]:
+        values = self._values
+        if self.collect_fn is not None:
+            current = self.collect_fn()
+            values = current if isinstance(current, dict) else {(): current}
+        samples = [
+            (self.name, dict(zip(self.labelnames, labels)), value)
+            for labels, value in list(values.items())
+        ]
+        return [(self.name, self.kind, self.documentation, samples)]
+
+class _HistogramSeries:
+    __slots__ = ('buckets', 'counts', 'sum')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        # Bucket bounds are inclusive, as Prometheus expects
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+class Histogram:
+    """Fixed-bucket histogram per label combination; observe() is a bisect and two adds"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], _HistogramSeries] = {}
+
+    def labels(self, *labels: str) -> _HistogramSeries:
+        """Series for one label combination; hot paths keep it to skip the lookup"""
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = _HistogramSeries(self.buckets)
+        return series
+
+    def observe(self, value: float, *labels: str) -> None:
+        self.labels(*labels).observe(value)
+
+    def collect(self) -> List[Family]:
+        samples = []
+        for labels, series in list(self._series.items()):
+            base = dict(zip(self.labelnames, labels))
+            samples += histogram_samples(self.name, base, self.buckets, series.counts, series.sum)
+        return [(self.name, self.kind, self.documentation, samples)]
+
+def histogram_samples(name: str, labels: Dict[str, str], buckets: Sequence[float],
+                      counts: Sequence[int], total: float) -> List[Sample]:
+    """Cumulative bucket, sum and count samples from per-bucket counts (last count is +Inf)"""
+    samples = []
+    cumulative = 0
+    for bound, count in zip(tuple(buckets) + (float('inf'),), counts):
+        cumulative += count
+        samples.append((f'{name}_bucket', {**labels, 'le': _format_value(bound)}, cumulative))
+    samples.append((f'{name}_sum', labels, total))
+    samples.append((f'{name}_count', labels, cumulative))
+    return samples
+
+class MetricsRegistry:
+    """
+    Process-wide metrics exported in the Prometheus text format.
+    Metrics are updated from the event loop thread without locks; values
+    kept elsewhere (queue depths, cache counters) are read by collectors
+    at scrape time, so they cost nothing between scrapes.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+        self.service_seconds = self.histogram(
+            'chat_service_call_seconds', 'Latency of service calls', ['service', 'operation']
+        )
+        self.service_errors = self.counter(
+            'chat_service_call_errors_total', 'Service calls that raised', ['service', 'operation']
+        )
+        self.socket_seconds = self.histogram(
+            'chat_socketio_event_seconds', 'Latency of Socket.IO event handlers', ['event']
+        )
+        self.socket_errors = self.counter(
+            'chat_socketio_event_errors_total', 'Socket.IO event handlers that raised', ['event']
+        )
+        self.loop_lag = self.histogram(
+            'chat_event_loop_lag_seconds', 'How late the event loop wakes up from a short sleep',
+            buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+        )
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self.register(metric.collect)
+        return metric
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+              collect_fn: Optional[Callable] = None) -> Gauge:
+        metric = Gauge(name, documentation, labelnames, collect_fn)
+        self.register(metric.collect)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self.register(metric.collect)
+        return metric
+
+    def register(self, collect: Callable[[], Iterable[Family]]) -> None:
+        """Add a callable returning (name, type, help, samples) families at scrape time"""
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for collect in self._collectors:
+            try:
+                families = list(collect())
+            except Exception as e:
+                logger.error("Metrics collector error: %s", e)
+                continue
+            for name, kind, documentation, samples in families:
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} {kind}')
+                for sample_name, labels, value in samples:
+                    lines.append(f'{sample_name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def instrument(self, service: str, operation: Optional[str] = None) -> Callable:
+        """Decorator timing a sync or async service method and counting the calls that raise"""
+        def decorator(func):
+            labels = (service, operation or func.__name__)
+            return self._timed(func, self.service_seconds.labels(*labels), self.service_errors, labels)
+        return decorator
+
+    def socket_event(self, func: Callable) -> Callable:
+        """Decorator timing a Socket.IO handler; keeps the name sio.event registers it under"""
+        labels = (func.__name__,)
+        return self._timed(func, self.socket_seconds.labels(*labels), self.socket_errors, labels)
+
+    def _timed(self, func: Callable, series: _HistogramSeries, errors: Counter, labels: Tuple[str, ...]) -> Callable:
+        if not self.enabled:
+            return func
+        perf_counter = time.perf_counter
+        observe = series.observe
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                except BaseException:
+                    errors.inc(*labels)
+                    raise
+                finally:
+                    observe(perf_counter() - started)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except BaseException:
+                errors.inc(*labels)
+                raise
+            finally:
+                observe(perf_counter() - started)
+        return wrapper
+
+# Create singleton instance
+metrics = MetricsRegistry(enabled=settings.METRICS_ENABLED)
@@ -1,34 +1,52 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
+import logging
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from .config import settings
 
+logger = logging.getLogger(__name__)
+
+def build_password_context(rounds: int) -> CryptContext:
+    """bcrypt context; hashes with a different cost are reported as needing an update"""
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__rounds=rounds
+    )
+
 # Configure bcrypt with proper settings
-pwd_context = CryptContext(
-    schemes=["bcrypt"],
-    deprecated="auto",
-    bcrypt__rounds=12
-)
+pwd_context = build_password_context(settings.BCRYPT_ROUNDS)
+
+def _truncate(password: str) -> str:
+    """bcrypt only uses the first 72 bytes"""
+    return password.encode('utf-8')[:72].decode('utf-8')
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password"""
     try:
-        # Truncate password to 72 bytes for bcrypt
-        password_bytes = plain_password.encode('utf-8')[:72]
-        return pwd_context.verify(password_bytes.decode('utf-8'), hashed_password)
+        return pwd_context.verify(_truncate(plain_password), hashed_password)
     except Exception as e:
-        print(f"Password verification error: {e}")
+        logger.error("Password verification error: %s", e)
         return False
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and, when the stored hash used another cost factor,
+    return a replacement hash made with the configured one
+    """
+    try:
+        return pwd_context.verify_and_update(_truncate(plain_password), hashed_password)
+    except Exception as e:
+        logger.error("Password verification error: %s", e)
+        return False, None
+
 def get_password_hash(password: str) -> str:
     """Hash a password"""
     try:
-        # Truncate password to 72 bytes for bcrypt
-        password_bytes = password.encode('utf-8')[:72]
-        return pwd_context.hash(password_bytes.decode('utf-8'))
+        return pwd_context.hash(_truncate(password))
     except Exception as e:
-        print(f"Password hashing error: {e}")
+        logger.error("Password hashing error: %s", e)
         raise
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
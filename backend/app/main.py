@@ -1,7 +1,24 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from datetime import datetime
+from typing import Optional
+import logging
 import socketio
-from .api import auth, chat
+from .core.auth import token_verifier
+from .core.logger import logging_subsystem, log_event
+from .api import auth, chat, admin, metrics as metrics_api
+from .core.metrics import metrics
+from .services.translation_service import translation_service
+from .services.sentiment_service import sentiment_service
+from .services.storage import storage
+from .services.password_hasher import password_hasher
+from .services.room_languages import room_languages
+from .services.realtime import sio, broadcast_localized
+from .services.message_enricher import message_enricher
+
+# JSON logs are written by a background thread, never on the event loop
+logging_subsystem.setup()
+logger = logging.getLogger(__name__)
 
 # Create FastAPI app
 app = FastAPI(
@@ -10,14 +27,6 @@ app = FastAPI(
     description="Real-time translation with sentiment analysis"
 )
 
-# Create Socket.IO server with proper CORS
-sio = socketio.AsyncServer(
-    async_mode='asgi',
-    cors_allowed_origins='*',
-    logger=True,
-    engineio_logger=True
-)
-
 # Wrap with Socket.IO
 socket_app = socketio.ASGIApp(sio, app)
 
@@ -28,14 +37,38 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include routers
 app.include_router(auth.router)
 app.include_router(chat.router)
+app.include_router(admin.router)
+app.include_router(metrics_api.router)
 
 # Track online users
 online_users = {}
+metrics.gauge('chat_online_users', 'Connected users that announced themselves', collect_fn=lambda: len(online_users))
+
+@app.on_event("startup")
+async def startup():
+    # Load language profiles before the first message needs them
+    translation_service.detector.warm_up()
+    # Spawn the sentiment workers so the first message does not pay for it
+    sentiment_service.start()
+    # Same for the bcrypt workers and the first login
+    password_hasher.start()
+    # Background translation and sentiment for two-phase message delivery
+    message_enricher.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await message_enricher.stop()
+    await sentiment_service.stop()
+    await password_hasher.stop()
+    await storage.close()
+    translation_service.cache.close()
+    logging_subsystem.shutdown()
 
 @app.get("/")
 async def root():
@@ -57,36 +90,77 @@ async def root():
 async def health():
     return {"status": "healthy", "online_users": len(online_users)}
 
+def _connect_token(environ, auth) -> Optional[str]:
+    """Access token from the client's auth payload, or an Authorization: Bearer header"""
+    if isinstance(auth, dict) and auth.get('token'):
+        return auth['token']
+    scheme, _, token = environ.get('HTTP_AUTHORIZATION', '').partition(' ')
+    if scheme.lower() == 'bearer' and token:
+        return token
+    return None
+
+async def _room_member(sid, conversation_id) -> Optional[str]:
+    """User ID of the connection if it joined the conversation's room, else None"""
+    if conversation_id not in sio.rooms(sid):
+        return None
+    session = await sio.get_session(sid)
+    return session['user_id']
+
 # Socket.IO events
 @sio.event
-async def connect(sid, environ):
-    print(f"✅ Client connected: {sid}")
+@metrics.socket_event
+async def connect(sid, environ, auth=None):
+    """Verify the access token once; later events read the user from the session"""
+    token = _connect_token(environ, auth)
+    identity = token_verifier.verify(token) if token else None
+    if identity is None:
+        log_event(logger, 'connect', "Connection refused", logging.WARNING, sid=sid)
+        raise socketio.exceptions.ConnectionRefusedError('unauthorized')
+    
+    await sio.save_session(sid, identity)
+    log_event(logger, 'connect', "Client connected", sid=sid, user_id=identity['user_id'])
     await sio.emit('connection_response', {'status': 'connected', 'sid': sid}, room=sid)
 
 @sio.event
+@metrics.socket_event
 async def disconnect(sid):
-    print(f"❌ Client disconnected: {sid}")
+    log_event(logger, 'disconnect', "Client disconnected", sid=sid)
+    room_languages.drop(sid)
     if sid in online_users:
         user_id = online_users[sid]
         del online_users[sid]
         await sio.emit('user_offline', {'user_id': user_id})
 
 @sio.event
+@metrics.socket_event
 async def user_online(sid, data):
     """Track user online status"""
-    user_id = data.get('user_id')
+    session = await sio.get_session(sid)
+    user_id = session['user_id']
     online_users[sid] = user_id
-    print(f"👤 User {user_id} is online (sid: {sid})")
+    log_event(logger, 'user_online', "User online", user_id=user_id, sid=sid)
     await sio.emit('user_online', {'user_id': user_id})
 
 @sio.event
+@metrics.socket_event
 async def join_conversation(sid, data):
     """User joins a conversation room"""
     conversation_id = data.get('conversation_id')
-    user_id = data.get('user_id')
+    session = await sio.get_session(sid)
+    user_id = session['user_id']
+    
+    # Checked once here; events in the room only test room membership
+    conversation = await storage.get_conversation(conversation_id) if conversation_id else None
+    if not conversation or user_id not in (conversation['participant1_id'], conversation['participant2_id']):
+        log_event(logger, 'join_conversation', "Join refused", logging.WARNING, user_id=user_id, conversation_id=conversation_id)
+        return
+    
+    user = await storage.get_user_by_id(user_id)
+    language = user.get('preferred_language', 'english') if user else 'english'
     
     await sio.enter_room(sid, conversation_id)
-    print(f"👤 User {user_id} joined conversation {conversation_id}")
+    room_languages.join(conversation_id, sid, user_id, language)
+    log_event(logger, 'join_conversation', "User joined conversation", user_id=user_id, conversation_id=conversation_id)
     
     await sio.emit('joined_conversation', {
         'conversation_id': conversation_id,
@@ -94,27 +168,54 @@ async def join_conversation(sid, data):
     }, room=conversation_id)
 
 @sio.event
+@metrics.socket_event
 async def leave_conversation(sid, data):
     """User leaves a conversation room"""
     conversation_id = data.get('conversation_id')
-    user_id = data.get('user_id')
+    session = await sio.get_session(sid)
+    user_id = session['user_id']
     
     await sio.leave_room(sid, conversation_id)
-    print(f"👤 User {user_id} left conversation {conversation_id}")
+    room_languages.leave(conversation_id, sid)
+    log_event(logger, 'leave_conversation', "User left conversation", user_id=user_id, conversation_id=conversation_id)
 
 @sio.event
+@metrics.socket_event
 async def send_message(sid, data):
     """Handle real-time message"""
     conversation_id = data.get('conversation_id')
-    print(f"📨 Message sent to conversation {conversation_id}")
-    print(f"Message data: {data}")
-    await sio.emit('new_message', data, room=conversation_id)
+    sender_id = await _room_member(sid, conversation_id)
+    if sender_id is None:
+        log_event(logger, 'send_message', "Message refused: not in conversation", logging.WARNING, sid=sid, conversation_id=conversation_id)
+        return
+    
+    text = data.get('text')
+    if not isinstance(text, str) or not text.strip():
+        return
+    
+    # Only relay what the client may set; translations are always the server's
+    message = {
+        'id': data.get('id'),
+        'client_message_id': data.get('client_message_id'),
+        'conversation_id': conversation_id,
+        'sender_id': sender_id,
+        'text': text,
+        'language': data.get('language'),
+        'timestamp': datetime.utcnow()
+    }
+    log_event(logger, 'send_message', "Message sent", conversation_id=conversation_id, sender_id=sender_id)
+    # Full payloads only at DEBUG; bodies are redacted unless LOG_REDACT_FIELDS says otherwise
+    log_event(logger, 'send_message', "Message payload", logging.DEBUG, payload=message)
+    await broadcast_localized('new_message', conversation_id, message)
 
 @sio.event
+@metrics.socket_event
 async def typing(sid, data):
     """Handle typing indicator"""
     conversation_id = data.get('conversation_id')
-    user_id = data.get('user_id')
+    user_id = await _room_member(sid, conversation_id)
+    if user_id is None:
+        return
     is_typing = data.get('is_typing', True)
     
     await sio.emit('user_typing', {
@@ -123,34 +224,40 @@ async def typing(sid, data):
         'is_typing': is_typing
     }, room=conversation_id, skip_sid=sid)
     
-    print(f"⌨️ User {user_id} typing: {is_typing}")
+    log_event(logger, 'typing', "User typing", user_id=user_id, is_typing=is_typing)
 
 @sio.event
+@metrics.socket_event
 async def message_read(sid, data):
     """Handle read receipt"""
     conversation_id = data.get('conversation_id')
     message_id = data.get('message_id')
-    user_id = data.get('user_id')
+    user_id = await _room_member(sid, conversation_id)
+    if user_id is None:
+        return
     
     await sio.emit('message_read', {
         'message_id': message_id,
         'user_id': user_id
     }, room=conversation_id)
     
-    print(f"✓✓ Message {message_id} read by {user_id}")
+    log_event(logger, 'message_read', "Message read", message_id=message_id, user_id=user_id)
 
 @sio.event
+@metrics.socket_event
 async def voice_call_request(sid, data):
     """Handle voice call request"""
     conversation_id = data.get('conversation_id')
-    caller_id = data.get('caller_id')
+    caller_id = await _room_member(sid, conversation_id)
+    if caller_id is None:
+        return
     
     await sio.emit('incoming_call', {
         'conversation_id': conversation_id,
         'caller_id': caller_id
     }, room=conversation_id, skip_sid=sid)
     
-    print(f"📞 Call request from {caller_id}")
+    log_event(logger, 'voice_call_request', "Call request", caller_id=caller_id, conversation_id=conversation_id)
 
 if __name__ == "__main__":
     import uvicorn
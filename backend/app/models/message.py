@@ -11,6 +11,7 @@ class MessageBase(BaseModel):
 class MessageCreate(MessageBase):
     conversation_id: str
     sender_id: str
+    client_message_id: Optional[str] = None  # echoed back so clients can match their optimistic copy
 
 class Message(MessageBase):
     id: str
@@ -1,24 +1,29 @@
 from datetime import datetime
 from typing import Optional
+import logging
 from ..models.user import UserCreate, UserLogin, User, UserInDB, Token
-from ..core.security import verify_password, get_password_hash, create_access_token
-from .firebase_service import firebase_service
+from ..core.metrics import metrics
+from ..core.security import create_access_token
+from .storage import storage
+from .password_hasher import password_hasher, PasswordHasherBusy, PasswordHasherUnavailable
+
+logger = logging.getLogger(__name__)
 
 class AuthService:
+    @metrics.instrument('auth')
     async def register_user(self, user_data: UserCreate) -> Optional[Token]:
         """Register a new user"""
         try:
-            print(f"Attempting to register user: {user_data.email}")
+            logger.debug("Registering user", extra={'email': user_data.email})
             
             # Check if user exists
-            existing_user = await firebase_service.get_user_by_email(user_data.email)
+            existing_user = await storage.get_user_by_email(user_data.email)
             if existing_user:
-                print(f"User already exists: {user_data.email}")
+                logger.info("Registration rejected: email already registered", extra={'email': user_data.email})
                 raise Exception("Email already registered")
             
-            # Hash password
-            print("Hashing password...")
-            hashed_password = get_password_hash(user_data.password)
+            # Hash password off the event loop
+            hashed_password = await password_hasher.hash(user_data.password)
             
             # Create user document
             user_dict = {
@@ -30,12 +35,11 @@ class AuthService:
                 'is_active': True
             }
             
-            # Save to Firebase
-            print("Saving user to Firebase...")
-            created_user = await firebase_service.create_user(user_dict)
+            # Save to storage
+            created_user = await storage.create_user(user_dict)
             
             if created_user:
-                print(f"User created successfully: {created_user['id']}")
+                logger.info("User registered", extra={'user_id': created_user['id']})
                 
                 # Create access token
                 access_token = create_access_token(
@@ -58,30 +62,35 @@ class AuthService:
                 )
             
             raise Exception("Failed to create user")
+        except (PasswordHasherBusy, PasswordHasherUnavailable):
+            raise
         except Exception as e:
-            print(f"Registration error: {e}")
+            logger.error("Registration error: %s", e)
             return None
     
+    @metrics.instrument('auth')
     async def login_user(self, login_data: UserLogin) -> Optional[Token]:
         """Login user"""
         try:
-            print(f"Attempting to login user: {login_data.email}")
+            logger.debug("Logging in user", extra={'email': login_data.email})
             
             # Get user from database
-            user = await firebase_service.get_user_by_email(login_data.email)
+            user = await storage.get_user_by_email(login_data.email)
             
             if not user:
-                print(f"User not found: {login_data.email}")
+                logger.info("Login rejected: unknown email", extra={'email': login_data.email})
                 return None
             
-            print("User found, verifying password...")
-            
-            # Verify password
-            if not verify_password(login_data.password, user['hashed_password']):
-                print("Password verification failed")
+            # Verify password off the event loop
+            verified, new_hash = await password_hasher.verify(login_data.password, user['hashed_password'])
+            if not verified:
+                logger.info("Login rejected: wrong password", extra={'user_id': user['id']})
                 return None
             
-            print("Password verified successfully")
+            # Stored hash used an older cost factor
+            if new_hash:
+                await storage.update_user_password(user['id'], new_hash)
+                logger.info("Password rehashed", extra={'user_id': user['id']})
             
             # Create access token
             access_token = create_access_token(
@@ -98,14 +107,16 @@ class AuthService:
                 is_active=user['is_active']
             )
             
-            print(f"Login successful for user: {user['email']}")
+            logger.info("User logged in", extra={'user_id': user['id']})
             
             return Token(
                 access_token=access_token,
                 user=user_response
             )
+        except (PasswordHasherBusy, PasswordHasherUnavailable):
+            raise
         except Exception as e:
-            print(f"Login error: {e}")
+            logger.error("Login error: %s", e)
             return None
 
 # Create singleton instance
@@ -0,0 +1,117 @@
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from .single_flight import SingleFlight
+
+
+class DocumentCache:
+    """
+    Read-through cache for documents that rarely change.
+    Entries live in a bounded LRU with a TTL. Missing documents are cached
+    too, for a shorter negative TTL, so lookups of unknown IDs do not reach
+    the store every time. Concurrent misses for one key share a single
+    load. Writers call set(), patch() or invalidate(); a load that started
+    before the write is not cached, so it cannot bring back the old document.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float, negative_ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+
+        # key -> (document or None, stored at)
+        self._entries: "OrderedDict[Hashable, Tuple[Optional[Dict[str, Any]], float]]" = OrderedDict()
+        self._versions: Dict[Hashable, int] = {}
+        self.loads = SingleFlight()
+
+        self.stats = {
+            'hits': 0,
+            'negative_hits': 0,
+            'misses': 0,
+            'invalidations': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'served_age_ms_total': 0.0,
+            'served_age_ms_max': 0.0
+        }
+
+    async def get(self, key: Hashable,
+                  loader: Callable[[], Awaitable[Optional[Dict[str, Any]]]]) -> Optional[Dict[str, Any]]:
+        """Return the cached document for key, loading it on a miss"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            document, stored_at = entry
+            age = time.monotonic() - stored_at
+            ttl = self.ttl_seconds if document is not None else self.negative_ttl_seconds
+            if age < ttl:
+                self._entries.move_to_end(key)
+                if document is None:
+                    self.stats['negative_hits'] += 1
+                    return None
+                self.stats['hits'] += 1
+                self.stats['served_age_ms_total'] += age * 1000
+                self.stats['served_age_ms_max'] = max(self.stats['served_age_ms_max'], age * 1000)
+                return dict(document)
+            del self._entries[key]
+            self.stats['expirations'] += 1
+
+        self.stats['misses'] += 1
+        version = self._versions.get(key, 0)
+        # Errors propagate to the caller and are never cached
+        document = await self.loads.do(key, loader)
+        if self._versions.get(key, 0) == version:
+            self._store(key, document)
+        return dict(document) if document is not None else None
+
+    def set(self, key: Hashable, document: Optional[Dict[str, Any]]) -> None:
+        """Store a document the caller just wrote"""
+        self._bump(key)
+        self._store(key, document)
+
+    def patch(self, key: Hashable, fields: Dict[str, Any]) -> None:
+        """Apply a field update the caller just wrote to the cached copy, if any"""
+        self._bump(key)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] is not None:
+            entry[0].update(fields)
+
+    def invalidate(self, key: Hashable) -> None:
+        self.stats['invalidations'] += 1
+        self._bump(key)
+        self._entries.pop(key, None)
+
+    def clear(self) -> int:
+        dropped = len(self._entries)
+        self._entries.clear()
+        self._versions.clear()
+        return dropped
+
+    def info(self) -> Dict:
+        hits = self.stats['hits']
+        lookups = hits + self.stats['negative_hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'served_age_ms_total': round(self.stats['served_age_ms_total'], 3),
+            'served_age_ms_max': round(self.stats['served_age_ms_max'], 3),
+            'avg_served_age_ms': round(self.stats['served_age_ms_total'] / hits, 3) if hits else 0.0,
+            'hit_ratio': round((hits + self.stats['negative_hits']) / lookups, 4) if lookups else 0.0,
+            'entries': len(self._entries),
+            'max_size': self.max_size,
+            'ttl_seconds': self.ttl_seconds,
+            'negative_ttl_seconds': self.negative_ttl_seconds,
+            'loads': self.loads.info()
+        }
+
+    def _bump(self, key: Hashable) -> None:
+        self._versions[key] = self._versions.get(key, 0) + 1
+        if len(self._versions) > self.max_size * 2:
+            # Versions only matter while a load is in flight
+            self._versions = {k: v for k, v in self._versions.items() if self.loads.in_flight(k)}
+
+    def _store(self, key: Hashable, document: Optional[Dict[str, Any]]) -> None:
+        self._entries[key] = (dict(document) if document is not None else None, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats['evictions'] += 1
@@ -1,133 +1,202 @@
 import firebase_admin
 from firebase_admin import credentials, firestore, auth
-from typing import Optional, Dict, Any
-from datetime import datetime
+from google.api_core.exceptions import AlreadyExists
+from typing import Optional, Dict, Any, AsyncIterator, List, Tuple
+import logging
 import os
+from ..core.config import settings
+from .write_buffer import WriteOp, Increment
+from .storage_base import (
+    StorageBackend, EMAIL_INDEX, email_key, inbox_collection, inbox_entry,
+    encode_inbox_cursor, decode_inbox_cursor
+)
+
+logger = logging.getLogger(__name__)
+
+class FirebaseService(StorageBackend):
+    """Storage backed by Cloud Firestore"""
+
+    name = 'firestore'
 
-class FirebaseService:
     def __init__(self):
         # Initialize Firebase Admin
         cred_path = os.path.join(os.path.dirname(__file__), '../../firebase-credentials-local-language.json')
-        
+
         if not firebase_admin._apps:
             cred = credentials.Certificate(cred_path)
             firebase_admin.initialize_app(cred)
-        
+
         self.db = firestore.client()
-    
-    # User operations
-    async def create_user(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
-        try:
-            user_ref = self.db.collection('users').document()
-            user_data['id'] = user_ref.id
-            user_ref.set(user_data)
-            return user_data
-        except Exception as e:
-            print(f"Error creating user: {e}")
-            return None
-    
-    async def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
-        try:
-            users_ref = self.db.collection('users')
-            query = users_ref.where('email', '==', email).limit(1)
-            docs = query.stream()
-            
-            for doc in docs:
-                return doc.to_dict()
-            return None
-        except Exception as e:
-            print(f"Error getting user: {e}")
-            return None
-   
-    async def get_user_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
-        try:
-            doc = self.db.collection('users').document(user_id).get()
-            if doc.exists:
-                return doc.to_dict()
-            return None
-        except Exception as e:
-            print(f"Error getting user: {e}")
-            return None
-    
-    async def update_user_language(self, user_id: str, language: str) -> bool:
+        super().__init__()
+
+    def _new_id(self) -> str:
+        # Firestore generates document IDs locally
+        return self.db.collection('messages').document().id
+
+    def _commit_batch(self, ops: List[WriteOp]) -> None:
+        """Apply buffered writes as one atomic Firestore batch"""
+        batch = self.db.batch()
+        for kind, collection, doc_id, data in ops:
+            ref = self.db.collection(collection).document(doc_id)
+            data = {
+                field: firestore.Increment(value.amount) if isinstance(value, Increment) else value
+                for field, value in data.items()
+            }
+            if kind == 'set':
+                batch.set(ref, data)
+            elif kind == 'merge':
+                batch.set(ref, data, merge=True)
+            else:
+                batch.update(ref, data)
+        batch.commit()
+
+    def _get_document(self, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        doc = self.db.collection(collection).document(doc_id).get()
+        if doc.exists:
+            return doc.to_dict()
+        return None
+
+    def _update_inbox_preview(self, user_id: str, conversation_id: str, message_id: str, preview: str) -> bool:
+        ref = self.db.collection(inbox_collection(user_id)).document(conversation_id)
+
+        @firestore.transactional
+        def swap(transaction) -> bool:
+            entry = ref.get(transaction=transaction).to_dict()
+            if entry is None or entry.get('last_message_id') != message_id:
+                return False
+            transaction.update(ref, {'last_message_preview': preview})
+            return True
+
+        return swap(self.db.transaction())
+
+    def _create_user(self, user_data: Dict[str, Any], index_entry: Dict[str, Any]) -> bool:
+        index_ref = self.db.collection(EMAIL_INDEX).document(email_key(user_data['email']))
         try:
-            self.db.collection('users').document(user_id).update({
-                'preferred_language': language
-            })
+            # create() fails if the email is indexed, so concurrent registrations cannot both succeed
+            batch = self.db.batch()
+            batch.create(index_ref, index_entry)
+            batch.set(self.db.collection('users').document(user_data['id']), user_data)
+            batch.commit()
             return True
-        except Exception as e:
-            print(f"Error updating user language: {e}")
+        except AlreadyExists:
             return False
-    
-    # Conversation operations
-    async def create_conversation(self, conversation_data: Dict[str, Any]) -> Dict[str, Any]:
+
+    def _find_legacy_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        """Query users by email, for accounts created before scripts/backfill_email_index.py"""
+        users_ref = self.db.collection('users')
+        query = users_ref.where('email', '==', email).limit(1)
+        docs = query.stream()
+
+        for doc in docs:
+            return doc.to_dict()
+        return None
+
+    def _create_conversation(self, conversation_data: Dict[str, Any]) -> Dict[str, Any]:
+        conversation_id = conversation_data['id']
+        conv_ref = self.db.collection('conversations').document(conversation_id)
         try:
-            conv_ref = self.db.collection('conversations').document()
-            conversation_data['id'] = conv_ref.id
-            conv_ref.set(conversation_data)
+            # create() fails if the document exists, so concurrent requests cannot duplicate it
+            batch = self.db.batch()
+            batch.create(conv_ref, conversation_data)
+            for user_id in (conversation_data['participant1_id'], conversation_data['participant2_id']):
+                inbox_ref = self.db.collection(inbox_collection(user_id)).document(conversation_id)
+                batch.set(inbox_ref, inbox_entry(conversation_data, user_id), merge=True)
+            batch.commit()
             return conversation_data
-        except Exception as e:
-            print(f"Error creating conversation: {e}")
-            return None
-    
-    async def get_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
-        try:
-            doc = self.db.collection('conversations').document(conversation_id).get()
-            if doc.exists:
+        except AlreadyExists:
+            return conv_ref.get().to_dict()
+
+    def _find_legacy_conversation(self, participant1_id: str, participant2_id: str) -> Optional[Dict[str, Any]]:
+        """Query for a conversation stored under a random ID, before scripts/migrate_conversation_ids.py"""
+        convs_ref = self.db.collection('conversations')
+
+        for first, second in ((participant1_id, participant2_id), (participant2_id, participant1_id)):
+            query = convs_ref.where('participant1_id', '==', first)\
+                             .where('participant2_id', '==', second)\
+                             .limit(1).stream()
+            for doc in query:
                 return doc.to_dict()
-            return None
-        except Exception as e:
-            print(f"Error getting conversation: {e}")
-            return None
-    
-    async def update_conversation_timestamp(self, conversation_id: str) -> bool:
-        try:
-            self.db.collection('conversations').document(conversation_id).update({
-                'last_message_at': datetime.utcnow()
-            })
-            return True
-        except Exception as e:
-            print(f"Error updating conversation timestamp: {e}")
-            return False
-    
-    # Message operations
-    async def create_message(self, message_data: Dict[str, Any]) -> Dict[str, Any]:
-        try:
-            msg_ref = self.db.collection('messages').document()
-            message_data['id'] = msg_ref.id
-            msg_ref.set(message_data)
-            return message_data
-        except Exception as e:
-            print(f"Error creating message: {e}")
-            return None
-    
-    async def get_messages(self, conversation_id: str, limit: int = 50):
-        try:
-            messages_ref = self.db.collection('messages')
-            query = messages_ref.where('conversation_id', '==', conversation_id)\
-                               .order_by('timestamp')\
-                               .limit(limit)
-            docs = query.stream()
-            
-            messages = []
-            for doc in docs:
-                messages.append(doc.to_dict())
-            return messages
-        except Exception as e:
-            print(f"Error getting messages: {e}")
-            return []
-    
-    async def mark_message_read(self, message_id: str) -> bool:
-        """Mark a message as read"""
-        try:
-            self.db.collection('messages').document(message_id).update({
-                'read': True,
-                'read_at': datetime.utcnow()
-            })
-            return True
-        except Exception as e:
-            print(f"Error marking message read: {e}")
-            return False
+        return None
+
+    def _get_user_inbox(self, user_id: str, limit: int,
+                        cursor: Optional[str]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        query = self.db.collection(inbox_collection(user_id))\
+                       .order_by('updated_at', direction=firestore.Query.DESCENDING)\
+                       .order_by('__name__', direction=firestore.Query.DESCENDING)
+        if cursor:
+            updated_at, conversation_id = decode_inbox_cursor(cursor)
+            query = query.start_after({'updated_at': updated_at, '__name__': conversation_id})
+
+        # One extra entry tells whether another page exists
+        entries = [doc.to_dict() for doc in query.limit(limit + 1).stream()]
+        if len(entries) > limit:
+            entries = entries[:limit]
+            return entries, encode_inbox_cursor(entries[-1])
+        return entries, None
+
+    def _get_messages(self, conversation_id: str, limit: int, before: Optional[str],
+                      after: Optional[str], latest: bool) -> List[Dict[str, Any]]:
+        query, newest_first = self._messages_query(conversation_id, before, after, latest)
+        messages = [doc.to_dict() for doc in query.limit(limit).stream()]
+        if newest_first:
+            messages.reverse()
+        return messages
+
+    def _messages_query(self, conversation_id: str, before: Optional[str],
+                        after: Optional[str], latest: bool):
+        """Keyset query over (timestamp, document ID), and whether it runs newest first"""
+        messages_ref = self.db.collection('messages')
+        query = messages_ref.where('conversation_id', '==', conversation_id)
+
+        if before:
+            # Walk backwards from the cursor so the limit keeps the messages closest to it
+            cursor = messages_ref.document(before).get()
+            if not cursor.exists:
+                raise ValueError(f"Unknown message cursor {before}")
+            return query.order_by('timestamp', direction=firestore.Query.DESCENDING).start_after(cursor), True
+
+        if after:
+            cursor = messages_ref.document(after).get()
+            if not cursor.exists:
+                raise ValueError(f"Unknown message cursor {after}")
+            return query.order_by('timestamp').start_after(cursor), False
+
+        if latest:
+            return query.order_by('timestamp', direction=firestore.Query.DESCENDING), True
+
+        return query.order_by('timestamp'), False
+
+    async def stream_messages(self, conversation_id: str, after: Optional[str] = None,
+                              limit: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield messages oldest first, reading one keyset page per I/O call
+        so a slow client never holds a thread between pages. Pages resume
+        from the last document snapshot, which needs no extra cursor read.
+        """
+        cursor = None
+        remaining = limit
+        while remaining is None or remaining > 0:
+            page_size = settings.MESSAGE_STREAM_BUFFER if remaining is None else min(remaining, settings.MESSAGE_STREAM_BUFFER)
+            try:
+                page, cursor = await self._run(self._stream_page, conversation_id, after, cursor, page_size)
+            except Exception as e:
+                logger.error("Error streaming messages: %s", e)
+                return
+            for message in page:
+                yield message
+            if len(page) < page_size:
+                return
+            if remaining is not None:
+                remaining -= len(page)
 
-# Create singleton instance
-firebase_service = FirebaseService()
\ No newline at end of file
+    def _stream_page(self, conversation_id: str, after: Optional[str], cursor, page_size: int):
+        """One page of stream_messages and the snapshot the next page starts after"""
+        if cursor is None:
+            query, _ = self._messages_query(conversation_id, None, after, False)
+        else:
+            query = self.db.collection('messages')\
+                           .where('conversation_id', '==', conversation_id)\
+                           .order_by('timestamp')\
+                           .start_after(cursor)
+        docs = list(query.limit(page_size).stream())
+        return [doc.to_dict() for doc in docs], (docs[-1] if docs else cursor)
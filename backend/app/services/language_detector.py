@@ -0,0 +1,169 @@
+import logging
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+from langdetect import DetectorFactory
+from langdetect.detector_factory import PROFILES_DIRECTORY
+
+logger = logging.getLogger(__name__)
+
+# Unicode blocks as (start, end exclusive, script)
+SCRIPT_RANGES = [
+    (0x0041, 0x005B, 'latin'),
+    (0x0061, 0x007B, 'latin'),
+    (0x00C0, 0x0250, 'latin'),
+    (0x0600, 0x0700, 'arabic'),
+    (0x0750, 0x0780, 'arabic'),
+    (0x08A0, 0x0900, 'arabic'),
+    (0x0900, 0x0980, 'devanagari'),
+    (0x0980, 0x0A00, 'bengali'),
+    (0x0A00, 0x0A80, 'gurmukhi'),
+    (0x0A80, 0x0B00, 'gujarati'),
+    (0x0B00, 0x0B80, 'odia'),
+    (0x0B80, 0x0C00, 'tamil'),
+    (0x0C00, 0x0C80, 'telugu'),
+    (0x0C80, 0x0D00, 'kannada'),
+    (0x0D00, 0x0D80, 'malayalam'),
+    (0xFB50, 0xFE00, 'arabic'),
+    (0xFE70, 0xFF00, 'arabic'),
+]
+
+SCRIPTS = sorted({script for _, _, script in SCRIPT_RANGES})
+
+# Scripts used by exactly one of our languages
+SCRIPT_LANGUAGE = {
+    'gurmukhi': 'pa',
+    'gujarati': 'gu',
+    'odia': 'or',
+    'tamil': 'ta',
+    'telugu': 'te',
+    'kannada': 'kn',
+    'malayalam': 'ml',
+    'arabic': 'ur',
+}
+
+# Scripts shared by several languages: candidates for langdetect, first is the default.
+# Sanskrit also uses Devanagari but langdetect has no 'sa' profile, so it can
+# never be picked here; Sanskrit text is detected as Hindi or Marathi.
+SCRIPT_CANDIDATES = {
+    'devanagari': ['hi', 'mr'],
+}
+
+# Letters only Assamese uses within the Bengali block (ra and wa)
+ASSAMESE_LETTERS = (0x09F0, 0x09F1)
+
+# Share of script letters the dominant script needs before we trust it
+DOMINANT_SCRIPT_SHARE = 0.6
+
+
+def _build_lookup():
+    """Sorted block edges plus the script index of the block each edge opens"""
+    edges = []
+    script_ids = []
+    for start, end, script in sorted(SCRIPT_RANGES):
+        if edges and edges[-1] == start:
+            script_ids[-1] = SCRIPTS.index(script)
+        else:
+            edges.append(start)
+            script_ids.append(SCRIPTS.index(script))
+        edges.append(end)
+        script_ids.append(-1)
+    return np.array(edges, dtype=np.uint32), np.array(script_ids, dtype=np.int64)
+
+
+_EDGES, _EDGE_SCRIPTS = _build_lookup()
+
+
+class LanguageDetector:
+    """
+    Tiered language detector.
+    A codepoint-range histogram settles every text written in a script that
+    only one supported language uses. langdetect, seeded and with a profile
+    factory loaded once, only runs for shared scripts such as Devanagari and
+    Latin.
+    """
+
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+        self._factory: Optional[DetectorFactory] = None
+        self._factory_lock = threading.Lock()
+        self.stats = {'script': 0, 'langdetect': 0, 'fallback': 0}
+
+    def script_histogram(self, text: str) -> Dict[str, int]:
+        """Count letters per script in one vectorized pass over the codepoints"""
+        codepoints = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+        if not codepoints.size:
+            return {}
+        bins = np.searchsorted(_EDGES, codepoints, side='right') - 1
+        ids = np.where(bins >= 0, _EDGE_SCRIPTS[np.clip(bins, 0, None)], -1)
+        counts = np.bincount(ids[ids >= 0], minlength=len(SCRIPTS))
+        return {SCRIPTS[i]: int(count) for i, count in enumerate(counts) if count}
+
+    def dominant_script(self, histogram: Dict[str, int]) -> Optional[str]:
+        if not histogram:
+            return None
+        script, count = max(histogram.items(), key=lambda item: item[1])
+        if count / sum(histogram.values()) < DOMINANT_SCRIPT_SHARE:
+            return None
+        return script
+
+    def detect(self, text: str, default: str = 'en') -> str:
+        """Return an ISO 639-1 code for text"""
+        histogram = self.script_histogram(text)
+        if not histogram:
+            # Emoji, digits or punctuation only
+            self.stats['fallback'] += 1
+            return default
+
+        script = self.dominant_script(histogram)
+
+        if script in SCRIPT_LANGUAGE:
+            self.stats['script'] += 1
+            return SCRIPT_LANGUAGE[script]
+
+        if script == 'bengali':
+            self.stats['script'] += 1
+            if any(chr(letter) in text for letter in ASSAMESE_LETTERS):
+                return 'as'
+            return 'bn'
+
+        candidates = SCRIPT_CANDIDATES.get(script)
+        code = self._langdetect(text, candidates)
+        if code is None:
+            self.stats['fallback'] += 1
+            return candidates[0] if candidates else default
+
+        self.stats['langdetect'] += 1
+        return code
+
+    def warm_up(self) -> None:
+        """Load the langdetect profiles ahead of the first ambiguous message"""
+        self._get_factory()
+
+    def _get_factory(self) -> DetectorFactory:
+        if self._factory is None:
+            with self._factory_lock:
+                if self._factory is None:
+                    factory = DetectorFactory()
+                    factory.load_profile(PROFILES_DIRECTORY)
+                    factory.seed = self.seed
+                    self._factory = factory
+        return self._factory
+
+    def _langdetect(self, text: str, candidates: Optional[List[str]]) -> Optional[str]:
+        try:
+            detector = self._get_factory().create()
+            detector.append(text)
+            probabilities = detector.get_probabilities()
+        except Exception as e:
+            logger.error("Language detection error: %s", e)
+            return None
+
+        if not candidates:
+            return probabilities[0].lang if probabilities else None
+
+        for probability in probabilities:
+            if probability.lang in candidates:
+                return probability.lang
+        return None
@@ -0,0 +1,167 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from textblob._text import EMOTICONS, PUNCTUATION
+from textblob.en import sentiment as pattern_sentiment
+
+
+class LexiconSentimentScorer:
+    """
+    Drop-in replacement for TextBlob's pattern analyzer.
+    The sentiment lexicon is compiled once into a flat word table holding
+    (polarity, subjectivity, intensity, is_modifier). Each text is reduced
+    to its scored assessments with the same intensifier and negation rules
+    pattern uses, and a whole batch is averaged in one NumPy pass. Repeated
+    texts are served from a bounded memo.
+    """
+
+    def __init__(self, memo_size: int = 10000):
+        self.memo_size = memo_size
+        self._memo: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'memo_hits': 0, 'memo_misses': 0}
+
+        if dict.__len__(pattern_sentiment) == 0:
+            pattern_sentiment.load()
+
+        self.tokenizer = pattern_sentiment.tokenizer
+        self.negations = frozenset(pattern_sentiment.negations)
+        self.modifier_tags = tuple(pattern_sentiment.modifiers)
+        self.is_modifier_word = pattern_sentiment.modifier
+
+        self.table: Dict[str, Tuple[float, float, float, bool]] = {}
+        for word, senses in dict.items(pattern_sentiment):
+            if None not in senses:
+                continue
+            polarity, subjectivity, intensity = senses[None]
+            self.table[word] = (
+                polarity,
+                subjectivity,
+                intensity,
+                any(tag in senses for tag in self.modifier_tags)
+            )
+
+        # First matching emoticon wins, as in pattern
+        self.emoticons: Dict[str, float] = {}
+        for (_, polarity), faces in EMOTICONS.items():
+            for face in faces:
+                self.emoticons.setdefault(face.lower(), polarity)
+
+    def score(self, text: str) -> Tuple[float, float]:
+        """(polarity, subjectivity) for one text"""
+        return self.score_batch([text])[0]
+
+    def score_batch(self, texts: List[str]) -> List[Tuple[float, float]]:
+        """(polarity, subjectivity) for each text, averaged in one vectorized pass"""
+        results: List[Optional[Tuple[float, float]]] = [None] * len(texts)
+        missing = []
+
+        with self._lock:
+            for index, text in enumerate(texts):
+                cached = self._memo.get(text)
+                if cached is not None:
+                    self._memo.move_to_end(text)
+                    self.stats['memo_hits'] += 1
+                    results[index] = cached
+                else:
+                    self.stats['memo_misses'] += 1
+                    missing.append(index)
+
+        if not missing:
+            return results
+
+        polarities, subjectivities, negated, owners = [], [], [], []
+        for position, index in enumerate(missing):
+            for polarity, subjectivity, negation in self._assess(self._tokens(texts[index])):
+                polarities.append(polarity)
+                subjectivities.append(subjectivity)
+                negated.append(negation)
+                owners.append(position)
+
+        count = len(missing)
+        owners = np.asarray(owners, dtype=np.int64)
+        polarity = np.asarray(polarities, dtype=np.float64)
+        # "not good" = slightly bad, "not bad" = slightly good
+        polarity = np.where(np.asarray(negated, dtype=bool), polarity * -0.5, polarity)
+
+        sizes = np.maximum(np.bincount(owners, minlength=count), 1)
+        polarity_avg = np.bincount(owners, weights=polarity, minlength=count) / sizes
+        subjectivity_avg = np.bincount(
+            owners, weights=np.asarray(subjectivities, dtype=np.float64), minlength=count
+        ) / sizes
+
+        with self._lock:
+            for position, index in enumerate(missing):
+                score = (float(polarity_avg[position]), float(subjectivity_avg[position]))
+                results[index] = score
+                self._memo[texts[index]] = score
+                while len(self._memo) > self.memo_size:
+                    self._memo.popitem(last=False)
+
+        return results
+
+    def info(self) -> Dict:
+        with self._lock:
+            return {
+                **self.stats,
+                'memo_entries': len(self._memo),
+                'memo_size': self.memo_size,
+                'lexicon_words': len(self.table)
+            }
+
+    def _tokens(self, text: str) -> List[str]:
+        return [word.lower() for word in " ".join(self.tokenizer(text)).split()]
+
+    def _assess(self, words: List[str]) -> List[Tuple[float, float, bool]]:
+        """Pattern's assessment rules over the compiled table, without POS tags"""
+        assessments = []  # [polarity, subjectivity, intensity, negated]
+        modifier = None
+        negation = None
+
+        for word in words:
+            entry = self.table.get(word)
+            if entry is not None:
+                polarity, subjectivity, intensity, is_modifier = entry
+                if modifier is None:
+                    # Known word on its own ("good")
+                    assessments.append([polarity, subjectivity, intensity, False])
+                else:
+                    # Known word after a modifier ("really good")
+                    last = assessments[-1]
+                    last[0] = max(-1.0, min(polarity * last[2], 1.0))
+                    last[1] = max(-1.0, min(subjectivity * last[2], 1.0))
+                    last[2] = intensity
+                if negation is not None:
+                    # Known word after a negation ("not really good")
+                    assessments[-1][2] = 1.0 / assessments[-1][2]
+                    assessments[-1][3] = True
+                modifier = word if is_modifier else None
+                negation = word if word in self.negations else None
+                continue
+
+            if word in self.negations:
+                negation = word
+            elif negation and len(word.strip("'")) > 1:
+                # Negation survives small words only ("not a good")
+                negation = None
+
+            if negation is not None and modifier is not None and self.is_modifier_word(modifier):
+                # Negation after a modifier ("really not good")
+                assessments[-1][3] = True
+                negation = None
+            elif modifier and len(word) > 2:
+                # Modifier survives small words only ("really is a good")
+                modifier = None
+
+            if word == "!" and assessments:
+                assessments[-1][0] = max(-1.0, min(assessments[-1][0] * 1.25, 1.0))
+            if word == "(!)":
+                assessments.append([0.0, 1.0, 1.0, False])
+            if word.isalpha() is False and len(word) <= 5 and word not in PUNCTUATION:
+                polarity = self.emoticons.get(word)
+                if polarity is not None:
+                    assessments.append([polarity, 1.0, 1.0, False])
+
+        return [(polarity, subjectivity, negated) for polarity, subjectivity, _, negated in assessments]
@@ -0,0 +1,137 @@
+from typing import Optional, Dict, Any, Callable, List, Tuple
+from bisect import bisect_left, bisect_right, insort
+import functools
+import threading
+import uuid
+from .write_buffer import WriteOp
+from .storage_base import (
+    StorageBackend, EMAIL_INDEX, apply_write, email_key, inbox_collection, inbox_entry,
+    encode_inbox_cursor, decode_inbox_cursor
+)
+
+def _sort_key(value) -> Tuple:
+    """Order datetimes with None first, as Firestore orders null before timestamps"""
+    return (value is not None, value.replace(tzinfo=None) if value is not None else None)
+
+class MemoryStorage(StorageBackend):
+    """
+    Process-local storage for tests, benchmarks and offline load tests.
+    Documents live in dicts, with per-conversation message lists kept in
+    (timestamp, id) order. Nothing survives a restart.
+    """
+
+    name = 'memory'
+
+    def __init__(self):
+        self._collections: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._timelines: Dict[str, List[Tuple]] = {}
+        self._lock = threading.RLock()
+        super().__init__()
+
+    async def _run(self, func: Callable, *args, **kwargs):
+        """Calls only touch dicts, so run them inline rather than on the I/O pool"""
+        self.stats['calls'] += 1
+        return functools.partial(func, *args, **kwargs)()
+
+    def _new_id(self) -> str:
+        return uuid.uuid4().hex[:20]
+
+    def _commit_batch(self, ops: List[WriteOp]) -> None:
+        with self._lock:
+            # Resolve every write before applying any, so a failed batch changes nothing
+            resolved = []
+            for kind, collection, doc_id, data in ops:
+                existing = self._collections.get(collection, {}).get(doc_id)
+                resolved.append((collection, doc_id, existing, apply_write(existing, kind, data)))
+            for collection, doc_id, existing, document in resolved:
+                self._put(collection, doc_id, existing, document)
+
+    def _put(self, collection: str, doc_id: str, existing: Optional[Dict[str, Any]],
+             document: Dict[str, Any]) -> None:
+        self._collections.setdefault(collection, {})[doc_id] = document
+
+        if collection == 'messages':
+            if existing is not None:
+                timeline = self._timelines.get(existing['conversation_id'], [])
+                old_key = (_sort_key(existing.get('timestamp')), doc_id)
+                if old_key in timeline:
+                    timeline.remove(old_key)
+            timeline = self._timelines.setdefault(document['conversation_id'], [])
+            insort(timeline, (_sort_key(document.get('timestamp')), doc_id))
+
+    def _get_document(self, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            document = self._collections.get(collection, {}).get(doc_id)
+            return dict(document) if document is not None else None
+
+    def _update_inbox_preview(self, user_id: str, conversation_id: str, message_id: str, preview: str) -> bool:
+        with self._lock:
+            entry = self._collections.get(inbox_collection(user_id), {}).get(conversation_id)
+            if entry is None or entry.get('last_message_id') != message_id:
+                return False
+            self._collections[inbox_collection(user_id)][conversation_id] = {**entry, 'last_message_preview': preview}
+            return True
+
+    def _create_user(self, user_data: Dict[str, Any], index_entry: Dict[str, Any]) -> bool:
+        key = email_key(user_data['email'])
+        with self._lock:
+            if key in self._collections.get(EMAIL_INDEX, {}):
+                return False
+            self._commit_batch([
+                ('set', 'users', user_data['id'], user_data),
+                ('set', EMAIL_INDEX, key, index_entry)
+            ])
+            return True
+
+    def _create_conversation(self, conversation_data: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            existing = self._get_document('conversations', conversation_data['id'])
+            if existing is not None:
+                return existing
+            ops = [('set', 'conversations', conversation_data['id'], conversation_data)]
+            for user_id in (conversation_data['participant1_id'], conversation_data['participant2_id']):
+                ops.append(('merge', inbox_collection(user_id), conversation_data['id'],
+                            inbox_entry(conversation_data, user_id)))
+            self._commit_batch(ops)
+            return dict(conversation_data)
+
+    def _get_user_inbox(self, user_id: str, limit: int,
+                        cursor: Optional[str]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        with self._lock:
+            entries = [dict(entry) for entry in self._collections.get(inbox_collection(user_id), {}).values()
+                       if entry.get('updated_at') is not None]
+
+        entries.sort(key=lambda entry: (_sort_key(entry['updated_at']), entry['id']), reverse=True)
+        if cursor:
+            updated_at, conversation_id = decode_inbox_cursor(cursor)
+            position = (_sort_key(updated_at), conversation_id)
+            entries = [entry for entry in entries if (_sort_key(entry['updated_at']), entry['id']) < position]
+
+        if len(entries) > limit:
+            entries = entries[:limit]
+            return entries, encode_inbox_cursor(entries[-1])
+        return entries, None
+
+    def _get_messages(self, conversation_id: str, limit: int, before: Optional[str],
+                      after: Optional[str], latest: bool) -> List[Dict[str, Any]]:
+        with self._lock:
+            timeline = self._timelines.get(conversation_id, [])
+            messages = self._collections.get('messages', {})
+
+            if before or after:
+                cursor = messages.get(before or after)
+                if cursor is None:
+                    raise ValueError(f"Unknown message cursor {before or after}")
+                position = (_sort_key(cursor.get('timestamp')), before or after)
+                if before:
+                    end = bisect_left(timeline, position)
+                    keys = timeline[max(end - limit, 0):end]
+                else:
+                    start = bisect_right(timeline, position)
+                    keys = timeline[start:start + limit]
+            elif latest:
+                keys = timeline[-limit:]
+            else:
+                keys = timeline[:limit]
+
+            return [dict(messages[doc_id]) for _, doc_id in keys]
@@ -0,0 +1,219 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+from ..core.config import settings
+from ..core.metrics import metrics
+from .realtime import broadcast_localized
+from .sentiment_service import sentiment_service
+from .storage import storage
+from .translation_service import translation_service
+
+logger = logging.getLogger(__name__)
+
+
+class MessageEnricher:
+    """
+    Second phase of message delivery. Messages are stored and broadcast
+    with their original text first; workers here detect the language,
+    translate for the recipient and score sentiment, then patch the stored
+    document and push message_enriched to the room. A failed attempt is
+    retried with exponential backoff; after the last one the message is
+    marked failed and keeps its original text with a neutral sentiment.
+    The recipient's inbox preview follows the stored translation. Messages
+    still pending when read back, after a restart for instance, are queued
+    again.
+    """
+
+    def __init__(self, workers: int, max_queue: int, max_attempts: int,
+                 retry_seconds: float, resume_after_seconds: float):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_attempts = max_attempts
+        self.retry_seconds = retry_seconds
+        self.resume_after_seconds = resume_after_seconds
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        # message ID -> timer that queues its next attempt
+        self._retries: Dict[str, asyncio.TimerHandle] = {}
+        # Message IDs queued, running or waiting for a retry
+        self._tracked: Set[str] = set()
+
+        self.stats = {
+            'submitted': 0,
+            'enriched': 0,
+            'retries': 0,
+            'failed': 0,
+            'dropped': 0,
+            'resumed': 0,
+            'enrich_ms_total': 0.0
+        }
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._tasks = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Stop the workers; unfinished messages stay pending in storage and resume when read"""
+        for handle in self._retries.values():
+            handle.cancel()
+        self._retries.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._tracked.clear()
+
+    def submit(self, message: Dict[str, Any]) -> bool:
+        """Queue a stored message for enrichment; False if the queue is full"""
+        if message['id'] in self._tracked:
+            return True
+        self.stats['submitted'] += 1
+        return self._enqueue(message, 0)
+
+    def resume(self, messages: List[Dict[str, Any]]) -> int:
+        """
+        Queue messages read back from storage whose enrichment never
+        finished. Recent ones are skipped, since another server process
+        may still be working on them.
+        """
+        resumed = 0
+        now = datetime.utcnow()
+        for message in messages:
+            if message.get('enrichment') != 'pending' or message['id'] in self._tracked:
+                continue
+            sent_at = message.get('timestamp')
+            if isinstance(sent_at, datetime):
+                age = (now - sent_at.replace(tzinfo=None)).total_seconds()
+                if age < self.resume_after_seconds:
+                    continue
+            if self._enqueue(message, 0):
+                resumed += 1
+        self.stats['resumed'] += resumed
+        return resumed
+
+    def info(self) -> Dict:
+        enriched = self.stats['enriched']
+        return {
+            **self.stats,
+            'enrich_ms_total': round(self.stats['enrich_ms_total'], 3),
+            'avg_enrich_ms': round(self.stats['enrich_ms_total'] / enriched, 3) if enriched else 0.0,
+            'queue_depth': self._queue.qsize() if self._queue else 0,
+            'tracked': len(self._tracked),
+            'waiting_retry': len(self._retries),
+            'workers': self.workers
+        }
+
+    def _enqueue(self, message: Dict[str, Any], attempt: int) -> bool:
+        self.start()
+        try:
+            self._queue.put_nowait((message, attempt))
+        except asyncio.QueueFull:
+            # Left pending in storage; picked up again the next time it is read
+            self.stats['dropped'] += 1
+            self._tracked.discard(message['id'])
+            return False
+        self._tracked.add(message['id'])
+        return True
+
+    def _retry(self, message: Dict[str, Any], attempt: int) -> None:
+        del self._retries[message['id']]
+        self._enqueue(message, attempt)
+
+    async def _work(self) -> None:
+        while True:
+            message, attempt = await self._queue.get()
+            started = time.perf_counter()
+            try:
+                await self.enrich(message)
+                self.stats['enriched'] += 1
+                self._tracked.discard(message['id'])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if attempt + 1 < self.max_attempts:
+                    self.stats['retries'] += 1
+                    self._retries[message['id']] = asyncio.get_event_loop().call_later(
+                        self.retry_seconds * 2 ** attempt, self._retry, message, attempt + 1
+                    )
+                else:
+                    logger.error("Message enrichment failed: %s", e, extra={'message_id': message['id']})
+                    self.stats['failed'] += 1
+                    self._tracked.discard(message['id'])
+                    await self._give_up(message)
+            finally:
+                self.stats['enrich_ms_total'] += (time.perf_counter() - started) * 1000
+
+    @metrics.instrument('enrichment', 'enrich_message')
+    async def enrich(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Translate and score one stored message, patch it and notify the room"""
+        text = message['text']
+        target_language = message.get('translated_language') or 'english'
+        source_language = translation_service.detect_language(text)
+
+        translated_text, sentiment = await asyncio.gather(
+            translation_service.translate_text(text, source_language, target_language, raise_errors=True),
+            sentiment_service.analyze_sentiment_async(text)
+        )
+
+        fields = {
+            'language': source_language,
+            'translated_text': translated_text,
+            'translated_language': target_language,
+            'sentiment': sentiment['sentiment'],
+            'sentiment_emoji': sentiment['emoji'],
+            'sentiment_score': sentiment['polarity'],
+            'enrichment': 'done'
+        }
+        await self._publish(message, fields)
+        return fields
+
+    async def _give_up(self, message: Dict[str, Any]) -> None:
+        """Settle a message whose translation kept failing on its original text"""
+        fields = {
+            'translated_text': message['text'],
+            'translated_language': message.get('translated_language'),
+            'sentiment': 'neutral',
+            'sentiment_emoji': '😐',
+            'sentiment_score': 0.0,
+            'enrichment': 'failed'
+        }
+        try:
+            await self._publish(message, fields)
+        except Exception as e:
+            logger.error("Error settling failed enrichment: %s", e, extra={'message_id': message['id']})
+
+    async def _publish(self, message: Dict[str, Any], fields: Dict[str, Any]) -> None:
+        if not await storage.update_message(message['id'], fields):
+            raise RuntimeError("Failed to store message enrichment")
+        await self._update_preview(message, fields['translated_text'])
+        await broadcast_localized('message_enriched', message['conversation_id'], {
+            'id': message['id'],
+            'conversation_id': message['conversation_id'],
+            'sender_id': message['sender_id'],
+            'text': message['text'],
+            'client_message_id': message.get('client_message_id'),
+            **fields
+        })
+
+    async def _update_preview(self, message: Dict[str, Any], translated_text: str) -> None:
+        """Show the recipient the stored translation in their inbox, as inline delivery does"""
+        conversation = await storage.get_conversation(message['conversation_id'])
+        if not conversation:
+            return
+        sender_id = message['sender_id']
+        recipient_id = conversation['participant2_id'] if conversation['participant1_id'] == sender_id else conversation['participant1_id']
+        await storage.update_inbox_preview(recipient_id, message['conversation_id'], message['id'], translated_text)
+
+
+# Create singleton instance
+message_enricher = MessageEnricher(
+    workers=settings.ENRICHMENT_WORKERS,
+    max_queue=settings.ENRICHMENT_MAX_QUEUE,
+    max_attempts=settings.ENRICHMENT_MAX_ATTEMPTS,
+    retry_seconds=settings.ENRICHMENT_RETRY_SECONDS,
+    resume_after_seconds=settings.ENRICHMENT_RESUME_AFTER_SECONDS
+)
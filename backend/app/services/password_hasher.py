@@ -0,0 +1,151 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional, Tuple
+from ..core import security
+from ..core.config import settings
+from ..core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasherBusy(Exception):
+    """Raised at once when too many hash or verify calls are already queued"""
+
+
+class PasswordHasherUnavailable(Exception):
+    """Raised when a call waited past its deadline or the worker pool broke"""
+
+
+def _init_worker(rounds: int) -> None:
+    """Build the bcrypt context once per worker process"""
+    security.pwd_context = security.build_password_context(rounds)
+
+
+def _warm() -> None:
+    pass
+
+
+def _hash(password: str) -> str:
+    return security.get_password_hash(password)
+
+
+def _verify(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return security.verify_and_update_password(password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a process pool so a burst of logins cannot stall the
+    event loop. At most max_pending calls are queued or running; callers
+    beyond that are refused straight away instead of waiting, and a call
+    that has not finished within timeout seconds gives up. The pool uses the
+    spawn start method: a forked worker could inherit a lock held by one
+    of the server's threads.
+    """
+
+    def __init__(self, workers: int, max_pending: int, timeout: float, rounds: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.rounds = rounds
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+
+        self.stats = {
+            'calls': 0,
+            'rejected': 0,
+            'timeouts': 0,
+            'worker_errors': 0,
+            'worker_ms_total': 0.0
+        }
+
+    def start(self) -> None:
+        """Spawn the workers and load bcrypt in each of them"""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.rounds,)
+            )
+            for _ in range(self.workers):
+                self._pool.submit(_warm)
+
+    async def stop(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    @metrics.instrument('auth', 'get_password_hash')
+    async def hash(self, password: str) -> str:
+        """bcrypt hash of password at the configured cost"""
+        return await self._submit(_hash, password)
+
+    @metrics.instrument('auth', 'verify_password')
+    async def verify(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """(matches, replacement hash when the stored one used another cost factor)"""
+        return await self._submit(_verify, password, hashed_password)
+
+    def info(self) -> Dict:
+        calls = self.stats['calls']
+        return {
+            **self.stats,
+            'worker_ms_total': round(self.stats['worker_ms_total'], 3),
+            'avg_worker_ms': round(self.stats['worker_ms_total'] / calls, 3) if calls else 0.0,
+            'pending': self._pending,
+            'max_pending': self.max_pending,
+            'workers': self.workers,
+            'rounds': self.rounds
+        }
+
+    async def _submit(self, func: Callable, *args):
+        if self._pending >= self.max_pending:
+            self.stats['rejected'] += 1
+            raise PasswordHasherBusy(f"{self._pending} password checks already pending")
+
+        self.start()
+        self.stats['calls'] += 1
+        started = time.perf_counter()
+        try:
+            future = self._pool.submit(func, *args)
+            # The slot is held until the worker finishes, even if the caller gave up waiting
+            self._pending += 1
+            future.add_done_callback(functools.partial(self._release, asyncio.get_event_loop()))
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.stats['timeouts'] += 1
+            raise PasswordHasherUnavailable(f"Password check did not finish within {self.timeout}s")
+        except BrokenProcessPool as e:
+            logger.error("Password hasher worker error: %s", e)
+            self.stats['worker_errors'] += 1
+            # A worker died; the next call spawns a fresh pool
+            self._pool = None
+            raise PasswordHasherUnavailable("Password hashing workers restarted")
+        finally:
+            self.stats['worker_ms_total'] += (time.perf_counter() - started) * 1000
+
+    def _release(self, loop: asyncio.AbstractEventLoop, future) -> None:
+        """Done-callback of a worker call; runs on the pool's management thread"""
+        try:
+            loop.call_soon_threadsafe(self._release_slot)
+        except RuntimeError:
+            # The loop already closed at shutdown
+            pass
+
+    def _release_slot(self) -> None:
+        self._pending -= 1
+
+
+# Create singleton instance
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    timeout=settings.PASSWORD_HASH_TIMEOUT_SECONDS,
+    rounds=settings.BCRYPT_ROUNDS
+)
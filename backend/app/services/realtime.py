@@ -0,0 +1,60 @@
+from typing import Any, Dict
+import asyncio
+import socketio
+from fastapi.encoders import jsonable_encoder
+from .room_languages import room_languages
+from .translation_service import translation_service
+
+# Socket.IO server shared by the event handlers in main.py, the REST
+# routes and background jobs that push updates to conversation rooms
+sio = socketio.AsyncServer(
+    async_mode='asgi',
+    cors_allowed_origins='*',
+    logger=False,
+    engineio_logger=False
+)
+
+async def broadcast(event: str, conversation_id: str, data: Dict[str, Any]) -> None:
+    """Emit the same payload to every connection in the conversation's room"""
+    await sio.emit(event, jsonable_encoder(data), room=conversation_id)
+
+async def broadcast_localized(event: str, conversation_id: str, data: Dict[str, Any]) -> None:
+    """
+    Emit to the room with translated_text in each member's language: one
+    translation per distinct language, shared by every member who reads
+    it, and one encoded packet per language. A translated_text already in
+    data is reused for its language, so data must be built by the server,
+    never relayed from a client.
+    """
+    groups = room_languages.languages(conversation_id)
+    text = data.get('text')
+    if not groups or not text:
+        await broadcast(event, conversation_id, data)
+        return
+
+    data = jsonable_encoder(data)
+    source = {}
+    translations = 0
+    # Messages carry their language; detect only when it is missing or unknown
+    language = data.get('language')
+    if isinstance(language, str) and translation_service.get_language_code(language) in translation_service.code_to_language:
+        source['language'] = language
+
+    async def deliver(language, sids):
+        nonlocal translations
+        if data.get('translated_language') == language and data.get('translated_text'):
+            # Already translated for this language, e.g. the stored one for the recipient
+            translated_text = data['translated_text']
+        else:
+            if 'language' not in source:
+                source['language'] = translation_service.detect_language(text)
+            translations += 1
+            translated_text = await translation_service.translate_text(text, source['language'], language)
+        await sio.emit(event, {
+            **data,
+            'translated_text': translated_text,
+            'translated_language': language
+        }, to=list(sids))
+
+    await asyncio.gather(*(deliver(language, sids) for language, sids in groups.items()))
+    room_languages.record_broadcast(sum(len(sids) for sids in groups.values()), translations)
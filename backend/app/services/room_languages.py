@@ -0,0 +1,105 @@
+from typing import Dict, Optional, Set, Tuple
+
+
+class RoomLanguageIndex:
+    """
+    Preferred language of every connection in each conversation room,
+    grouped by language, so a broadcast is translated once per language
+    the room reads rather than once per member. Kept in step with
+    join_conversation, leave_conversation and disconnect, and with
+    language changes through set_user_language.
+    """
+
+    def __init__(self):
+        # room -> language -> sids
+        self._rooms: Dict[str, Dict[str, Set[str]]] = {}
+        # sid -> room -> language, to undo a sid's joins on disconnect
+        self._members: Dict[str, Dict[str, str]] = {}
+        # user ID -> sids in at least one room, and back
+        self._user_sids: Dict[str, Set[str]] = {}
+        self._sid_user: Dict[str, str] = {}
+
+        self.stats = {
+            'joins': 0,
+            'leaves': 0,
+            'language_changes': 0,
+            'broadcasts': 0,
+            'recipients': 0,
+            'translations': 0
+        }
+
+    def join(self, room: str, sid: str, user_id: str, language: str) -> None:
+        self.leave(room, sid)
+        self._add(room, sid, language)
+        self._sid_user[sid] = user_id
+        self._user_sids.setdefault(user_id, set()).add(sid)
+        self.stats['joins'] += 1
+
+    def leave(self, room: str, sid: str) -> None:
+        if self._remove(room, sid) is None:
+            return
+        if sid not in self._members:
+            user_id = self._sid_user.pop(sid)
+            self._user_sids[user_id].discard(sid)
+            if not self._user_sids[user_id]:
+                del self._user_sids[user_id]
+        self.stats['leaves'] += 1
+
+    def drop(self, sid: str) -> None:
+        """Remove a disconnected sid from every room it joined"""
+        for room in list(self._members.get(sid, {})):
+            self.leave(room, sid)
+
+    def set_user_language(self, user_id: str, language: str) -> int:
+        """Move every connection of the user to language in the rooms it joined; returns how many moved"""
+        moved = 0
+        for sid in self._user_sids.get(user_id, ()):
+            for room, current in list(self._members[sid].items()):
+                if current != language:
+                    self._remove(room, sid)
+                    self._add(room, sid, language)
+                    moved += 1
+        self.stats['language_changes'] += 1
+        return moved
+
+    def languages(self, room: str) -> Dict[str, Tuple[str, ...]]:
+        """Snapshot of language -> member sids, safe to use across awaits"""
+        return {language: tuple(sids) for language, sids in self._rooms.get(room, {}).items()}
+
+    def record_broadcast(self, recipients: int, translations: int) -> None:
+        self.stats['broadcasts'] += 1
+        self.stats['recipients'] += recipients
+        self.stats['translations'] += translations
+
+    def _add(self, room: str, sid: str, language: str) -> None:
+        self._rooms.setdefault(room, {}).setdefault(language, set()).add(sid)
+        self._members.setdefault(sid, {})[room] = language
+
+    def _remove(self, room: str, sid: str) -> Optional[str]:
+        """Take sid out of the room's language group; the language it had, or None"""
+        language = self._members.get(sid, {}).pop(room, None)
+        if language is None:
+            return None
+        languages = self._rooms[room]
+        languages[language].discard(sid)
+        if not languages[language]:
+            del languages[language]
+        if not languages:
+            del self._rooms[room]
+        if not self._members[sid]:
+            del self._members[sid]
+        return language
+
+    def info(self) -> Dict:
+        broadcasts = self.stats['broadcasts']
+        return {
+            **self.stats,
+            'rooms': len(self._rooms),
+            'connections': len(self._members),
+            'avg_recipients': round(self.stats['recipients'] / broadcasts, 2) if broadcasts else 0.0,
+            'avg_translations': round(self.stats['translations'] / broadcasts, 2) if broadcasts else 0.0
+        }
+
+
+# Create singleton instance
+room_languages = RoomLanguageIndex()
@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# Lexicon scorer of the current worker process, when that backend is selected
+_worker_scorer = None
+
+
+def _init_worker(scorer: str = 'textblob', memo_size: int = 10000) -> None:
+    """Import TextBlob and load its lexicon once per worker process"""
+    global _worker_scorer
+    from textblob import TextBlob
+    TextBlob("warm up").sentiment
+    if scorer == 'lexicon':
+        from .lexicon_sentiment import LexiconSentimentScorer
+        _worker_scorer = LexiconSentimentScorer(memo_size=memo_size)
+
+
+def _score_batch(texts: List[str]) -> List[Tuple[float, float]]:
+    """Score a batch of texts in a worker, returning (polarity, subjectivity) pairs"""
+    if _worker_scorer is not None:
+        return _worker_scorer.score_batch(texts)
+
+    from textblob import TextBlob
+
+    scores = []
+    for text in texts:
+        try:
+            sentiment = TextBlob(text).sentiment
+            scores.append((sentiment.polarity, sentiment.subjectivity))
+        except Exception:
+            scores.append((0.0, 0.0))
+    return scores
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up from a short sleep"""
+
+    def __init__(self, interval: float = 0.1, on_sample: Optional[Callable[[float], None]] = None):
+        self.interval = interval
+        self.on_sample = on_sample
+        self.samples = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def info(self) -> Dict:
+        return {
+            'samples': self.samples,
+            'avg_ms': round(self.total_ms / self.samples, 3) if self.samples else 0.0,
+            'max_ms': round(self.max_ms, 3),
+            'last_ms': round(self.last_ms, 3)
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_event_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max((loop.time() - started - self.interval) * 1000, 0.0)
+            self.samples += 1
+            self.total_ms += lag
+            self.max_ms = max(self.max_ms, lag)
+            self.last_ms = lag
+            if self.on_sample is not None:
+                self.on_sample(lag)
+
+
+class SentimentEngine:
+    """
+    Scores sentiment in a warm process pool so TextBlob never runs on the
+    event loop. Requests wait in a bounded queue and are sent to the
+    workers in micro-batches: whatever is queued within batch_window
+    seconds, up to batch_size texts, goes to one worker call. Workers are
+    spawned rather than forked, since the parent already runs threads
+    (the log writer) whose locks a fork would copy.
+    """
+
+    def __init__(self, workers: int, max_queue: int, batch_size: int, batch_window: float,
+                 scorer: str = 'textblob', memo_size: int = 10000):
+        self.workers = workers
+        self.scorer = scorer
+        self.memo_size = memo_size
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        # Futures of score() calls not answered yet, failed by stop()
+        self._pending: Set[asyncio.Future] = set()
+
+        self.stats = {
+            'requests': 0,
+            'batches': 0,
+            'worker_errors': 0,
+            'cancelled': 0,
+            'queue_wait_ms_total': 0.0,
+            'worker_ms_total': 0.0
+        }
+
+    def start(self) -> None:
+        """Spawn and warm the workers and start the batcher"""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.scorer, self.memo_size)
+            )
+            # Run the initializer in every worker now rather than on the first message
+            for _ in range(self.workers):
+                self._pool.submit(_score_batch, [])
+        if self._batcher is None or self._batcher.done():
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._slots = asyncio.Semaphore(self.workers)
+            self._batcher = asyncio.ensure_future(self._run_batcher())
+
+    async def stop(self) -> None:
+        """Stop the batcher and workers; callers still waiting get CancelledError"""
+        if self._batcher is not None:
+            self._batcher.cancel()
+            self._batcher = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        for future in list(self._pending):
+            if future.cancel():
+                self.stats['cancelled'] += 1
+        self._pending.clear()
+
+    async def score(self, text: str) -> Tuple[float, float]:
+        """Queue one text and wait for its (polarity, subjectivity)"""
+        self.start()
+        future = asyncio.get_event_loop().create_future()
+        self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+        self.stats['requests'] += 1
+        # Waits here when the queue is full, which pushes back on callers
+        await self._queue.put((text, future, time.perf_counter()))
+        return await future
+
+    def info(self) -> Dict:
+        batches = self.stats['batches']
+        requests = self.stats['requests']
+        return {
+            **self.stats,
+            'queue_wait_ms_total': round(self.stats['queue_wait_ms_total'], 3),
+            'worker_ms_total': round(self.stats['worker_ms_total'], 3),
+            'avg_batch_size': round(requests / batches, 2) if batches else 0.0,
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'max_queue': self.max_queue,
+            'workers': self.workers
+        }
+
+    async def _run_batcher(self) -> None:
+        loop = asyncio.get_event_loop()
+        while True:
+            batch = [await self._queue.get()]
+            window_ends = loop.time() + self.batch_window
+            while len(batch) < self.batch_size:
+                remaining = window_ends - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._slots.acquire()
+            asyncio.ensure_future(self._run_batch(batch))
+
+    async def _run_batch(self, batch: List) -> None:
+        loop = asyncio.get_event_loop()
+        if self._pool is None:
+            self.start()
+        submitted = time.perf_counter()
+        for _, _, queued_at in batch:
+            self.stats['queue_wait_ms_total'] += (submitted - queued_at) * 1000
+
+        try:
+            scores = await loop.run_in_executor(self._pool, _score_batch, [text for text, _, _ in batch])
+        except Exception as e:
+            logger.error("Sentiment worker error: %s", e)
+            self.stats['worker_errors'] += 1
+            if isinstance(e, BrokenProcessPool):
+                # A worker died; the next request spawns a fresh pool
+                self._pool = None
+            scores = [(0.0, 0.0)] * len(batch)
+        finally:
+            self._slots.release()
+
+        self.stats['batches'] += 1
+        self.stats['worker_ms_total'] += (time.perf_counter() - submitted) * 1000
+
+        for (_, future, _), score in zip(batch, scores):
+            if not future.done():
+                future.set_result(score)
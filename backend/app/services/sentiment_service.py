@@ -1,47 +1,133 @@
 from textblob import TextBlob
-from typing import Dict
+from typing import Dict, List
+import time
+import logging
+from ..core.config import settings
+from ..core.metrics import metrics
+from .sentiment_engine import SentimentEngine, LoopLagMonitor
+from .lexicon_sentiment import LexiconSentimentScorer
+
+logger = logging.getLogger(__name__)
 
 class SentimentService:
     def __init__(self):
-        pass
+        # Compiled lexicon scorer with memoization, or None for TextBlob
+        self.scorer = None
+        if settings.SENTIMENT_SCORER == 'lexicon':
+            self.scorer = LexiconSentimentScorer(memo_size=settings.SENTIMENT_MEMO_SIZE)
+        
+        # Process pool engine used by the async API
+        self.engine = None
+        if settings.SENTIMENT_ENGINE == 'process':
+            self.engine = SentimentEngine(
+                workers=settings.SENTIMENT_WORKERS,
+                max_queue=settings.SENTIMENT_MAX_QUEUE,
+                batch_size=settings.SENTIMENT_BATCH_SIZE,
+                batch_window=settings.SENTIMENT_BATCH_WINDOW_MS / 1000,
+                scorer=settings.SENTIMENT_SCORER,
+                memo_size=settings.SENTIMENT_MEMO_SIZE
+            )
+        
+        self.loop_lag = LoopLagMonitor(on_sample=lambda lag_ms: metrics.loop_lag.observe(lag_ms / 1000))
+        self.stats = {
+            'sync_calls': 0,
+            'sync_blocking_ms_total': 0.0
+        }
+    
+    def start(self):
+        """Start the worker pool and the event-loop lag probe"""
+        if self.engine:
+            self.engine.start()
+        self.loop_lag.start()
+    
+    async def stop(self):
+        self.loop_lag.stop()
+        if self.engine:
+            await self.engine.stop()
     
+    @metrics.instrument('sentiment')
     def analyze_sentiment(self, text: str) -> Dict:
         """
         Analyze sentiment of text
         Returns polarity (-1 to 1) and subjectivity (0 to 1)
         """
+        started = time.perf_counter()
         try:
+            if self.scorer:
+                return self._classify(*self.scorer.score(text))
             blob = TextBlob(text)
-            polarity = blob.sentiment.polarity
-            subjectivity = blob.sentiment.subjectivity
-            
-            # Classify sentiment
-            if polarity > 0.1:
-                sentiment = 'positive'
-                emoji = '😊'
-            elif polarity < -0.1:
-                sentiment = 'negative'
-                emoji = '😔'
-            else:
-                sentiment = 'neutral'
-                emoji = '😐'
-            
-            return {
-                'sentiment': sentiment,
-                'emoji': emoji,
-                'polarity': round(polarity, 2),
-                'subjectivity': round(subjectivity, 2),
-                'confidence': abs(polarity)
-            }
+            return self._classify(blob.sentiment.polarity, blob.sentiment.subjectivity)
+        except Exception as e:
+            logger.error("Sentiment analysis error: %s", e)
+            return self._classify(0, 0)
+        finally:
+            self.stats['sync_calls'] += 1
+            self.stats['sync_blocking_ms_total'] += (time.perf_counter() - started) * 1000
+    
+    @metrics.instrument('sentiment')
+    def analyze_sentiment_batch(self, texts: List[str]) -> List[Dict]:
+        """Analyze many texts at once; vectorized when the lexicon scorer is selected"""
+        if not self.scorer:
+            return [self.analyze_sentiment(text) for text in texts]
+        
+        started = time.perf_counter()
+        try:
+            return [self._classify(*score) for score in self.scorer.score_batch(texts)]
+        except Exception as e:
+            logger.error("Sentiment analysis error: %s", e)
+            return [self._classify(0, 0) for _ in texts]
+        finally:
+            self.stats['sync_calls'] += 1
+            self.stats['sync_blocking_ms_total'] += (time.perf_counter() - started) * 1000
+    
+    @metrics.instrument('sentiment')
+    async def analyze_sentiment_async(self, text: str) -> Dict:
+        """
+        Analyze sentiment without blocking the event loop.
+        Falls back to the synchronous path when the process engine is disabled.
+        """
+        if not self.engine:
+            return self.analyze_sentiment(text)
+        
+        try:
+            polarity, subjectivity = await self.engine.score(text)
+            return self._classify(polarity, subjectivity)
         except Exception as e:
-            print(f"Sentiment analysis error: {e}")
-            return {
-                'sentiment': 'neutral',
-                'emoji': '😐',
-                'polarity': 0,
-                'subjectivity': 0,
-                'confidence': 0
-            }
+            logger.error("Sentiment analysis error: %s", e)
+            return self._classify(0, 0)
+    
+    def _classify(self, polarity: float, subjectivity: float) -> Dict:
+        """Turn raw scores into the sentiment/emoji response"""
+        # Classify sentiment
+        if polarity > 0.1:
+            sentiment = 'positive'
+            emoji = '😊'
+        elif polarity < -0.1:
+            sentiment = 'negative'
+            emoji = '😔'
+        else:
+            sentiment = 'neutral'
+            emoji = '😐'
+        
+        return {
+            'sentiment': sentiment,
+            'emoji': emoji,
+            'polarity': round(polarity, 2),
+            'subjectivity': round(subjectivity, 2),
+            'confidence': abs(polarity)
+        }
+    
+    def info(self) -> Dict:
+        """Engine, blocking time and event-loop lag metrics"""
+        return {
+            'engine': settings.SENTIMENT_ENGINE,
+            'scorer': settings.SENTIMENT_SCORER,
+            'lexicon_scorer': self.scorer.info() if self.scorer else None,
+            **self.stats,
+            'sync_blocking_ms_total': round(self.stats['sync_blocking_ms_total'], 3),
+            'process_engine': self.engine.info() if self.engine else None,
+            'event_loop_lag': self.loop_lag.info()
+        }
     
     def get_emotion_suggestions(self, sentiment: str) -> list:
         """Get suggested responses based on sentiment"""
@@ -65,4 +151,4 @@ class SentimentService:
         return suggestions.get(sentiment, [])
 
 # Create singleton instance
-sentiment_service = SentimentService()
\ No newline at end of file
+sentiment_service = SentimentService()
@@ -0,0 +1,60 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one shared task.
+    Callers that arrive while a call is in flight await its result instead
+    of starting their own. Once the call finishes the key is released, so
+    later callers start a fresh one.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self.stats = {
+            'calls': 0,
+            'coalesced': 0
+        }
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Run func() for key, or join the call already in flight for it"""
+        task = self._calls.get(key)
+
+        if task is None:
+            self.stats['calls'] += 1
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda done: self._release(key, done))
+        else:
+            self.stats['coalesced'] += 1
+
+        self._waiters[key] += 1
+        try:
+            # Shield so one caller's cancellation does not cancel the others
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._calls.get(key) is task:
+                self._waiters[key] -= 1
+                if self._waiters[key] <= 0 and not task.done():
+                    task.cancel()
+            raise
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    def info(self) -> Dict:
+        return {
+            **self.stats,
+            'in_flight': len(self._calls)
+        }
+
+    def _release(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+            del self._waiters[key]
+        # Mark the exception as retrieved when every waiter has gone away
+        if not task.cancelled():
+            task.exception()
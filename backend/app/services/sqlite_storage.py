@@ -0,0 +1,268 @@
+from typing import Optional, Dict, Any, List, Tuple
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import json
+import sqlite3
+import threading
+import uuid
+from .write_buffer import WriteOp
+from .storage_base import (
+    StorageBackend, EMAIL_INDEX, apply_write, email_key, inbox_collection, inbox_owner, inbox_entry,
+    encode_inbox_cursor, decode_inbox_cursor
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    email TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS users_email ON users (email);
+
+CREATE TABLE IF NOT EXISTS user_emails (
+    email_key TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS conversations (
+    id TEXT PRIMARY KEY,
+    participant1_id TEXT,
+    participant2_id TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS conversations_participants ON conversations (participant1_id, participant2_id);
+
+CREATE TABLE IF NOT EXISTS messages (
+    id TEXT PRIMARY KEY,
+    conversation_id TEXT,
+    timestamp REAL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_conversation_timestamp ON messages (conversation_id, timestamp, id);
+
+CREATE TABLE IF NOT EXISTS inbox (
+    user_id TEXT NOT NULL,
+    conversation_id TEXT NOT NULL,
+    updated_at REAL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (user_id, conversation_id)
+);
+CREATE INDEX IF NOT EXISTS inbox_recency ON inbox (user_id, updated_at, conversation_id);
+"""
+
+def _epoch(value: Optional[datetime]) -> Optional[float]:
+    """Sortable column value of a datetime; naive datetimes are UTC"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {'$datetime': value.isoformat()}
+    raise TypeError(f"Cannot store {type(value).__name__}")
+
+def _decode(obj: Dict[str, Any]):
+    if len(obj) == 1 and '$datetime' in obj:
+        return datetime.fromisoformat(obj['$datetime'])
+    return obj
+
+def _dumps(document: Dict[str, Any]) -> str:
+    return json.dumps(document, default=_encode)
+
+def _loads(data: str) -> Dict[str, Any]:
+    return json.loads(data, object_hook=_decode)
+
+class SQLiteStorage(StorageBackend):
+    """
+    Embedded storage in a single SQLite file.
+    Each collection is a table with the fields it is queried by pulled out
+    into indexed columns and the whole document kept as JSON. Every I/O
+    thread has its own connection; WAL mode lets reads run while a batch
+    commits.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._conn().executescript(SCHEMA)
+        self._index_existing_emails()
+        super().__init__()
+
+    async def close(self):
+        await super().close()
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._conn()
+        # Take the write lock up front so read-modify-write batches cannot interleave
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _new_id(self) -> str:
+        return uuid.uuid4().hex[:20]
+
+    def _read(self, conn: sqlite3.Connection, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        owner = inbox_owner(collection)
+        if owner is not None:
+            row = conn.execute(
+                "SELECT data FROM inbox WHERE user_id = ? AND conversation_id = ?", (owner, doc_id)
+            ).fetchone()
+        elif collection in ('users', 'conversations', 'messages'):
+            row = conn.execute(f"SELECT data FROM {collection} WHERE id = ?", (doc_id,)).fetchone()
+        elif collection == EMAIL_INDEX:
+            row = conn.execute("SELECT data FROM user_emails WHERE email_key = ?", (doc_id,)).fetchone()
+        else:
+            raise ValueError(f"Unknown collection {collection}")
+        return _loads(row[0]) if row else None
+
+    def _write(self, conn: sqlite3.Connection, collection: str, doc_id: str, document: Dict[str, Any]) -> None:
+        data = _dumps(document)
+        owner = inbox_owner(collection)
+        if owner is not None:
+            conn.execute(
+                "INSERT OR REPLACE INTO inbox (user_id, conversation_id, updated_at, data) VALUES (?, ?, ?, ?)",
+                (owner, doc_id, _epoch(document.get('updated_at')), data)
+            )
+        elif collection == 'users':
+            conn.execute(
+                "INSERT OR REPLACE INTO users (id, email, data) VALUES (?, ?, ?)",
+                (doc_id, document.get('email'), data)
+            )
+        elif collection == EMAIL_INDEX:
+            conn.execute(
+                "INSERT OR REPLACE INTO user_emails (email_key, user_id, data) VALUES (?, ?, ?)",
+                (doc_id, document['user_id'], data)
+            )
+        elif collection == 'conversations':
+            conn.execute(
+                "INSERT OR REPLACE INTO conversations (id, participant1_id, participant2_id, data) VALUES (?, ?, ?, ?)",
+                (doc_id, document.get('participant1_id'), document.get('participant2_id'), data)
+            )
+        elif collection == 'messages':
+            conn.execute(
+                "INSERT OR REPLACE INTO messages (id, conversation_id, timestamp, data) VALUES (?, ?, ?, ?)",
+                (doc_id, document.get('conversation_id'), _epoch(document.get('timestamp')), data)
+            )
+        else:
+            raise ValueError(f"Unknown collection {collection}")
+
+    def _commit_batch(self, ops: List[WriteOp]) -> None:
+        with self._transaction() as conn:
+            for kind, collection, doc_id, data in ops:
+                existing = None if kind == 'set' else self._read(conn, collection, doc_id)
+                self._write(conn, collection, doc_id, apply_write(existing, kind, data))
+
+    def _get_document(self, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        return self._read(self._conn(), collection, doc_id)
+
+    def _update_inbox_preview(self, user_id: str, conversation_id: str, message_id: str, preview: str) -> bool:
+        collection = inbox_collection(user_id)
+        with self._transaction() as conn:
+            entry = self._read(conn, collection, conversation_id)
+            if entry is None or entry.get('last_message_id') != message_id:
+                return False
+            self._write(conn, collection, conversation_id, {**entry, 'last_message_preview': preview})
+            return True
+
+    def _index_existing_emails(self) -> None:
+        """Add index entries for users created before the email index; the oldest account keeps a shared email"""
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT id, email FROM users WHERE email IS NOT NULL "
+                "AND id NOT IN (SELECT user_id FROM user_emails) ORDER BY rowid"
+            ).fetchall()
+            for user_id, email in rows:
+                conn.execute(
+                    "INSERT OR IGNORE INTO user_emails (email_key, user_id, data) VALUES (?, ?, ?)",
+                    (email_key(email), user_id, _dumps({'user_id': user_id, 'email': email}))
+                )
+
+    def _create_user(self, user_data: Dict[str, Any], index_entry: Dict[str, Any]) -> bool:
+        key = email_key(user_data['email'])
+        with self._transaction() as conn:
+            if self._read(conn, EMAIL_INDEX, key) is not None:
+                return False
+            self._write(conn, EMAIL_INDEX, key, index_entry)
+            self._write(conn, 'users', user_data['id'], user_data)
+            return True
+
+    def _create_conversation(self, conversation_data: Dict[str, Any]) -> Dict[str, Any]:
+        with self._transaction() as conn:
+            existing = self._read(conn, 'conversations', conversation_data['id'])
+            if existing is not None:
+                return existing
+            self._write(conn, 'conversations', conversation_data['id'], conversation_data)
+            for user_id in (conversation_data['participant1_id'], conversation_data['participant2_id']):
+                collection = inbox_collection(user_id)
+                entry = apply_write(self._read(conn, collection, conversation_data['id']), 'merge',
+                                    inbox_entry(conversation_data, user_id))
+                self._write(conn, collection, conversation_data['id'], entry)
+            return conversation_data
+
+    def _get_user_inbox(self, user_id: str, limit: int,
+                        cursor: Optional[str]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        sql = "SELECT data FROM inbox WHERE user_id = ? AND updated_at IS NOT NULL"
+        params: List[Any] = [user_id]
+        if cursor:
+            updated_at, conversation_id = decode_inbox_cursor(cursor)
+            sql += " AND (updated_at, conversation_id) < (?, ?)"
+            params += [_epoch(updated_at), conversation_id]
+        sql += " ORDER BY updated_at DESC, conversation_id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        entries = [_loads(row[0]) for row in self._conn().execute(sql, params)]
+        if len(entries) > limit:
+            entries = entries[:limit]
+            return entries, encode_inbox_cursor(entries[-1])
+        return entries, None
+
+    def _get_messages(self, conversation_id: str, limit: int, before: Optional[str],
+                      after: Optional[str], latest: bool) -> List[Dict[str, Any]]:
+        conn = self._conn()
+        sql = "SELECT data FROM messages WHERE conversation_id = ?"
+        params: List[Any] = [conversation_id]
+        newest_first = bool(before) or latest
+
+        if before or after:
+            row = conn.execute("SELECT timestamp, id FROM messages WHERE id = ?", (before or after,)).fetchone()
+            if row is None:
+                raise ValueError(f"Unknown message cursor {before or after}")
+            sql += " AND (timestamp, id) < (?, ?)" if before else " AND (timestamp, id) > (?, ?)"
+            params += list(row)
+
+        sql += " ORDER BY timestamp DESC, id DESC" if newest_first else " ORDER BY timestamp, id"
+        sql += " LIMIT ?"
+        params.append(limit)
+
+        messages = [_loads(row[0]) for row in conn.execute(sql, params)]
+        if newest_first:
+            messages.reverse()
+        return messages
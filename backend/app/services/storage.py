@@ -0,0 +1,18 @@
+from ..core.config import settings
+from .storage_base import StorageBackend
+
+def create_storage(backend: str) -> StorageBackend:
+    """Instantiate the configured storage backend, importing only what it needs"""
+    if backend == 'memory':
+        from .memory_storage import MemoryStorage
+        return MemoryStorage()
+    if backend == 'sqlite':
+        from .sqlite_storage import SQLiteStorage
+        return SQLiteStorage(settings.SQLITE_STORAGE_PATH)
+    if backend == 'firestore':
+        from .firebase_service import FirebaseService
+        return FirebaseService()
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+# Create singleton instance
+storage = create_storage(settings.STORAGE_BACKEND)
@@ -0,0 +1,484 @@
+from typing import Optional, Dict, Any, AsyncIterator, Callable, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import quote
+import asyncio
+import base64
+import functools
+import logging
+from ..core.config import settings
+from ..core.metrics import metrics
+from .write_buffer import WriteBuffer, WriteOp, Increment
+from .document_cache import DocumentCache
+
+logger = logging.getLogger(__name__)
+
+def conversation_id_for(participant1_id: str, participant2_id: str) -> str:
+    """Deterministic conversation document ID for a pair of users, in either order"""
+    return '_'.join(sorted((participant1_id, participant2_id)))
+
+# Email -> user ID documents; the document ID enforces one account per address
+EMAIL_INDEX = 'user_emails'
+
+def email_key(email: str) -> str:
+    """Email index document ID: the address trimmed and lowercased, with '/' escaped for Firestore"""
+    return quote(email.strip().lower(), safe='@+')
+
+# Characters of the last message kept in inbox entries
+INBOX_PREVIEW_CHARS = 100
+
+INBOX_PREFIX = 'user_inbox/'
+
+def inbox_collection(user_id: str) -> str:
+    return f'{INBOX_PREFIX}{user_id}/conversations'
+
+def inbox_owner(collection: str) -> Optional[str]:
+    """User ID of an inbox collection path, or None for other collections"""
+    if collection.startswith(INBOX_PREFIX):
+        return collection[len(INBOX_PREFIX):].split('/', 1)[0]
+    return None
+
+def inbox_entry(conversation: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+    """Initial inbox entry of a conversation for one of its participants"""
+    partner_id = conversation['participant2_id'] if conversation['participant1_id'] == user_id else conversation['participant1_id']
+    return {
+        'id': conversation['id'],
+        'participant1_id': conversation['participant1_id'],
+        'participant2_id': conversation['participant2_id'],
+        'partner_id': partner_id,
+        'created_at': conversation.get('created_at'),
+        'last_message_at': conversation.get('last_message_at'),
+        'last_message_preview': None,
+        'last_message_id': None,
+        'last_sender_id': None,
+        'unread_count': 0,
+        # Sort key: last activity, or creation for conversations without messages
+        'updated_at': conversation.get('last_message_at') or conversation.get('created_at') or datetime.utcnow()
+    }
+
+def encode_inbox_cursor(entry: Dict[str, Any]) -> str:
+    raw = f"{entry['updated_at'].isoformat()}|{entry['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_inbox_cursor(cursor: str) -> Tuple[datetime, str]:
+    updated_at, conversation_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|', 1)
+    return datetime.fromisoformat(updated_at), conversation_id
+
+def apply_write(existing: Optional[Dict[str, Any]], kind: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Document resulting from one buffered write, resolving increments like Firestore does"""
+    if kind == 'update' and existing is None:
+        raise KeyError("No document to update")
+
+    document = {} if kind == 'set' or existing is None else dict(existing)
+    for field, value in data.items():
+        if isinstance(value, Increment):
+            current = document.get(field)
+            value = (current if isinstance(current, (int, float)) else 0) + value.amount
+        document[field] = value
+    return document
+
+class StorageBackend:
+    """
+    Async data layer shared by every storage backend.
+    Subclasses implement the blocking primitives (the _underscore methods);
+    this class runs them on a bounded I/O thread pool, group-commits writes
+    and caches user and conversation documents.
+    """
+
+    name = 'base'
+
+    def __init__(self):
+        # Storage calls block, so they run on a dedicated bounded thread pool
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.DB_IO_THREADS,
+            thread_name_prefix=f'{self.name}-io'
+        )
+        self._pending = None
+        self.stats = {
+            'calls': 0,
+            'in_flight': 0,
+            'waiting': 0
+        }
+
+        # Message inserts, conversation timestamps and read receipts are group-committed
+        self.writes = WriteBuffer(
+            self._commit_writes,
+            window=settings.WRITE_BUFFER_WINDOW_MS / 1000,
+            max_ops=settings.WRITE_BUFFER_MAX_OPS,
+            validate=self._check_updates
+        )
+
+        # User and conversation documents are read far more often than they change
+        self.users = DocumentCache(
+            max_size=settings.DOCUMENT_CACHE_SIZE,
+            ttl_seconds=settings.DOCUMENT_CACHE_TTL_SECONDS,
+            negative_ttl_seconds=settings.DOCUMENT_CACHE_NEGATIVE_TTL_SECONDS
+        )
+        self.conversations = DocumentCache(
+            max_size=settings.DOCUMENT_CACHE_SIZE,
+            ttl_seconds=settings.DOCUMENT_CACHE_TTL_SECONDS,
+            negative_ttl_seconds=settings.DOCUMENT_CACHE_NEGATIVE_TTL_SECONDS
+        )
+        # Email index entries never change once written; misses expire quickly
+        self.emails = DocumentCache(
+            max_size=settings.DOCUMENT_CACHE_SIZE,
+            ttl_seconds=settings.DOCUMENT_CACHE_TTL_SECONDS,
+            negative_ttl_seconds=settings.EMAIL_CACHE_NEGATIVE_TTL_SECONDS
+        )
+
+    async def _run(self, func: Callable, *args, **kwargs):
+        """Run a blocking storage call on the I/O pool without blocking the event loop"""
+        if self._pending is None:
+            self._pending = asyncio.Semaphore(settings.DB_MAX_PENDING)
+
+        self.stats['waiting'] += 1
+        async with self._pending:
+            self.stats['waiting'] -= 1
+            self.stats['in_flight'] += 1
+            self.stats['calls'] += 1
+            try:
+                loop = asyncio.get_event_loop()
+                return await loop.run_in_executor(
+                    self._executor,
+                    functools.partial(func, *args, **kwargs)
+                )
+            finally:
+                self.stats['in_flight'] -= 1
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            'backend': self.name,
+            **self.stats,
+            'write_buffer': self.writes.info(),
+            'io_threads': settings.DB_IO_THREADS,
+            'max_pending': settings.DB_MAX_PENDING
+        }
+
+    async def close(self):
+        """Commit buffered writes, then stop the I/O pool"""
+        await self.writes.close()
+        self._executor.shutdown(wait=True)
+
+    @metrics.instrument('storage', 'commit_batch')
+    async def _commit_writes(self, ops: List[WriteOp]) -> None:
+        await self._run(self._commit_batch, ops)
+
+    async def _check_updates(self, ops: List[WriteOp]) -> None:
+        """Reject updates of missing documents before they join a batch they would fail"""
+        for _, collection, doc_id, _ in ops:
+            if collection == 'conversations':
+                document = await self.conversations.get(
+                    doc_id,
+                    lambda: self._run(self._get_document, 'conversations', doc_id)
+                )
+            else:
+                document = await self._run(self._get_document, collection, doc_id)
+            if document is None:
+                raise KeyError(f"No document to update: {collection}/{doc_id}")
+
+    # Blocking primitives implemented by each backend
+    def _new_id(self) -> str:
+        raise NotImplementedError
+
+    def _commit_batch(self, ops: List[WriteOp]) -> None:
+        """Apply buffered writes atomically"""
+        raise NotImplementedError
+
+    def _get_document(self, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def _create_user(self, user_data: Dict[str, Any], index_entry: Dict[str, Any]) -> bool:
+        """Write the user and its email index entry together; False if the email is taken"""
+        raise NotImplementedError
+
+    def _find_legacy_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        return None
+
+    def _create_conversation(self, conversation_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create the conversation and both inbox entries unless it exists; return the stored conversation"""
+        raise NotImplementedError
+
+    def _find_legacy_conversation(self, participant1_id: str, participant2_id: str) -> Optional[Dict[str, Any]]:
+        return None
+
+    def _update_inbox_preview(self, user_id: str, conversation_id: str, message_id: str, preview: str) -> bool:
+        """Atomically set the entry's preview if its last message is still message_id"""
+        raise NotImplementedError
+
+    def _get_user_inbox(self, user_id: str, limit: int,
+                        cursor: Optional[str]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        raise NotImplementedError
+
+    def _get_messages(self, conversation_id: str, limit: int, before: Optional[str],
+                      after: Optional[str], latest: bool) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    # User operations
+    @metrics.instrument('storage')
+    async def create_user(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create the user, or return None if another account already has the email"""
+        try:
+            user_data['id'] = self._new_id()
+            key = email_key(user_data['email'])
+            index_entry = {'user_id': user_data['id'], 'email': user_data['email']}
+            if not await self._run(self._create_user, user_data, index_entry):
+                logger.info("Email already registered", extra={'email': user_data['email']})
+                return None
+            self.users.set(user_data['id'], user_data)
+            self.emails.set(key, index_entry)
+            return user_data
+        except Exception as e:
+            logger.error("Error creating user: %s", e)
+            return None
+
+    @metrics.instrument('storage')
+    async def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        """Point read of the email index, then of the user; unknown emails are cached briefly"""
+        try:
+            key = email_key(email)
+
+            async def load_entry():
+                entry = await self._run(self._get_document, EMAIL_INDEX, key)
+                if entry is None and settings.EMAIL_INDEX_LEGACY_LOOKUP:
+                    # Cached like an index entry, so repeated misses skip the legacy query too
+                    user = await self._run(self._find_legacy_user_by_email, email)
+                    if user is None:
+                        return None
+                    self.users.set(user['id'], user)
+                    entry = {'user_id': user['id'], 'email': user['email']}
+                return entry
+
+            entry = await self.emails.get(key, load_entry)
+            if entry is None:
+                return None
+            user_id = entry['user_id']
+            return await self.users.get(user_id, lambda: self._run(self._get_document, 'users', user_id))
+        except Exception as e:
+            logger.error("Error getting user: %s", e)
+            return None
+
+    @metrics.instrument('storage')
+    async def get_user_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            return await self.users.get(user_id, lambda: self._run(self._get_document, 'users', user_id))
+        except Exception as e:
+            logger.error("Error getting user: %s", e)
+            return None
+
+    @metrics.instrument('storage')
+    async def update_user_language(self, user_id: str, language: str) -> bool:
+        try:
+            await self._run(self._commit_batch, [
+                ('update', 'users', user_id, {'preferred_language': language})
+            ])
+            self.users.invalidate(user_id)
+            return True
+        except Exception as e:
+            logger.error("Error updating user language: %s", e)
+            return False
+
+    @metrics.instrument('storage')
+    async def update_user_password(self, user_id: str, hashed_password: str) -> bool:
+        try:
+            await self._run(self._commit_batch, [
+                ('update', 'users', user_id, {'hashed_password': hashed_password})
+            ])
+            self.users.invalidate(user_id)
+            return True
+        except Exception as e:
+            logger.error("Error updating user password: %s", e)
+            return False
+
+    # Conversation operations
+    @metrics.instrument('storage')
+    async def create_conversation(self, conversation_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create the pair's conversation, or return it if another request created it first"""
+        try:
+            conversation_data['id'] = conversation_id_for(
+                conversation_data['participant1_id'],
+                conversation_data['participant2_id']
+            )
+            created = await self._run(self._create_conversation, conversation_data)
+            self.conversations.set(created['id'], created)
+            return created
+        except Exception as e:
+            logger.error("Error creating conversation: %s", e)
+            return None
+
+    @metrics.instrument('storage')
+    async def get_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            return await self.conversations.get(
+                conversation_id,
+                lambda: self._run(self._get_document, 'conversations', conversation_id)
+            )
+        except Exception as e:
+            logger.error("Error getting conversation: %s", e)
+            return None
+
+    @metrics.instrument('storage')
+    async def find_conversation(self, participant1_id: str, participant2_id: str) -> Optional[Dict[str, Any]]:
+        """Find the conversation between two users in either participant order"""
+        conversation_id = conversation_id_for(participant1_id, participant2_id)
+        try:
+            conversation = await self.conversations.get(
+                conversation_id,
+                lambda: self._run(self._get_document, 'conversations', conversation_id)
+            )
+            if conversation is None and settings.CONVERSATION_LEGACY_LOOKUP:
+                conversation = await self._run(self._find_legacy_conversation, participant1_id, participant2_id)
+            return conversation
+        except Exception as e:
+            logger.error("Error finding conversation: %s", e)
+            raise
+
+    @metrics.instrument('storage')
+    async def get_user_inbox(self, user_id: str, limit: int = 20,
+                             cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """A page of the user's conversations, most recent first, and the cursor of the next page"""
+        try:
+            return await self._run(self._get_user_inbox, user_id, limit, cursor)
+        except Exception as e:
+            logger.error("Error getting inbox: %s", e)
+            return [], None
+
+    @metrics.instrument('storage')
+    async def mark_conversation_read(self, user_id: str, conversation_id: str) -> bool:
+        """Reset the user's unread count for a conversation"""
+        try:
+            await self.writes.submit([
+                ('merge', inbox_collection(user_id), conversation_id, {'unread_count': 0})
+            ])
+            return True
+        except Exception as e:
+            logger.error("Error marking conversation read: %s", e)
+            return False
+
+    @metrics.instrument('storage')
+    async def update_conversation_timestamp(self, conversation_id: str) -> bool:
+        try:
+            fields = {'last_message_at': datetime.utcnow()}
+            await self.writes.submit([('update', 'conversations', conversation_id, fields)])
+            self.conversations.patch(conversation_id, fields)
+            return True
+        except Exception as e:
+            logger.error("Error updating conversation timestamp: %s", e)
+            return False
+
+    # Message operations
+    @metrics.instrument('storage')
+    async def create_message(self, message_data: Dict[str, Any], recipient_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Insert a message and, in the same batch, bump its conversation's
+        last_message_at and both participants' inbox entries
+        """
+        try:
+            # IDs are generated client-side, so this does not touch the store
+            message_data['id'] = self._new_id()
+            conversation_id = message_data['conversation_id']
+            sent_at = message_data.get('timestamp') or datetime.utcnow()
+            fields = {'last_message_at': sent_at}
+            ops = [
+                ('set', 'messages', message_data['id'], message_data),
+                ('update', 'conversations', conversation_id, fields)
+            ]
+            if recipient_id:
+                activity = {
+                    'last_message_at': sent_at,
+                    'updated_at': sent_at,
+                    'last_message_id': message_data['id'],
+                    'last_sender_id': message_data['sender_id']
+                }
+                ops.append(('merge', inbox_collection(message_data['sender_id']), conversation_id, {
+                    **activity,
+                    'partner_id': recipient_id,
+                    'last_message_preview': message_data['text'][:INBOX_PREVIEW_CHARS]
+                }))
+                ops.append(('merge', inbox_collection(recipient_id), conversation_id, {
+                    **activity,
+                    'partner_id': message_data['sender_id'],
+                    'last_message_preview': (message_data.get('translated_text') or message_data['text'])[:INBOX_PREVIEW_CHARS],
+                    'unread_count': Increment(1)
+                }))
+            await self.writes.submit(ops)
+            self.conversations.patch(conversation_id, fields)
+            return message_data
+        except Exception as e:
+            logger.error("Error creating message: %s", e)
+            return None
+
+    @metrics.instrument('storage')
+    async def get_message(self, message_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            return await self._run(self._get_document, 'messages', message_id)
+        except Exception as e:
+            logger.error("Error getting message: %s", e)
+            return None
+
+    @metrics.instrument('storage')
+    async def update_message(self, message_id: str, fields: Dict[str, Any]) -> bool:
+        """Patch fields of a stored message, e.g. its translation once enrichment finishes"""
+        try:
+            await self.writes.submit([('update', 'messages', message_id, fields)])
+            return True
+        except Exception as e:
+            logger.error("Error updating message: %s", e)
+            return False
+
+    @metrics.instrument('storage')
+    async def update_inbox_preview(self, user_id: str, conversation_id: str, message_id: str, preview: str) -> bool:
+        """
+        Replace the inbox preview of a message, e.g. with its translation once
+        enrichment finishes; False if a newer message already took its place
+        """
+        try:
+            return await self._run(
+                self._update_inbox_preview, user_id, conversation_id, message_id, preview[:INBOX_PREVIEW_CHARS]
+            )
+        except Exception as e:
+            logger.error("Error updating inbox preview: %s", e)
+            return False
+
+    @metrics.instrument('storage')
+    async def get_messages(self, conversation_id: str, limit: int = 50, before: Optional[str] = None,
+                           after: Optional[str] = None, latest: bool = False) -> List[Dict[str, Any]]:
+        """
+        A page of messages in chronological order: the oldest ones by default,
+        the newest with latest, or the ones right before/after a message ID
+        """
+        try:
+            return await self._run(self._get_messages, conversation_id, limit, before, after, latest)
+        except Exception as e:
+            logger.error("Error getting messages: %s", e)
+            return []
+
+    async def stream_messages(self, conversation_id: str, after: Optional[str] = None,
+                              limit: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Yield messages oldest first, reading one keyset page at a time"""
+        remaining = limit
+        while remaining is None or remaining > 0:
+            page_size = settings.MESSAGE_STREAM_BUFFER if remaining is None else min(remaining, settings.MESSAGE_STREAM_BUFFER)
+            try:
+                page = await self._run(self._get_messages, conversation_id, page_size, None, after, False)
+            except Exception as e:
+                logger.error("Error streaming messages: %s", e)
+                return
+            for message in page:
+                yield message
+            if len(page) < page_size:
+                return
+            after = page[-1]['id']
+            if remaining is not None:
+                remaining -= len(page)
+
+    @metrics.instrument('storage')
+    async def mark_message_read(self, message_id: str) -> bool:
+        """Mark a message as read"""
+        try:
+            await self.writes.submit([
+                ('update', 'messages', message_id, {'read': True, 'read_at': datetime.utcnow()})
+            ])
+            return True
+        except Exception as e:
+            logger.error("Error marking message read: %s", e)
+            return False
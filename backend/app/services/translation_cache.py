@@ -0,0 +1,220 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TranslationCache:
+    """
+    Two-tier translation cache.
+    A bounded in-memory LRU with TTL sits in front of a SQLite store
+    that survives restarts. Both tiers expire entries TTL seconds after
+    they were translated (wall-clock time, so the age carries over
+    restarts), and the store is pruned to max_disk_entries. SQLite runs
+    on a single dedicated thread so lookups never block the event loop.
+    """
+
+    # Writes between two prunes of the persistent store
+    PRUNE_EVERY_WRITES = 500
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: int = 86400, db_path: Optional[str] = None,
+                 max_disk_entries: int = 100000):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self.max_disk_entries = max_disk_entries
+
+        # key -> (translation, expires_at as a Unix timestamp)
+        self._memory: "OrderedDict[Tuple[str, str, str], Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+
+        self.stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'pruned': 0
+        }
+
+        self._db = None
+        self._executor = None
+        if db_path:
+            try:
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("PRAGMA synchronous=NORMAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS translations ("
+                    "text TEXT NOT NULL, source TEXT NOT NULL, target TEXT NOT NULL, "
+                    "translation TEXT NOT NULL, created_at REAL NOT NULL, "
+                    "PRIMARY KEY (text, source, target))"
+                )
+                self._db.execute(
+                    "CREATE INDEX IF NOT EXISTS translations_created_at ON translations (created_at)"
+                )
+                self._db.commit()
+                self._prune_disk()
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='translation-cache')
+            except Exception as e:
+                logger.error("Translation cache store error: %s", e)
+                self._db = None
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Normalize text so trivially different inputs share an entry"""
+        return ' '.join(unicodedata.normalize('NFC', text).split())
+
+    def make_key(self, text: str, source_code: str, target_code: str) -> Tuple[str, str, str]:
+        return (self.normalize(text), source_code.lower(), target_code.lower())
+
+    async def get(self, text: str, source_code: str, target_code: str) -> Optional[str]:
+        """Look up a translation, memory first and then the persistent store"""
+        key = self.make_key(text, source_code, target_code)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                translation, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.stats['memory_hits'] += 1
+                    return translation
+                del self._memory[key]
+                self.stats['expirations'] += 1
+
+        row = await self._run_disk(self._read_disk, key, now - self.ttl_seconds)
+
+        with self._lock:
+            if row is None:
+                self.stats['misses'] += 1
+                return None
+            translation, created_at = row
+            self.stats['disk_hits'] += 1
+            self._put_memory(key, translation, created_at + self.ttl_seconds)
+            return translation
+
+    async def set(self, text: str, source_code: str, target_code: str, translation: str) -> None:
+        """Store a translation in both tiers"""
+        key = self.make_key(text, source_code, target_code)
+        now = time.time()
+
+        with self._lock:
+            self._put_memory(key, translation, now + self.ttl_seconds)
+        await self._run_disk(self._write_disk, key, translation, now)
+
+    async def clear(self) -> int:
+        """Flush both tiers and return the number of in-memory entries dropped"""
+        with self._lock:
+            dropped = len(self._memory)
+            self._memory.clear()
+        await self._run_disk(self._clear_disk)
+        return dropped
+
+    async def info(self) -> Dict:
+        """Cache counters and sizes for the admin endpoint"""
+        disk_entries = await self._run_disk(self._count_disk)
+        with self._lock:
+            lookups = self.stats['memory_hits'] + self.stats['disk_hits'] + self.stats['misses']
+            hits = self.stats['memory_hits'] + self.stats['disk_hits']
+            return {
+                **self.stats,
+                'hit_ratio': round(hits / lookups, 4) if lookups else 0.0,
+                'memory_entries': len(self._memory),
+                'memory_max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'disk_entries': disk_entries or 0,
+                'disk_max_entries': self.max_disk_entries,
+                'disk_path': self.db_path if self._db is not None else None
+            }
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _put_memory(self, key: Tuple[str, str, str], translation: str, expires_at: float) -> None:
+        self._memory[key] = (translation, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    async def _run_disk(self, call, *args):
+        """Run a SQLite call on the cache's own thread; None without a store"""
+        if self._db is None or self._executor is None:
+            return None
+        return await asyncio.get_running_loop().run_in_executor(self._executor, call, *args)
+
+    def _read_disk(self, key: Tuple[str, str, str], cutoff: float) -> Optional[Tuple[str, float]]:
+        try:
+            row = self._db.execute(
+                "SELECT translation, created_at FROM translations "
+                "WHERE text = ? AND source = ? AND target = ? AND created_at > ?",
+                (*key, cutoff)
+            ).fetchone()
+            return (row[0], row[1]) if row else None
+        except Exception as e:
+            logger.error("Translation cache read error: %s", e)
+            return None
+
+    def _write_disk(self, key: Tuple[str, str, str], translation: str, created_at: float) -> None:
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO translations (text, source, target, translation, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (*key, translation, created_at)
+            )
+            self._db.commit()
+        except Exception as e:
+            logger.error("Translation cache write error: %s", e)
+            return
+        self._writes_since_prune += 1
+        if self._writes_since_prune >= self.PRUNE_EVERY_WRITES:
+            self._prune_disk()
+
+    def _prune_disk(self) -> None:
+        """Delete expired rows, then the oldest ones beyond max_disk_entries"""
+        self._writes_since_prune = 0
+        try:
+            pruned = self._db.execute(
+                "DELETE FROM translations WHERE created_at <= ?",
+                (time.time() - self.ttl_seconds,)
+            ).rowcount
+            excess = self._db.execute("SELECT COUNT(*) FROM translations").fetchone()[0] - self.max_disk_entries
+            if excess > 0:
+                pruned += self._db.execute(
+                    "DELETE FROM translations WHERE rowid IN "
+                    "(SELECT rowid FROM translations ORDER BY created_at LIMIT ?)",
+                    (excess,)
+                ).rowcount
+            self._db.commit()
+            self.stats['pruned'] += pruned
+        except Exception as e:
+            logger.error("Translation cache prune error: %s", e)
+
+    def _clear_disk(self) -> None:
+        try:
+            self._db.execute("DELETE FROM translations")
+            self._db.commit()
+        except Exception as e:
+            logger.error("Translation cache flush error: %s", e)
+
+    def _count_disk(self) -> int:
+        try:
+            return self._db.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        except Exception as e:
+            logger.error("Translation cache count error: %s", e)
+            return 0
@@ -0,0 +1,179 @@
+import asyncio
+import heapq
+import itertools
+import time
+from datetime import datetime
+from typing import Dict
+
+# Priority lanes, lower value is served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+PRIORITY_BACKGROUND = 2
+
+LANE_NAMES = {
+    PRIORITY_INTERACTIVE: 'interactive',
+    PRIORITY_BULK: 'bulk',
+    PRIORITY_BACKGROUND: 'background'
+}
+
+
+class TranslationQuotaExceeded(Exception):
+    """Raised when low-priority work is shed to protect the remaining budget"""
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at rate tokens per second"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self) -> bool:
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def give_back(self) -> None:
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+    def time_until_token(self) -> float:
+        self._refill()
+        if self.tokens >= 1 or self.rate <= 0:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class DailyQuota:
+    """Counts provider requests per UTC day"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.day = datetime.utcnow().date()
+        self.used = 0
+
+    def _roll(self) -> None:
+        today = datetime.utcnow().date()
+        if today != self.day:
+            self.day = today
+            self.used = 0
+
+    @property
+    def remaining(self) -> int:
+        self._roll()
+        return max(self.limit - self.used, 0)
+
+    def consume(self) -> None:
+        self._roll()
+        self.used += 1
+
+
+class TranslationScheduler:
+    """
+    Admission control in front of the translation provider.
+    Requests wait for a rate-limit token in priority order, so interactive
+    messages overtake bulk and background work. When the daily budget gets
+    down to the reserve, or a low lane is backed up, low-priority requests
+    are shed. Interactive requests are never shed.
+    """
+
+    def __init__(self, rate_per_second: float, burst: int, daily_quota: int,
+                 quota_reserve: int, max_queued_low_priority: int):
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self.quota = DailyQuota(daily_quota)
+        self.quota_reserve = quota_reserve
+        self.max_queued_low_priority = max_queued_low_priority
+
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._dispatcher = None
+        self._queued = {lane: 0 for lane in LANE_NAMES}
+
+        self.stats = {
+            f'{name}_{event}': 0
+            for name in LANE_NAMES.values()
+            for event in ('admitted', 'shed')
+        }
+
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE) -> None:
+        """Wait until a request of this priority may go to the provider"""
+        if priority not in LANE_NAMES:
+            raise ValueError(f"Unknown translation priority: {priority}")
+        lane = LANE_NAMES[priority]
+
+        if priority != PRIORITY_INTERACTIVE:
+            self._check_reserve(lane)
+            if self._queued[priority] >= self.max_queued_low_priority:
+                self.stats[f'{lane}_shed'] += 1
+                raise TranslationQuotaExceeded(f"Too many queued {lane} translations")
+
+        future = asyncio.get_event_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self._queued[priority] += 1
+        self._ensure_dispatcher()
+
+        try:
+            await future
+        finally:
+            self._queued[priority] -= 1
+
+        if priority != PRIORITY_INTERACTIVE:
+            # The budget may have dropped into the reserve while this request waited
+            try:
+                self._check_reserve(lane)
+            except TranslationQuotaExceeded:
+                self.bucket.give_back()
+                raise
+
+        self.quota.consume()
+        self.stats[f'{lane}_admitted'] += 1
+
+    def info(self) -> Dict:
+        return {
+            **self.stats,
+            'queued': {LANE_NAMES[lane]: count for lane, count in self._queued.items()},
+            'tokens': round(self.bucket.tokens, 2),
+            'rate_per_second': self.bucket.rate,
+            'daily_quota': self.quota.limit,
+            'daily_used': self.quota.used,
+            'daily_remaining': self.quota.remaining,
+            'quota_reserve': self.quota_reserve
+        }
+
+    def _check_reserve(self, lane: str) -> None:
+        if self.quota.remaining <= self.quota_reserve:
+            self.stats[f'{lane}_shed'] += 1
+            raise TranslationQuotaExceeded(f"Daily translation budget reserved for live messages ({lane} shed)")
+
+    def _ensure_dispatcher(self) -> None:
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+    async def _dispatch(self) -> None:
+        """Hand out tokens to the highest-priority waiter as they refill"""
+        while self._waiters:
+            delay = self.bucket.time_until_token()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            if not self.bucket.try_take():
+                await asyncio.sleep(0)
+                continue
+
+            granted = False
+            while self._waiters:
+                _, _, future = heapq.heappop(self._waiters)
+                if not future.done():
+                    future.set_result(None)
+                    granted = True
+                    break
+            if not granted:
+                self.bucket.give_back()
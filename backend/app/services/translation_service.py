@@ -1,7 +1,208 @@
-from deep_translator import GoogleTranslator
-from langdetect import detect
+from deep_translator import LibreTranslator, MyMemoryTranslator
+from deep_translator.constants import MY_MEMORY_LANGUAGES_TO_CODES
 import asyncio
-from typing import Dict
+import bisect
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from ..core.config import settings
+from ..core.metrics import metrics
+from .translation_cache import TranslationCache
+from .language_detector import LanguageDetector
+from .single_flight import SingleFlight
+from .translator_pool import TranslatorClientPool
+from .translation_scheduler import (
+    TranslationScheduler, TranslationQuotaExceeded, PRIORITY_INTERACTIVE, PRIORITY_BULK
+)
+
+logger = logging.getLogger(__name__)
+
+# Separator used when several texts are packed into one provider request
+BATCH_DELIMITER = "\n"
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with percentile estimates"""
+    
+    BUCKETS_MS = (5, 10, 25, 50, 75, 100, 150, 250, 400, 600, 1000, 1500, 2500, 5000, 10000)
+    
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+    
+    def observe(self, latency_ms: float) -> None:
+        self.counts[bisect.bisect_left(self.BUCKETS_MS, latency_ms)] += 1
+        self.total += 1
+        self.sum_ms += latency_ms
+    
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given fraction of samples"""
+        if not self.total:
+            return None
+        threshold = fraction * self.total
+        seen = 0
+        for bound, count in zip(self.BUCKETS_MS + (float('inf'),), self.counts):
+            seen += count
+            if seen >= threshold:
+                return bound if bound != float('inf') else float(self.BUCKETS_MS[-1])
+        return float(self.BUCKETS_MS[-1])
+    
+    def info(self) -> Dict:
+        return {
+            'count': self.total,
+            'avg_ms': round(self.sum_ms / self.total, 2) if self.total else 0.0,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'buckets': {
+                f'le_{bound}': count
+                for bound, count in zip(self.BUCKETS_MS + ('inf',), self.counts)
+            }
+        }
+
+class CircuitBreaker:
+    """
+    Takes a provider out of rotation after consecutive failures.
+    After the cooldown one probe request is let through (half-open); its
+    outcome closes the breaker again or restarts the cooldown.
+    """
+    
+    def __init__(self, failure_threshold: int, cooldown_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+    
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.cooldown_seconds:
+                self.state = 'half_open'
+                return True
+            return False
+    
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+    
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+class TranslationProvider:
+    """Base class for translation backends; translate() runs in a worker thread"""
+    
+    name = 'base'
+    max_chars = 5000
+    
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.TRANSLATION_BREAKER_FAILURES,
+            cooldown_seconds=settings.TRANSLATION_BREAKER_COOLDOWN_SECONDS
+        )
+        self.stats = {'calls': 0, 'errors': 0, 'backup_wins': 0}
+    
+    def translate(self, text: str, source_code: str, target_code: str) -> str:
+        raise NotImplementedError
+    
+    def call(self, text: str, source_code: str, target_code: str) -> str:
+        """translate() with latency, error and breaker bookkeeping"""
+        started = time.perf_counter()
+        self.stats['calls'] += 1
+        try:
+            translation = self.translate(text, source_code, target_code)
+            if not translation:
+                raise ValueError(f"{self.name} returned an empty translation")
+        except Exception:
+            self.stats['errors'] += 1
+            self.breaker.record_failure()
+            raise
+        finally:
+            self.latency.observe((time.perf_counter() - started) * 1000)
+        self.breaker.record_success()
+        return translation
+    
+    def info(self) -> Dict:
+        return {
+            **self.stats,
+            'breaker': self.breaker.state,
+            'latency': self.latency.info()
+        }
+
+class GoogleProvider(TranslationProvider):
+    """Google Translate through the pooled keep-alive clients"""
+    
+    name = 'google'
+    
+    def __init__(self, pool: TranslatorClientPool):
+        super().__init__()
+        self.pool = pool
+    
+    def translate(self, text: str, source_code: str, target_code: str) -> str:
+        return self.pool.translate(text, source_code, target_code)
+
+class MyMemoryProvider(TranslationProvider):
+    """MyMemory free API, which uses locale codes such as hi-IN"""
+    
+    name = 'mymemory'
+    max_chars = 500
+    
+    def __init__(self):
+        super().__init__()
+        self.locales = {}
+        for locale in MY_MEMORY_LANGUAGES_TO_CODES.values():
+            self.locales.setdefault(locale.split('-')[0].lower(), locale)
+    
+    def translate(self, text: str, source_code: str, target_code: str) -> str:
+        translator = MyMemoryTranslator(
+            source=self.locales.get(source_code, source_code),
+            target=self.locales.get(target_code, target_code)
+        )
+        return translator.translate(text)
+
+class LibreProvider(TranslationProvider):
+    """Self-hosted LibreTranslate instance"""
+    
+    name = 'libre'
+    
+    def translate(self, text: str, source_code: str, target_code: str) -> str:
+        translator = LibreTranslator(
+            source=source_code,
+            target=target_code,
+            api_key=settings.LIBRE_TRANSLATE_API_KEY,
+            use_free_api=False,
+            custom_url=settings.LIBRE_TRANSLATE_URL
+        )
+        return translator.translate(text)
+
+class LocalProvider(TranslationProvider):
+    """Offline stand-in that tags each line with the target code"""
+    
+    name = 'local'
+    
+    def translate(self, text: str, source_code: str, target_code: str) -> str:
+        return BATCH_DELIMITER.join(f"[{target_code}] {line}" for line in text.split(BATCH_DELIMITER))
+
+PROVIDER_CLASSES = {
+    'google': GoogleProvider,
+    'mymemory': MyMemoryProvider,
+    'libre': LibreProvider,
+    'local': LocalProvider
+}
+
+def _discard_result(future: asyncio.Future) -> None:
+    """Done-callback for provider calls whose answer is no longer wanted"""
+    if not future.cancelled():
+        future.exception()
 
 class TranslationService:
     def __init__(self):
@@ -25,6 +226,49 @@ class TranslationService:
         
         # Reverse mapping for code to name
         self.code_to_language = {v: k for k, v in self.language_map.items()}
+        
+        # Script histogram first, seeded langdetect only for shared scripts
+        self.detector = LanguageDetector(seed=0)
+        
+        # Cache of provider results keyed by (normalized text, source, target)
+        self.cache = TranslationCache(
+            max_size=settings.TRANSLATION_CACHE_SIZE,
+            ttl_seconds=settings.TRANSLATION_CACHE_TTL_SECONDS,
+            db_path=settings.TRANSLATION_CACHE_PATH,
+            max_disk_entries=settings.TRANSLATION_CACHE_DISK_MAX_ENTRIES
+        )
+        
+        # Identical concurrent requests share one provider call
+        self.inflight = SingleFlight()
+        
+        # Keep-alive provider clients reused across calls
+        self.pool = TranslatorClientPool(
+            max_size=settings.TRANSLATOR_POOL_SIZE,
+            idle_seconds=settings.TRANSLATOR_POOL_IDLE_SECONDS,
+            base_url=settings.TRANSLATOR_BASE_URL
+        )
+        
+        # Rate limit, daily quota and priority lanes in front of the provider
+        self.scheduler = TranslationScheduler(
+            rate_per_second=settings.TRANSLATION_RATE_PER_SECOND,
+            burst=settings.TRANSLATION_BURST,
+            daily_quota=settings.TRANSLATION_DAILY_QUOTA,
+            quota_reserve=settings.TRANSLATION_QUOTA_RESERVE,
+            max_queued_low_priority=settings.TRANSLATION_MAX_QUEUED_LOW_PRIORITY
+        )
+        
+        # Providers in order of preference; later ones are hedge and failover targets
+        self.providers = []
+        for name in settings.TRANSLATION_PROVIDERS.split(','):
+            name = name.strip().lower()
+            if name == 'google':
+                self.providers.append(GoogleProvider(self.pool))
+            elif name in PROVIDER_CLASSES:
+                self.providers.append(PROVIDER_CLASSES[name]())
+            elif name:
+                logger.warning("Unknown translation provider: %s", name)
+        if not self.providers:
+            self.providers.append(GoogleProvider(self.pool))
     
     def get_language_code(self, language: str) -> str:
         """Convert language name to code"""
@@ -34,18 +278,23 @@ class TranslationService:
         """Convert language code to name"""
         return self.code_to_language.get(code.lower(), code)
     
+    @metrics.instrument('translation')
     def detect_language(self, text: str) -> str:
         """Detect language from text and return language name"""
         try:
-            detected_code = detect(text)
+            detected_code = self.detector.detect(text)
             return self.get_language_name(detected_code)
         except Exception as e:
-            print(f"Language detection error: {e}")
+            logger.error("Language detection error: %s", e)
             return 'english'
     
-    async def translate_text(self, text: str, source_lang: str, target_lang: str) -> str:
+    @metrics.instrument('translation')
+    async def translate_text(self, text: str, source_lang: str, target_lang: str,
+                             priority: int = PRIORITY_INTERACTIVE, raise_errors: bool = False) -> str:
         """
         Translate text using deep-translator (Google Translate API)
+        through pooled keep-alive clients. Failures return the original
+        text unless raise_errors is set, for callers that retry.
         """
         try:
             # Convert language names to codes
@@ -56,28 +305,126 @@ class TranslationService:
             if source_code == target_code:
                 return text
             
-            # Run translation in executor to avoid blocking
-            loop = asyncio.get_event_loop()
-            translation = await loop.run_in_executor(
-                None,
-                lambda: GoogleTranslator(source=source_code, target=target_code).translate(text)
-            )
+            cached = await self.cache.get(text, source_code, target_code)
+            if cached is not None:
+                return cached
             
-            return translation
+            # Per priority, so an interactive caller never waits behind a shed or queued bulk call
+            key = ('translate', priority) + self.cache.make_key(text, source_code, target_code)
+            return await self.inflight.do(
+                key,
+                lambda: self._fetch_translation(text, source_code, target_code, priority)
+            )
             
         except Exception as e:
-            print(f"Translation error: {e}")
+            logger.error("Translation error: %s", e)
+            if raise_errors:
+                raise
             # Return original text if translation fails
             return text
     
-    async def translate_with_detection(self, text: str, target_lang: str) -> Dict[str, str]:
+    async def _fetch_translation(self, text: str, source_code: str, target_code: str, priority: int) -> str:
+        """Call the provider and cache a successful result"""
+        await self.scheduler.acquire(priority)
+        
+        translation = await self._call_providers(text, source_code, target_code)
+        
+        if translation:
+            await self.cache.set(text, source_code, target_code, translation)
+        
+        return translation
+    
+    async def _call_providers(self, text: str, source_code: str, target_code: str) -> str:
+        """
+        Translate with the first healthy provider under a deadline.
+        With TRANSLATION_HEDGING, if it has not answered after its p95
+        latency, the same request is sent to the next healthy provider and
+        the first answer wins. A provider that fails outright is replaced
+        by the next one at once. Calls still running when this returns are
+        left to finish in the executor and their outcome is discarded.
+        """
+        candidates = [
+            provider for provider in self.providers
+            if len(text) <= provider.max_chars and provider.breaker.allow()
+        ]
+        if not candidates:
+            raise RuntimeError("No healthy translation provider available")
+        
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + settings.TRANSLATION_DEADLINE_SECONDS
+        running = {}
+        last_error = None
+        
+        def launch(provider):
+            # Run translation in executor to avoid blocking
+            future = loop.run_in_executor(None, provider.call, text, source_code, target_code)
+            running[future] = provider
+        
+        first = candidates.pop(0)
+        launch(first)
+        
+        try:
+            while running:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                
+                timeout = remaining
+                if candidates and settings.TRANSLATION_HEDGING:
+                    timeout = min(remaining, self._hedge_delay(first))
+                
+                done, _ = await asyncio.wait(list(running), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                
+                for future in done:
+                    provider = running.pop(future)
+                    if future.exception() is None:
+                        if provider is not first:
+                            provider.stats['backup_wins'] += 1
+                        return future.result()
+                    last_error = future.exception()
+                    logger.warning("Translation provider %s failed: %s", provider.name, last_error)
+                
+                # Either a provider failed (fail over) or the hedge delay passed (hedge)
+                if candidates and loop.time() < deadline:
+                    launch(candidates.pop(0))
+            
+            if last_error is not None and not running:
+                raise last_error
+            raise asyncio.TimeoutError(f"Translation deadline of {settings.TRANSLATION_DEADLINE_SECONDS}s exceeded")
+        finally:
+            # Executor calls cannot be cancelled; retrieve the losers' outcome so errors are not reported as unhandled
+            for future in running:
+                future.add_done_callback(_discard_result)
+    
+    def _hedge_delay(self, provider: TranslationProvider) -> float:
+        """Seconds to wait on a provider before hedging, from its observed p95"""
+        p95 = provider.latency.percentile(0.95)
+        if p95 is None or provider.latency.total < settings.TRANSLATION_HEDGE_MIN_SAMPLES:
+            return settings.TRANSLATION_HEDGE_DELAY_MS / 1000
+        return max(p95, settings.TRANSLATION_HEDGE_DELAY_MIN_MS) / 1000
+    
+    def providers_info(self) -> Dict:
+        return {provider.name: provider.info() for provider in self.providers}
+    
+    @metrics.instrument('translation')
+    async def translate_with_detection(self, text: str, target_lang: str,
+                                       priority: int = PRIORITY_INTERACTIVE) -> Dict[str, str]:
         """Detect source language and translate to target language"""
+        key = ('detect', priority, self.cache.normalize(text), self.get_language_code(target_lang))
+        result = await self.inflight.do(
+            key,
+            lambda: self._detect_and_translate(text, target_lang, priority)
+        )
+        # Callers get their own copy since the result is shared
+        return {**result, 'original_text': text, 'target_language': target_lang}
+    
+    async def _detect_and_translate(self, text: str, target_lang: str, priority: int) -> Dict[str, str]:
         try:
             # Detect source language
             source_lang = self.detect_language(text)
             
             # Translate text
-            translated_text = await self.translate_text(text, source_lang, target_lang)
+            translated_text = await self.translate_text(text, source_lang, target_lang, priority)
             
             return {
                 'original_text': text,
@@ -86,7 +433,7 @@ class TranslationService:
                 'target_language': target_lang
             }
         except Exception as e:
-            print(f"Translation with detection error: {e}")
+            logger.error("Translation with detection error: %s", e)
             return {
                 'original_text': text,
                 'source_language': 'unknown',
@@ -94,29 +441,144 @@ class TranslationService:
                 'target_language': target_lang
             }
     
-    async def translate_batch(self, texts: list, source_lang: str, target_lang: str) -> list:
-        """Translate multiple texts at once"""
-        try:
-            source_code = self.get_language_code(source_lang)
-            target_code = self.get_language_code(target_lang)
-            
-            if source_code == target_code:
-                return texts
-            
-            loop = asyncio.get_event_loop()
-            translations = []
-            
-            for text in texts:
-                translation = await loop.run_in_executor(
-                    None,
-                    lambda t=text: GoogleTranslator(source=source_code, target=target_code).translate(t)
+    async def translate_batch(self, texts: list, source_lang: str, target_lang: str,
+                              priority: int = PRIORITY_BULK) -> list:
+        """Translate multiple texts at once, keeping the original for failed items"""
+        results = await self.translate_batch_detailed(texts, source_lang, target_lang, priority)
+        return [result['translated_text'] for result in results]
+    
+    @metrics.instrument('translation')
+    async def translate_batch_detailed(self, texts: List[str], source_lang: str, target_lang: str,
+                                       priority: int = PRIORITY_BULK) -> List[Dict]:
+        """
+        Translate multiple texts with as few provider requests as possible.
+        Short texts are packed into delimited requests up to the provider's
+        character limit and the packed requests run concurrently.
+        Every item reports its own error instead of failing the whole batch.
+        """
+        source_code = self.get_language_code(source_lang)
+        target_code = self.get_language_code(target_lang)
+        
+        results = [
+            {'original_text': text, 'translated_text': text, 'error': None}
+            for text in texts
+        ]
+        
+        if source_code == target_code:
+            return results
+        
+        # Identical texts are only sent once; duplicates copy the first result
+        pending = {}
+        for index, text in enumerate(texts):
+            if not text or not text.strip():
+                continue
+            if text in pending:
+                pending[text].append(index)
+                continue
+            cached = await self.cache.get(text, source_code, target_code)
+            if cached is not None:
+                results[index]['translated_text'] = cached
+            else:
+                pending[text] = [index]
+        
+        semaphore = asyncio.Semaphore(settings.TRANSLATION_BATCH_CONCURRENCY)
+        chunks = self._pack_batch([(indices[0], text) for text, indices in pending.items()])
+        
+        await asyncio.gather(*[
+            self._translate_chunk(chunk, source_code, target_code, results, semaphore, priority)
+            for chunk in chunks
+        ])
+        
+        for indices in pending.values():
+            for duplicate in indices[1:]:
+                results[duplicate].update(
+                    translated_text=results[indices[0]]['translated_text'],
+                    error=results[indices[0]]['error']
                 )
-                translations.append(translation)
+        
+        return results
+    
+    def _pack_batch(self, items: List[Tuple[int, str]]) -> List[List[Tuple[int, str]]]:
+        """Group (index, text) pairs into chunks that fit in one provider request"""
+        max_chars = settings.TRANSLATION_BATCH_MAX_CHARS
+        chunks = []
+        current = []
+        current_size = 0
+        
+        for index, text in items:
+            # Texts that contain the delimiter or fill a request alone go by themselves
+            if BATCH_DELIMITER in text or len(text) + len(BATCH_DELIMITER) > max_chars:
+                chunks.append([(index, text)])
+                continue
             
-            return translations
+            size = len(text) + len(BATCH_DELIMITER)
+            if current and current_size + size > max_chars:
+                chunks.append(current)
+                current = []
+                current_size = 0
+            current.append((index, text))
+            current_size += size
+        
+        if current:
+            chunks.append(current)
+        
+        return chunks
+    
+    async def _translate_chunk(self, chunk: List[Tuple[int, str]], source_code: str, target_code: str,
+                               results: List[Dict], semaphore: asyncio.Semaphore, priority: int) -> None:
+        """Translate one packed chunk and write each item back into results"""
+        packed = BATCH_DELIMITER.join(text for _, text in chunk)
+        
+        try:
+            async with semaphore:
+                await self.scheduler.acquire(priority)
+                translation = await self._call_providers(packed, source_code, target_code)
+        except TranslationQuotaExceeded as e:
+            for index, _ in chunk:
+                results[index]['error'] = str(e)
+            return
         except Exception as e:
-            print(f"Batch translation error: {e}")
-            return texts
+            if len(chunk) > 1:
+                # Retry items one by one so a single bad text cannot fail its neighbours
+                await self._translate_items(chunk, source_code, target_code, results, semaphore, priority, str(e))
+                return
+            index, _ = chunk[0]
+            logger.error("Batch translation error: %s", e)
+            results[index]['error'] = str(e)
+            return
+        
+        parts = [translation] if len(chunk) == 1 else (translation or '').split(BATCH_DELIMITER)
+        
+        if len(parts) != len(chunk):
+            # The provider merged or split lines, so the packing cannot be undone safely
+            await self._translate_items(chunk, source_code, target_code, results, semaphore, priority,
+                                        'Provider did not preserve the batch delimiters')
+            return
+        
+        for (index, text), part in zip(chunk, parts):
+            part = part.strip() if part else part
+            if not part:
+                results[index]['error'] = 'Empty translation'
+                continue
+            results[index]['translated_text'] = part
+            await self.cache.set(text, source_code, target_code, part)
+
+    async def _translate_items(self, chunk: List[Tuple[int, str]], source_code: str, target_code: str,
+                               results: List[Dict], semaphore: asyncio.Semaphore, priority: int,
+                               error: str) -> None:
+        """
+        Fallback for a chunk that could not be translated packed. Each
+        retried item costs its own provider request and quota unit, so
+        only the first TRANSLATION_BATCH_FALLBACK_MAX_ITEMS are retried and
+        the rest report the chunk's error.
+        """
+        limit = settings.TRANSLATION_BATCH_FALLBACK_MAX_ITEMS
+        for index, _ in chunk[limit:]:
+            results[index]['error'] = error
+        await asyncio.gather(*[
+            self._translate_chunk([item], source_code, target_code, results, semaphore, priority)
+            for item in chunk[:limit]
+        ])
 
 # Create singleton instance
 translation_service = TranslationService()
\ No newline at end of file
@@ -0,0 +1,228 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from bs4 import BeautifulSoup
+from deep_translator import GoogleTranslator
+from deep_translator.exceptions import RequestError, TooManyRequests, TranslationNotFound
+from deep_translator.validate import is_empty, is_input_valid, request_failed
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# Seconds spent opening TCP/TLS connections by the current thread's request
+_connect_timer = threading.local()
+
+
+def _record_connect(started: float) -> None:
+    _connect_timer.seconds = getattr(_connect_timer, 'seconds', 0.0) + time.perf_counter() - started
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _record_connect(started)
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _record_connect(started)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections report how long connect() took"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool
+        }
+
+
+class PooledGoogleTranslator(GoogleTranslator):
+    """
+    GoogleTranslator that sends its requests through a keep-alive session
+    instead of opening a new connection for every call.
+    """
+
+    def __init__(self, source: str, target: str, base_url: Optional[str] = None, **kwargs):
+        super().__init__(source=source, target=target, **kwargs)
+        if base_url:
+            self._base_url = base_url
+
+        self.session = requests.Session()
+        adapter = _TimedAdapter(pool_connections=1, pool_maxsize=1)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.last_used = time.monotonic()
+        self.last_timing: Dict[str, float] = {}
+
+    def translate(self, text: str, **kwargs) -> str:
+        """Translate text, recording a connect vs. transfer breakdown in last_timing"""
+        self.last_timing = {}
+        if not is_input_valid(text, max_chars=5000):
+            return text
+        text = text.strip()
+        if self._same_source_target() or is_empty(text):
+            return text
+
+        params = {'tl': self._target, 'sl': self._source, self.payload_key: text}
+
+        _connect_timer.seconds = 0.0
+        started = time.perf_counter()
+        response = self.session.get(self._base_url, params=params, proxies=self.proxies)
+        body = response.text
+        total = time.perf_counter() - started
+        connect = _connect_timer.seconds
+
+        self.last_timing = {
+            'connect_ms': round(connect * 1000, 3),
+            'transfer_ms': round((total - connect) * 1000, 3),
+            'total_ms': round(total * 1000, 3),
+            'new_connection': connect > 0
+        }
+
+        if response.status_code == 429:
+            raise TooManyRequests()
+        if request_failed(status_code=response.status_code):
+            raise RequestError()
+
+        soup = BeautifulSoup(body, 'html.parser')
+        element = soup.find(self._element_tag, self._element_query)
+        if not element:
+            element = soup.find(self._element_tag, self._alt_element_query)
+            if not element:
+                raise TranslationNotFound(text)
+
+        return element.get_text(strip=True)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class TranslatorClientPool:
+    """
+    Pool of keep-alive translator clients keyed by language pair.
+    Up to max_size idle clients are kept per pair, and clients left idle
+    longer than idle_seconds are closed.
+    """
+
+    def __init__(self, max_size: int = 4, idle_seconds: float = 60, base_url: Optional[str] = None):
+        self.max_size = max_size
+        self.idle_seconds = idle_seconds
+        self.base_url = base_url or None
+
+        self._idle: Dict[Tuple[str, str], List[PooledGoogleTranslator]] = {}
+        self._lock = threading.Lock()
+
+        self.stats = {
+            'created': 0,
+            'reused': 0,
+            'evicted': 0,
+            'calls': 0,
+            'new_connections': 0,
+            'connect_ms_total': 0.0,
+            'transfer_ms_total': 0.0
+        }
+
+    @contextmanager
+    def client(self, source: str, target: str):
+        """Borrow a client for one language pair and return it afterwards"""
+        translator = self._acquire(source, target)
+        try:
+            yield translator
+        finally:
+            self._record(translator.last_timing)
+            self._release(source, target, translator)
+
+    def translate(self, text: str, source: str, target: str) -> str:
+        with self.client(source, target) as translator:
+            return translator.translate(text)
+
+    def evict_idle(self) -> int:
+        """Close clients that have been idle too long"""
+        cutoff = time.monotonic() - self.idle_seconds
+        expired = []
+
+        with self._lock:
+            for pair, clients in list(self._idle.items()):
+                keep = [c for c in clients if c.last_used >= cutoff]
+                expired.extend(c for c in clients if c.last_used < cutoff)
+                if keep:
+                    self._idle[pair] = keep
+                else:
+                    del self._idle[pair]
+            self.stats['evicted'] += len(expired)
+
+        for translator in expired:
+            translator.close()
+        return len(expired)
+
+    def close(self) -> None:
+        with self._lock:
+            clients = [c for pair in self._idle.values() for c in pair]
+            self._idle.clear()
+        for translator in clients:
+            translator.close()
+
+    def info(self) -> Dict:
+        with self._lock:
+            calls = self.stats['calls']
+            return {
+                **self.stats,
+                'connect_ms_total': round(self.stats['connect_ms_total'], 3),
+                'transfer_ms_total': round(self.stats['transfer_ms_total'], 3),
+                'pairs': len(self._idle),
+                'idle_clients': sum(len(c) for c in self._idle.values()),
+                'max_size': self.max_size,
+                'idle_seconds': self.idle_seconds,
+                'avg_connect_ms': round(self.stats['connect_ms_total'] / calls, 3) if calls else 0.0,
+                'avg_transfer_ms': round(self.stats['transfer_ms_total'] / calls, 3) if calls else 0.0
+            }
+
+    def _acquire(self, source: str, target: str) -> PooledGoogleTranslator:
+        self.evict_idle()
+        with self._lock:
+            clients = self._idle.get((source, target))
+            if clients:
+                self.stats['reused'] += 1
+                return clients.pop()
+            self.stats['created'] += 1
+        return PooledGoogleTranslator(source=source, target=target, base_url=self.base_url)
+
+    def _release(self, source: str, target: str, translator: PooledGoogleTranslator) -> None:
+        translator.last_used = time.monotonic()
+        with self._lock:
+            clients = self._idle.setdefault((source, target), [])
+            if len(clients) < self.max_size:
+                clients.append(translator)
+                return
+        translator.close()
+
+    def _record(self, timing: Dict) -> None:
+        if not timing:
+            return
+        with self._lock:
+            self.stats['calls'] += 1
+            self.stats['new_connections'] += 1 if timing['new_connection'] else 0
+            self.stats['connect_ms_total'] += timing['connect_ms']
+            self.stats['transfer_ms_total'] += timing['transfer_ms']
@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# One write: (kind, collection path, document id, data) where kind is
+# 'set' (replace), 'merge' (set, merging into any existing document) or 'update'
+WriteOp = Tuple[str, str, str, Dict[str, Any]]
+
+
+class Increment:
+    """Field value that adds amount to the stored number, applied by the store at commit"""
+
+    def __init__(self, amount: int = 1):
+        self.amount = amount
+
+    def __repr__(self) -> str:
+        return f"Increment({self.amount})"
+
+
+def merge_fields(queued: Dict[str, Any], fields: Dict[str, Any]) -> None:
+    """Fold fields into queued, summing increments rather than letting the later one win"""
+    for field, value in fields.items():
+        current = queued.get(field)
+        if isinstance(value, Increment) and isinstance(current, Increment):
+            queued[field] = Increment(current.amount + value.amount)
+        elif isinstance(value, Increment) and isinstance(current, (int, float)):
+            queued[field] = current + value.amount
+        else:
+            queued[field] = value
+
+
+class WriteBuffer:
+    """
+    Write-behind buffer that group-commits writes.
+    Writes submitted within window seconds, up to max_ops documents, go to
+    the store as one atomic batch. Writes to the same document inside a
+    batch are merged, so a burst of messages in one conversation bumps its
+    last_message_at once. Callers are only acked once their batch has
+    committed, and one batch is in flight at a time so writes to a document
+    land in submission order.
+
+    One bad write must not fail the writes it was batched with. validate
+    is awaited with the updates of documents nothing queued has written,
+    and raises to reject the submission before it joins a batch. If a
+    batch still fails, each submission in it is retried on its own, so
+    only the failing one's caller gets the error.
+    """
+
+    def __init__(self, commit: Callable[[List[WriteOp]], Awaitable[None]],
+                 window: float, max_ops: int,
+                 validate: Optional[Callable[[List[WriteOp]], Awaitable[None]]] = None):
+        self.commit = commit
+        self.window = window
+        self.max_ops = max_ops
+        self.validate = validate
+
+        self._batch = _PendingBatch()
+        self._sealed: Deque[_PendingBatch] = deque()
+        self._committing: Optional[_PendingBatch] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._flushes = set()
+
+        self.stats = {
+            'submitted': 0,
+            'coalesced': 0,
+            'written': 0,
+            'batches': 0,
+            'errors': 0,
+            'rejected': 0,
+            'isolated_retries': 0,
+            'largest_batch': 0,
+            'commit_ms_total': 0.0
+        }
+
+    async def submit(self, ops: List[WriteOp]) -> None:
+        """Queue writes that must commit together and wait for the commit"""
+        if self.validate is not None:
+            unchecked = [op for op in ops if op[0] == 'update' and not self._queued(op[1], op[2])]
+            if unchecked:
+                try:
+                    await self.validate(unchecked)
+                except Exception:
+                    self.stats['rejected'] += 1
+                    raise
+
+        new_keys = {(collection, doc_id) for _, collection, doc_id, _ in ops} - self._batch.ops.keys()
+        if self._batch.ops and len(self._batch.ops) + len(new_keys) > self.max_ops:
+            # Never split one submission across two batches
+            self._seal()
+
+        future = asyncio.get_event_loop().create_future()
+        self.stats['submitted'] += len(ops)
+        self.stats['coalesced'] += self._batch.add(ops, future)
+
+        if len(self._batch.ops) >= self.max_ops:
+            self._seal()
+        if self._sealed:
+            self._schedule_flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_event_loop().call_later(self.window, self._schedule_flush)
+
+        await future
+
+    async def flush(self) -> None:
+        """Commit everything queued so far, oldest batch first"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            if self._batch.ops:
+                self._seal()
+            while self._sealed:
+                self._committing = self._sealed.popleft()
+                try:
+                    await self._commit(self._committing)
+                finally:
+                    self._committing = None
+
+    async def close(self) -> None:
+        """Wait for in-flight batches and commit what is still queued"""
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+        await self.flush()
+
+    def info(self) -> Dict:
+        batches = self.stats['batches']
+        return {
+            **self.stats,
+            'commit_ms_total': round(self.stats['commit_ms_total'], 3),
+            'avg_batch_size': round(self.stats['written'] / batches, 2) if batches else 0.0,
+            'queued': len(self._batch.ops) + sum(len(batch.ops) for batch in self._sealed),
+            'window_ms': self.window * 1000,
+            'max_ops': self.max_ops
+        }
+
+    def _queued(self, collection: str, doc_id: str) -> bool:
+        """Whether a write to the document is queued or committing, so it will exist first"""
+        key = (collection, doc_id)
+        batches = [self._batch, *self._sealed]
+        if self._committing is not None:
+            batches.append(self._committing)
+        return any(key in batch.ops for batch in batches)
+
+    def _seal(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._sealed.append(self._batch)
+        self._batch = _PendingBatch()
+
+    def _schedule_flush(self) -> None:
+        self._timer = None
+        task = asyncio.ensure_future(self.flush())
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _commit(self, batch: "_PendingBatch") -> None:
+        ops = batch.write_ops()
+        started = time.perf_counter()
+        try:
+            await self.commit(ops)
+        except Exception as e:
+            logger.error("Error committing write batch: %s", e)
+            self.stats['errors'] += 1
+            if len(batch.submissions) == 1:
+                _, waiter = batch.submissions[0]
+                if not waiter.done():
+                    waiter.set_exception(e)
+                return
+            await self._commit_each(batch)
+            return
+
+        self.stats['batches'] += 1
+        self.stats['written'] += len(ops)
+        self.stats['largest_batch'] = max(self.stats['largest_batch'], len(ops))
+        self.stats['commit_ms_total'] += (time.perf_counter() - started) * 1000
+        for _, waiter in batch.submissions:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    async def _commit_each(self, batch: "_PendingBatch") -> None:
+        """Retry a failed batch one submission at a time, in submission order"""
+        self.stats['isolated_retries'] += 1
+        for ops, waiter in batch.submissions:
+            try:
+                await self.commit(ops)
+            except Exception as e:
+                self.stats['errors'] += 1
+                if not waiter.done():
+                    waiter.set_exception(e)
+                continue
+            self.stats['written'] += len(ops)
+            if not waiter.done():
+                waiter.set_result(None)
+
+
+class _PendingBatch:
+    """Writes merged per document, plus each submission and the caller waiting on it"""
+
+    def __init__(self):
+        self.ops: Dict[Tuple[str, str], List] = {}
+        self.submissions: List[Tuple[List[WriteOp], asyncio.Future]] = []
+
+    def add(self, ops: List[WriteOp], waiter: asyncio.Future) -> int:
+        """Merge ops in, returning how many folded into an already queued write"""
+        self.submissions.append((list(ops), waiter))
+        coalesced = 0
+        for kind, collection, doc_id, data in ops:
+            pending = self.ops.get((collection, doc_id))
+            if pending is None:
+                self.ops[(collection, doc_id)] = [kind, dict(data)]
+                continue
+            coalesced += 1
+            if kind == 'set':
+                pending[0] = 'set'
+                pending[1] = dict(data)
+            else:
+                # Updates and merges fold into whatever is already queued for the document
+                if kind == 'merge' and pending[0] == 'update':
+                    pending[0] = 'merge'
+                merge_fields(pending[1], data)
+        return coalesced
+
+    def write_ops(self) -> List[WriteOp]:
+        return [(kind, collection, doc_id, data)
+                for (collection, doc_id), (kind, data) in self.ops.items()]
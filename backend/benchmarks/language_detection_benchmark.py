@@ -0,0 +1,80 @@
+"""
+Accuracy and throughput of the tiered detector against plain langdetect.
+
+    python -m benchmarks.language_detection_benchmark --rounds 20
+"""
+import argparse
+import time
+
+from langdetect import detect
+
+from app.services.language_detector import LanguageDetector
+
+# (expected code, chat-length message)
+SAMPLES = [
+    ('hi', 'नमस्ते, आप कैसे हैं?'),
+    ('hi', 'मैं कल तुमसे मिलूँगा'),
+    ('hi', 'खाना खा लिया?'),
+    ('mr', 'तुम्ही कसे आहात? मला तुमची आठवण येते'),
+    ('mr', 'आज खूप पाऊस पडतोय'),
+    ('ta', 'வணக்கம், எப்படி இருக்கீங்க?'),
+    ('ta', 'நாளை சந்திப்போம்'),
+    ('te', 'మీరు ఎలా ఉన్నారు?'),
+    ('te', 'రేపు కలుద్దాం'),
+    ('bn', 'আমি ভালো আছি, তুমি কেমন আছো?'),
+    ('bn', 'কাল দেখা হবে'),
+    ('gu', 'તમે કેમ છો?'),
+    ('gu', 'કાલે મળીશું'),
+    ('kn', 'ನೀವು ಹೇಗಿದ್ದೀರಿ?'),
+    ('kn', 'ನಾಳೆ ಸಿಗೋಣ'),
+    ('ml', 'നിങ്ങൾക്ക് സുഖമാണോ?'),
+    ('ml', 'നാളെ കാണാം'),
+    ('pa', 'ਤੁਸੀਂ ਕਿਵੇਂ ਹੋ?'),
+    ('pa', 'ਕੱਲ੍ਹ ਮਿਲਾਂਗੇ'),
+    ('or', 'ଆପଣ କେମିତି ଅଛନ୍ତି?'),
+    ('or', 'କାଲି ଦେଖାହେବା'),
+    ('ur', 'آپ کیسے ہیں؟'),
+    ('ur', 'کل ملتے ہیں'),
+    ('as', 'আপুনি কেনে আছে? মই ভাল আছোঁ, ৰাতিপুৱা লগ পাম'),
+    ('en', 'How are you doing today?'),
+    ('en', 'See you tomorrow at the station'),
+    ('en', 'ok'),
+]
+
+
+def run(label, detect_code, rounds):
+    correct = sum(1 for expected, text in SAMPLES if detect_code(text) == expected)
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for _, text in SAMPLES:
+            detect_code(text)
+    elapsed = time.perf_counter() - started
+    calls = rounds * len(SAMPLES)
+
+    print(f"{label:<12} accuracy {correct}/{len(SAMPLES)} ({correct / len(SAMPLES):.0%})   "
+          f"{calls / elapsed:10.0f} msg/s   {elapsed / calls * 1e6:8.1f} us/msg")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    def langdetect_only(text):
+        try:
+            return detect(text)
+        except Exception:
+            return 'en'
+
+    detector = LanguageDetector(seed=0)
+    detector.warm_up()
+    langdetect_only('warm up')
+
+    run("langdetect", langdetect_only, args.rounds)
+    run("tiered", detector.detect, args.rounds)
+    print(f"tiered paths: {detector.stats}")
+
+
+if __name__ == "__main__":
+    main()
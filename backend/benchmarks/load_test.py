@@ -0,0 +1,372 @@
+"""
+End-to-end load test of REST and Socket.IO chat traffic.
+
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.load_test --users 100 --messages 20 --report load-report.json
+    python -m benchmarks.load_test --baseline load-report.json --max-regression 0.2
+
+Simulated users are paired into conversations. Each one registers (or
+logs in), opens its conversation, connects a Socket.IO client, goes online
+and joins the room. It then sends messages, alternating between the two
+paths: POST /chat/messages, which the server stores and broadcasts, and
+the send_message event alone. A typing event precedes every message, and
+the partner emits message_read for every message it receives.
+
+Latency is measured from the start of the send to the partner receiving
+new_message. With two-phase delivery a POSTed message is broadcast with
+its original text and its translation follows as message_enriched; the
+time to that second event is reported separately as enrichment. Unless --url points at a running server, the harness starts
+socket_app in a subprocess with memory storage, the offline local
+translation provider and no rate limit, so it needs no network or
+credentials. The report is JSON. With --baseline the script exits with
+status 1 when p95 latency, throughput or error rate regress past
+--max-regression.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime
+
+import httpx
+import socketio
+
+OFFLINE_ENV = {
+    'STORAGE_BACKEND': 'memory',
+    'TRANSLATION_PROVIDERS': 'local',
+    'TRANSLATION_CACHE_PATH': '',
+    'TRANSLATION_RATE_PER_SECOND': '1000000',
+    'TRANSLATION_BURST': '1000000',
+    'TRANSLATION_DAILY_QUOTA': '1000000000',
+}
+
+LANGUAGES = ['hindi', 'tamil', 'bengali', 'english', 'marathi', 'telugu', 'urdu']
+
+SAMPLE_TEXTS = [
+    "Hey, are we still meeting tomorrow?",
+    "kal milte hain, don't be late yaar",
+    "I loved the movie, thanks for the suggestion!",
+    "This is taking way too long, I'm annoyed",
+    "क्या आप मुझे फाइल भेज सकते हैं?",
+    "நாளை சந்திப்போம்",
+]
+
+
+def percentile(values, share):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(int(len(ordered) * share), len(ordered) - 1)], 3)
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+class Recorder:
+    """Send times and delivery latencies, shared by every simulated user"""
+
+    def __init__(self):
+        self.sent = {}  # load_id -> (path, started)
+        self.latencies = {'rest': [], 'socket': []}
+        self.enriching = {}  # load_id -> started, REST messages awaiting message_enriched
+        self.enrichment = []
+        self.rest_ms = []
+        self.errors = {'setup': 0, 'rest': 0, 'socket': 0, 'undelivered': 0}
+        self.delivered = 0
+        self.first_send = None
+        self.last_delivery = None
+
+    def start(self, path):
+        load_id = uuid.uuid4().hex
+        now = time.perf_counter()
+        self.first_send = self.first_send or now
+        self.sent[load_id] = (path, now)
+        return load_id
+
+    def deliver(self, load_id):
+        entry = self.sent.pop(load_id, None)
+        if entry is None:
+            return
+        path, started = entry
+        self.last_delivery = time.perf_counter()
+        self.latencies[path].append((self.last_delivery - started) * 1000)
+        self.delivered += 1
+        if path == 'rest':
+            self.enriching[load_id] = started
+
+    def enriched(self, load_id):
+        started = self.enriching.pop(load_id, None)
+        if started is not None:
+            self.enrichment.append((time.perf_counter() - started) * 1000)
+
+
+class SimulatedUser:
+    def __init__(self, index, args, recorder, http):
+        self.index = index
+        self.args = args
+        self.recorder = recorder
+        self.http = http
+        self.email = f"load-{args.run_id}-{index}@example.com"
+        self.language = LANGUAGES[index % len(LANGUAGES)]
+        self.user = None
+        self.token = None
+        self.partner = None
+        self.conversation = None
+        self.sio = socketio.AsyncClient(reconnection=False)
+        self.sio.on('new_message', self.on_new_message)
+        self.sio.on('message_enriched', self.on_message_enriched)
+
+    async def post_auth(self, path, payload):
+        # Password hashing sheds load with 429/503; back off like a real client
+        while True:
+            response = await self.http.post(path, json=payload)
+            if response.status_code not in (429, 503):
+                return response
+            await asyncio.sleep(float(response.headers.get('Retry-After', 1)))
+
+    async def sign_in(self):
+        payload = {'email': self.email, 'name': f'Load {self.index}',
+                   'preferred_language': self.language, 'password': 'load-test-password'}
+        response = await self.post_auth('/auth/register', payload)
+        if response.status_code == 400:
+            response = await self.post_auth('/auth/login', {'email': self.email, 'password': payload['password']})
+        response.raise_for_status()
+        self.user = response.json()['user']
+        self.token = response.json()['access_token']
+
+    @property
+    def headers(self):
+        return {'Authorization': f'Bearer {self.token}'}
+
+    async def open_conversation(self):
+        response = await self.http.post('/chat/conversations', json={
+            'participant1_id': self.user['id'],
+            'participant2_id': self.partner.user['id']
+        }, headers=self.headers)
+        response.raise_for_status()
+        self.conversation = response.json()
+
+    async def connect(self):
+        await self.sio.connect(self.args.url, transports=['websocket'], auth={'token': self.token})
+        await self.sio.emit('user_online', {'user_id': self.user['id']})
+        # Wait for the server to check membership before sending into the room
+        await self.sio.call('join_conversation', {
+            'conversation_id': self.conversation['id'],
+            'user_id': self.user['id']
+        })
+
+    async def on_new_message(self, data):
+        if data.get('sender_id') == self.user['id']:
+            return
+        load_id = data.get('client_message_id')
+        self.recorder.deliver(load_id)
+        if data.get('enrichment') == 'done':
+            # Inline delivery: already translated
+            self.recorder.enriched(load_id)
+        await self.sio.emit('message_read', {
+            'conversation_id': self.conversation['id'],
+            'message_id': data.get('id'),
+            'user_id': self.user['id']
+        })
+
+    async def on_message_enriched(self, data):
+        if data.get('sender_id') != self.user['id']:
+            self.recorder.enriched(data.get('client_message_id'))
+
+    async def chat(self):
+        for number in range(self.args.messages):
+            path = 'rest' if (self.index + number) % 2 == 0 else 'socket'
+            text = SAMPLE_TEXTS[(self.index + number) % len(SAMPLE_TEXTS)]
+            await self.sio.emit('typing', {
+                'conversation_id': self.conversation['id'],
+                'user_id': self.user['id'],
+                'is_typing': True
+            })
+            load_id = self.recorder.start(path)
+            try:
+                if path == 'rest':
+                    await self.send_rest(text, load_id)
+                else:
+                    await self.send_socket(text, load_id)
+            except Exception as e:
+                print(f"Send error ({path}): {e}")
+                self.recorder.errors[path] += 1
+                self.recorder.sent.pop(load_id, None)
+            await asyncio.sleep(self.args.interval_ms / 1000)
+
+    async def send_rest(self, text, load_id):
+        started = time.perf_counter()
+        response = await self.http.post('/chat/messages', json={
+            'conversation_id': self.conversation['id'],
+            'sender_id': self.user['id'],
+            'text': text,
+            'language': self.language,
+            'client_message_id': load_id
+        }, headers=self.headers)
+        response.raise_for_status()
+        self.recorder.rest_ms.append((time.perf_counter() - started) * 1000)
+
+    async def send_socket(self, text, load_id):
+        await self.sio.emit('send_message', {
+            'id': load_id,
+            'conversation_id': self.conversation['id'],
+            'sender_id': self.user['id'],
+            'text': text,
+            'language': self.language,
+            'client_message_id': load_id
+        })
+
+
+async def run_load(args):
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as http:
+        users = [SimulatedUser(index, args, recorder, http) for index in range(args.users)]
+        for first, second in zip(users[::2], users[1::2]):
+            first.partner, second.partner = second, first
+
+        setup_started = time.perf_counter()
+        for step in ('sign_in', 'open_conversation', 'connect'):
+            results = await asyncio.gather(
+                *(getattr(user, step)() for user in users if user.partner and (step != 'open_conversation' or user.index % 2 == 0)),
+                return_exceptions=True
+            )
+            for result in results:
+                if isinstance(result, Exception):
+                    print(f"Setup error ({step}): {result}")
+                    recorder.errors['setup'] += 1
+            if step == 'open_conversation':
+                for first, second in zip(users[::2], users[1::2]):
+                    second.conversation = first.conversation
+            if recorder.errors['setup']:
+                break
+        setup_seconds = time.perf_counter() - setup_started
+
+        ready = [user for user in users if user.partner and user.sio.connected]
+        if recorder.errors['setup'] == 0:
+            await asyncio.gather(*(user.chat() for user in ready))
+
+            deadline = time.perf_counter() + args.timeout
+            while (recorder.sent or recorder.enriching) and time.perf_counter() < deadline:
+                await asyncio.sleep(0.05)
+        recorder.errors['undelivered'] = len(recorder.sent)
+
+        await asyncio.gather(*(user.sio.disconnect() for user in ready), return_exceptions=True)
+
+    return recorder, setup_seconds
+
+
+def build_report(args, recorder, setup_seconds):
+    attempted = recorder.delivered + sum(recorder.errors[key] for key in ('rest', 'socket', 'undelivered'))
+    window = (recorder.last_delivery - recorder.first_send) if recorder.last_delivery else 0
+    all_latencies = recorder.latencies['rest'] + recorder.latencies['socket']
+
+    def summary(values):
+        return {'count': len(values), 'p50_ms': percentile(values, 0.50),
+                'p95_ms': percentile(values, 0.95), 'p99_ms': percentile(values, 0.99)}
+
+    return {
+        'run_id': args.run_id,
+        'started_at': datetime.utcnow().isoformat(),
+        'config': {'users': args.users, 'messages_per_user': args.messages,
+                   'interval_ms': args.interval_ms, 'url': args.url, 'offline': not args.external},
+        'setup_seconds': round(setup_seconds, 3),
+        'delivery': summary(all_latencies),
+        'delivery_rest': summary(recorder.latencies['rest']),
+        'delivery_socket': summary(recorder.latencies['socket']),
+        'rest_post': summary(recorder.rest_ms),
+        'enrichment': {**summary(recorder.enrichment), 'missing': len(recorder.enriching)},
+        'throughput_msg_per_s': round(recorder.delivered / window, 2) if window else 0.0,
+        'attempted': attempted,
+        'delivered': recorder.delivered,
+        'errors': recorder.errors,
+        'error_rate': round(1 - recorder.delivered / attempted, 4) if attempted else 1.0
+    }
+
+
+def compare(report, baseline, max_regression):
+    """Regressions of report against baseline beyond the allowed share"""
+    failures = []
+    current_p95, baseline_p95 = report['delivery']['p95_ms'], baseline['delivery']['p95_ms']
+    if current_p95 and baseline_p95 and current_p95 > baseline_p95 * (1 + max_regression):
+        failures.append(f"p95 delivery {current_p95} ms vs baseline {baseline_p95} ms")
+    if report['throughput_msg_per_s'] < baseline['throughput_msg_per_s'] * (1 - max_regression):
+        failures.append(f"throughput {report['throughput_msg_per_s']} vs baseline {baseline['throughput_msg_per_s']} msg/s")
+    if report['error_rate'] > baseline['error_rate'] + max_regression / 100:
+        failures.append(f"error rate {report['error_rate']} vs baseline {baseline['error_rate']}")
+    return failures
+
+
+def start_server(args):
+    port = free_port()
+    env = {**os.environ, **OFFLINE_ENV, 'SENTIMENT_ENGINE': args.sentiment_engine}
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app.main:socket_app', '--host', '127.0.0.1',
+         '--port', str(port), '--log-level', 'warning'],
+        env=env, stdout=subprocess.DEVNULL if args.quiet_server else None
+    )
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Server exited during startup")
+        try:
+            if httpx.get(f'{url}/health', timeout=1).status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Server did not become healthy")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50, help="simulated users, paired into conversations")
+    parser.add_argument("--messages", type=int, default=20, help="messages sent by each user")
+    parser.add_argument("--interval-ms", type=float, default=50, help="pause between a user's messages")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for deliveries and requests")
+    parser.add_argument("--url", help="target a running server instead of starting an offline one")
+    parser.add_argument("--sentiment-engine", default="process", choices=["process", "sync"])
+    parser.add_argument("--quiet-server", action="store_true", help="discard the server's stdout")
+    parser.add_argument("--report", default="load-report.json")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+    args.run_id = uuid.uuid4().hex[:8]
+    args.external = bool(args.url)
+
+    process = None
+    if not args.url:
+        process, args.url = start_server(args)
+    try:
+        recorder, setup_seconds = asyncio.run(run_load(args))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    report = build_report(args, recorder, setup_seconds)
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = compare(report, json.load(f), args.max_regression)
+        for failure in failures:
+            print(f"REGRESSION: {failure}")
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Per-event cost on the event loop thread of the old print() logging versus
+the queue-based JSON logger.
+
+    python -m benchmarks.logging_overhead --events 50000 --output /tmp/chat.log
+
+Replays what the send_message and typing handlers log for each event:
+the old handlers printed two lines (one of them the full payload) and one
+line respectively. The new handlers log through log_event, which is rate
+limited per event and hands records to the writer thread unformatted.
+Output goes to --output (default os.devnull), so a real file or pipe can
+be used to see the cost of slow stdout.
+"""
+import argparse
+import contextlib
+import logging
+import os
+import time
+
+from app.core.config import settings
+from app.core.logger import logging_subsystem, log_event
+
+PAYLOAD = {
+    'id': 'a1b2c3d4e5f6a7b8c9d0',
+    'conversation_id': 'user123_user456',
+    'sender_id': 'user123',
+    'text': 'kal milte hain, don\'t be late yaar! Meeting is at 5 near the station 🎉',
+    'translated_text': '[hi] kal milte hain, don\'t be late yaar! Meeting is at 5 near the station 🎉',
+    'language': 'hinglish',
+    'sentiment': 'positive',
+    'sentiment_emoji': '😊',
+    'timestamp': '2024-01-01T12:00:00'
+}
+
+
+def old_handlers(events):
+    for _ in range(events):
+        conversation_id = PAYLOAD['conversation_id']
+        print(f"📨 Message sent to conversation {conversation_id}")
+        print(f"Message data: {PAYLOAD}")
+        print(f"⌨️ User {PAYLOAD['sender_id']} typing: True")
+
+
+def new_handlers(logger, events):
+    for _ in range(events):
+        log_event(logger, 'send_message', "Message sent",
+                  conversation_id=PAYLOAD['conversation_id'], sender_id=PAYLOAD['sender_id'])
+        log_event(logger, 'send_message', "Message payload", logging.DEBUG, payload=PAYLOAD)
+        log_event(logger, 'typing', "User typing", user_id=PAYLOAD['sender_id'], is_typing=True)
+
+
+def caller_seconds(func):
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def report(label, elapsed, events):
+    print(f"{label:<36} {elapsed / events * 1e9:9.0f} ns/event on the caller")
+
+
+def run_logger(label, output, events, rate_limits):
+    settings.LOG_RATE_LIMITS = rate_limits
+    logging_subsystem.setup(stream=output)
+    logger = logging.getLogger('app.main')
+    report(label, caller_seconds(lambda: new_handlers(logger, events)), events)
+
+    queued = logging_subsystem.info()
+    started = time.perf_counter()
+    logging_subsystem.shutdown()
+    print(f"{'':<36} writer drained {queued['queued']} records in "
+          f"{(time.perf_counter() - started) * 1000:.1f} ms, dropped {queued['dropped']}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=50000)
+    parser.add_argument("--output", default=os.devnull, help="where log lines are written")
+    args = parser.parse_args()
+
+    with open(args.output, 'w', encoding='utf-8') as output:
+        with contextlib.redirect_stdout(output):
+            elapsed = caller_seconds(lambda: old_handlers(args.events))
+        report('print() (before)', elapsed, args.events)
+
+        run_logger('queue logger, rate limited (after)', output, args.events, settings.LOG_RATE_LIMITS)
+        run_logger('queue logger, no rate limits', output, args.events, '')
+
+
+if __name__ == "__main__":
+    main()
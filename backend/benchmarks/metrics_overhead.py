@@ -0,0 +1,61 @@
+"""
+Per-call cost of the metrics decorators.
+
+    python -m benchmarks.metrics_overhead --calls 200000
+
+Times a trivial sync and async function bare and wrapped with
+metrics.instrument, then the cost of rendering the registry for a scrape.
+"""
+import argparse
+import asyncio
+import time
+
+from app.core.metrics import MetricsRegistry
+
+
+def noop(value):
+    return value
+
+
+async def async_noop(value):
+    return value
+
+
+def per_call_ns(func, calls):
+    started = time.perf_counter()
+    for index in range(calls):
+        func(index)
+    return (time.perf_counter() - started) / calls * 1e9
+
+
+async def async_per_call_ns(func, calls):
+    started = time.perf_counter()
+    for index in range(calls):
+        await func(index)
+    return (time.perf_counter() - started) / calls * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200000)
+    args = parser.parse_args()
+
+    registry = MetricsRegistry(enabled=True)
+    instrumented = registry.instrument('benchmark', 'noop')(noop)
+    async_instrumented = registry.instrument('benchmark', 'async_noop')(async_noop)
+
+    bare = per_call_ns(noop, args.calls)
+    wrapped = per_call_ns(instrumented, args.calls)
+    print(f"sync   bare {bare:7.0f} ns   instrumented {wrapped:7.0f} ns   overhead {wrapped - bare:7.0f} ns")
+
+    bare = asyncio.run(async_per_call_ns(async_noop, args.calls))
+    wrapped = asyncio.run(async_per_call_ns(async_instrumented, args.calls))
+    print(f"async  bare {bare:7.0f} ns   instrumented {wrapped:7.0f} ns   overhead {wrapped - bare:7.0f} ns")
+
+    started = time.perf_counter()
+    text = registry.render()
+    print(f"render {(time.perf_counter() - started) * 1000:7.3f} ms for {len(text.splitlines())} lines")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Login throughput versus event-loop latency with bcrypt run inline and in
+the bounded process pool.
+
+    python -m benchmarks.password_hash_benchmark --logins 200 --concurrency 50
+
+Each login verifies a password against a stored bcrypt hash, which is what
+AuthService.login_user spends nearly all of its time on. A ticker task
+sleeps for --tick-ms in a loop and records how late it wakes up; that
+overshoot is the delay every other coroutine on the loop (socket handlers,
+REST calls) would have seen. Pool runs also report how many logins were
+refused with a 429 because max_pending calls were already queued.
+
+With --stored-rounds set to something other than --rounds the stored hash
+uses an old cost factor and each successful pool login returns a rehash.
+"""
+import argparse
+import asyncio
+import time
+
+from app.core import security
+from app.services.password_hasher import PasswordHasher, PasswordHasherBusy, PasswordHasherUnavailable
+
+PASSWORD = 'correct horse battery staple'
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def ticker(tick_ms, lags, stop):
+    interval = tick_ms / 1000
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - started - interval) * 1000)
+
+
+async def run(label, verify, logins, concurrency, tick_ms):
+    lags = []
+    stop = asyncio.Event()
+    tick = asyncio.create_task(ticker(tick_ms, lags, stop))
+    outcomes = {'ok': 0, 'rehashed': 0, 'rejected': 0, 'unavailable': 0}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with semaphore:
+            try:
+                verified, new_hash = await verify()
+            except PasswordHasherBusy:
+                outcomes['rejected'] += 1
+                return
+            except PasswordHasherUnavailable:
+                outcomes['unavailable'] += 1
+                return
+            outcomes['ok'] += verified
+            outcomes['rehashed'] += bool(new_hash)
+
+    await asyncio.sleep(tick_ms / 1000)
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await tick
+
+    print(f"{label:<8} {outcomes['ok'] / elapsed:8.1f} logins/s   "
+          f"loop lag p50 {percentile(lags, 0.5):7.1f} ms  p99 {percentile(lags, 0.99):7.1f} ms  "
+          f"max {max(lags, default=0):7.1f} ms   "
+          f"ok {outcomes['ok']}  rehashed {outcomes['rehashed']}  "
+          f"429 {outcomes['rejected']}  503 {outcomes['unavailable']}")
+
+
+async def main_async(args):
+    stored_rounds = args.stored_rounds or args.rounds
+    security.pwd_context = security.build_password_context(args.rounds)
+    stored_hash = security.build_password_context(stored_rounds).hash(PASSWORD)
+
+    async def inline():
+        # What AuthService did before: bcrypt on the event loop thread
+        return security.verify_and_update_password(PASSWORD, stored_hash)
+
+    await run('inline', inline, args.logins, args.concurrency, args.tick_ms)
+
+    hasher = PasswordHasher(
+        workers=args.workers,
+        max_pending=args.max_pending,
+        timeout=args.timeout,
+        rounds=args.rounds
+    )
+    hasher.start()
+    # Let the workers spawn and import bcrypt before timing
+    await hasher.verify(PASSWORD, stored_hash)
+    try:
+        await run('pool', lambda: hasher.verify(PASSWORD, stored_hash), args.logins, args.concurrency, args.tick_ms)
+    finally:
+        await hasher.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50, help="logins in flight at once")
+    parser.add_argument("--rounds", type=int, default=10, help="bcrypt cost factor")
+    parser.add_argument("--stored-rounds", type=int, default=0, help="cost factor of the stored hash (default --rounds)")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-pending", type=int, default=16)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    parser.add_argument("--tick-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
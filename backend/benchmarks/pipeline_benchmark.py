@@ -0,0 +1,253 @@
+"""
+Per-stage cost of the message pipeline over a multilingual chat corpus.
+
+    python -m benchmarks.pipeline_benchmark --rounds 20 --report pipeline-report.json
+    python -m benchmarks.pipeline_benchmark --baseline pipeline-report.json --max-regression 0.25
+
+The corpus (benchmarks/chat_corpus.json) holds chat-length messages in every
+language of TranslationService.language_map plus code-mixed Hinglish. Each
+stage send_message runs is timed on its own: language detection,
+translation, sentiment, JSON serialization and the storage write. The
+pipeline stage runs the POST /chat/messages handler end to end, with
+MESSAGE_DELIVERY=inline so translation and sentiment are included, and
+serializes its result the way the socket broadcast does.
+
+Every stage gets fresh service instances for a cold pass over the corpus,
+then the same instances are reused for the warm rounds, so cold numbers
+include profile loading and empty caches. Translation uses the offline
+local provider and storage the in-memory backend; nothing touches the
+network. Each stage is repeated and the fastest figure of every metric is
+kept, which filters out scheduler noise. With --baseline the script exits
+with status 1 when a stage's cold mean or warm median per message regresses
+past --max-regression.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), 'chat_corpus.json')
+
+STAGES = ['detect', 'translate', 'sentiment', 'serialize', 'storage', 'pipeline']
+
+
+def configure_offline(args):
+    """Point the services at offline stand-ins before any of them is built"""
+    settings.STORAGE_BACKEND = 'memory'
+    settings.TRANSLATION_PROVIDERS = 'local'
+    settings.TRANSLATION_CACHE_PATH = ''
+    settings.TRANSLATION_RATE_PER_SECOND = 1e9
+    settings.TRANSLATION_BURST = 10 ** 9
+    settings.TRANSLATION_DAILY_QUOTA = 10 ** 12
+    settings.SENTIMENT_ENGINE = args.sentiment_engine
+    settings.SENTIMENT_SCORER = args.sentiment_scorer
+    # Time the commit rather than the group-commit wait
+    settings.WRITE_BUFFER_WINDOW_MS = args.write_window_ms
+
+
+def load_corpus():
+    """(language, text) pairs in corpus order"""
+    with open(CORPUS_PATH, encoding='utf-8') as f:
+        corpus = json.load(f)
+    return [(language, text) for language, texts in corpus.items() for text in texts]
+
+
+def target_for(language):
+    return 'hindi' if language == 'english' else 'english'
+
+
+def fastest(results):
+    """Lowest value of every metric across repeated runs"""
+    return {key: min(result[key] for result in results) for key in results[0]}
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        'ops': len(ordered),
+        'mean_us': round(statistics.fmean(ordered), 2),
+        'p50_us': round(statistics.median(ordered), 2),
+        'p95_us': round(ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)], 2),
+        'total_ms': round(sum(ordered) / 1000, 3)
+    }
+
+
+class StageRunner:
+    """Builds fresh services per stage and times one call per corpus message"""
+
+    def __init__(self, corpus):
+        self.corpus = corpus
+
+    async def build(self):
+        from app.services.translation_service import TranslationService
+        from app.services.sentiment_service import SentimentService
+        from app.services.memory_storage import MemoryStorage
+
+        self.translation = TranslationService()
+        self.sentiment = SentimentService()
+        if self.sentiment.engine:
+            self.sentiment.engine.start()
+        self.storage = MemoryStorage()
+
+        # One conversation per corpus language, with the partner reading in the target language
+        self.conversations = {}
+        for language in {language for language, _ in self.corpus}:
+            sender = await self.storage.create_user({
+                'email': f'{language}-sender@example.com', 'name': language, 'preferred_language': language
+            })
+            recipient = await self.storage.create_user({
+                'email': f'{language}-recipient@example.com', 'name': language,
+                'preferred_language': target_for(language)
+            })
+            conversation = await self.storage.create_conversation({
+                'participant1_id': sender['id'], 'participant2_id': recipient['id'],
+                'created_at': datetime.utcnow(), 'last_message_at': None
+            })
+            self.conversations[language] = (conversation['id'], sender['id'], recipient['id'])
+
+    async def close(self):
+        if self.sentiment.engine:
+            await self.sentiment.engine.stop()
+        await self.storage.close()
+
+    def message(self, language, text):
+        conversation_id, sender_id, _ = self.conversations[language]
+        return {
+            'conversation_id': conversation_id,
+            'sender_id': sender_id,
+            'text': text,
+            'language': language,
+            'translated_text': text,
+            'translated_language': target_for(language),
+            'sentiment': 'neutral',
+            'sentiment_emoji': '😐',
+            'sentiment_score': 0.0,
+            'timestamp': datetime.utcnow(),
+            'is_voice': False,
+            'read': False
+        }
+
+    async def stage_detect(self, language, text):
+        self.translation.detect_language(text)
+
+    async def stage_translate(self, language, text):
+        await self.translation.translate_text(text, language, target_for(language))
+
+    async def stage_sentiment(self, language, text):
+        await self.sentiment.analyze_sentiment_async(text)
+
+    async def stage_serialize(self, language, text):
+        json.dumps(jsonable_encoder({**self.message(language, text), 'id': 'benchmark'}))
+
+    async def stage_storage(self, language, text):
+        await self.storage.create_message(self.message(language, text), self.conversations[language][2])
+
+    async def stage_pipeline(self, language, text):
+        from app.api import chat
+        from app.models.message import MessageCreate
+
+        conversation_id, sender_id, _ = self.conversations[language]
+        result = await chat.send_message(MessageCreate(
+            conversation_id=conversation_id, sender_id=sender_id, text=text, language=language
+        ), current_user={'user_id': sender_id, 'email': None})
+        json.dumps(jsonable_encoder(result))
+
+    async def run(self, stage, rounds):
+        await self.build()
+        if stage == 'pipeline':
+            from app.api import chat
+            chat.storage, chat.translation_service, chat.sentiment_service = (
+                self.storage, self.translation, self.sentiment
+            )
+            # Translate and score inside the handler, so the stage times the whole pipeline
+            chat.settings.MESSAGE_DELIVERY = 'inline'
+        call = getattr(self, f'stage_{stage}')
+
+        async def timed_pass():
+            samples = []
+            for language, text in self.corpus:
+                started = time.perf_counter()
+                await call(language, text)
+                samples.append((time.perf_counter() - started) * 1e6)
+            return samples
+
+        try:
+            cold = await timed_pass()
+            warm = []
+            for _ in range(rounds):
+                warm += await timed_pass()
+        finally:
+            await self.close()
+        return {'cold': summarize(cold), 'warm': summarize(warm)}
+
+
+def compare(report, baseline, max_regression, noise_us):
+    """Stages slower than the baseline beyond the allowed share"""
+    failures = []
+    for stage, modes in report['stages'].items():
+        for mode, metric in (('cold', 'mean_us'), ('warm', 'p50_us')):
+            previous = baseline.get('stages', {}).get(stage, {}).get(mode)
+            if not previous:
+                continue
+            current_us, previous_us = modes[mode][metric], previous[metric]
+            if current_us > previous_us * (1 + max_regression) and current_us - previous_us > noise_us:
+                failures.append(f"{stage} {mode} {metric} {current_us} vs baseline {previous_us}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=20, help="warm passes over the corpus per stage")
+    parser.add_argument("--repeats", type=int, default=3, help="runs per stage; the fastest is kept")
+    parser.add_argument("--stages", default=','.join(STAGES))
+    parser.add_argument("--sentiment-engine", default="sync", choices=["sync", "process"])
+    parser.add_argument("--sentiment-scorer", default=settings.SENTIMENT_SCORER, choices=["textblob", "lexicon"])
+    parser.add_argument("--write-window-ms", type=float, default=0)
+    parser.add_argument("--report", default="pipeline-report.json")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25)
+    parser.add_argument("--noise-us", type=float, default=5.0, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    configure_offline(args)
+    corpus = load_corpus()
+    runner = StageRunner(corpus)
+
+    report = {
+        'started_at': datetime.utcnow().isoformat(),
+        'config': {'rounds': args.rounds, 'repeats': args.repeats, 'messages': len(corpus),
+                   'languages': sorted({language for language, _ in corpus}),
+                   'sentiment_engine': args.sentiment_engine, 'sentiment_scorer': args.sentiment_scorer,
+                   'write_window_ms': args.write_window_ms},
+        'stages': {}
+    }
+    print(f"{'stage':<10} {'mode':<5} {'mean us':>10} {'p50 us':>10} {'p95 us':>10} {'total ms':>10}")
+    for stage in [name.strip() for name in args.stages.split(',') if name.strip()]:
+        runs = [asyncio.run(runner.run(stage, args.rounds)) for _ in range(max(1, args.repeats))]
+        report['stages'][stage] = {mode: fastest([run[mode] for run in runs]) for mode in ('cold', 'warm')}
+        for mode, result in report['stages'][stage].items():
+            print(f"{stage:<10} {mode:<5} {result['mean_us']:>10.1f} {result['p50_us']:>10.1f} "
+                  f"{result['p95_us']:>10.1f} {result['total_ms']:>10.2f}")
+
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = compare(report, json.load(f), args.max_regression, args.noise_us)
+        for failure in failures:
+            print(f"REGRESSION: {failure}")
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Parity and throughput check of the lexicon scorer against TextBlob.
+
+    python -m benchmarks.sentiment_parity
+
+Every text of the corpus must get the same polarity and subjectivity from
+both scorers; the script exits with status 1 on the first mismatches.
+"""
+import argparse
+import itertools
+import random
+import sys
+import time
+
+from textblob import TextBlob
+
+from app.services.lexicon_sentiment import LexiconSentimentScorer
+
+CHAT_MESSAGES = [
+    "I love this app, it is amazing!",
+    "This is terrible, I hate waiting",
+    "ok see you tomorrow",
+    "not bad at all",
+    "That's not very good news :(",
+    "Wow!!! Best day ever :D",
+    "I'm really not happy with the delivery",
+    "Never again. Worst service.",
+    "thanks a lot, very kind of you",
+    "Can you send me the file?",
+    "I don't think this is a good idea",
+    "What a beautiful morning ;)",
+    "meh, it's okay I guess",
+    "So sad to hear that, take care",
+    "Congratulations on the new job! Extremely proud of you",
+    "the movie was boring and way too long",
+    "Yeah right, great plan (!)",
+    "I am not sure",
+    "Happy birthday!! :)",
+    "this is absolutely horrible",
+]
+
+PREFIXES = ["", "not ", "never ", "really ", "very ", "really not ", "not very ", "no ",
+            "I don't think it is ", "it isn't ", "extremely "]
+WORDS = ["good", "bad", "terrible", "great", "awesome", "happy", "sad", "okay",
+         "horrible", "nice", "boring", "terribly good"]
+SUFFIXES = ["", "!", "!!", " :)", " :(", " (!)", " :-D", ". But the food was cold.", " ;)"]
+
+
+def build_corpus(random_texts: int, seed: int):
+    corpus = list(CHAT_MESSAGES)
+    corpus += [p + w + s for p, w, s in itertools.product(PREFIXES, WORDS, SUFFIXES)]
+
+    # Random walks over the lexicon exercise modifier and negation chains
+    rng = random.Random(seed)
+    vocabulary = list(LexiconSentimentScorer(memo_size=0).table)
+    vocabulary += ["not", "very", "a", "the", "is", "!", ":)", "really", "no", "never"]
+    for _ in range(random_texts):
+        corpus.append(" ".join(rng.choice(vocabulary) for _ in range(rng.randint(1, 12))))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--random-texts", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.random_texts, args.seed)
+    scorer = LexiconSentimentScorer(memo_size=len(corpus))
+
+    started = time.perf_counter()
+    expected = [TextBlob(text).sentiment for text in corpus]
+    textblob_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    actual = scorer.score_batch(corpus)
+    lexicon_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    scorer.score_batch(corpus)
+    memo_seconds = time.perf_counter() - started
+
+    mismatches = [
+        (text, (blob.polarity, blob.subjectivity), score)
+        for text, blob, score in zip(corpus, expected, actual)
+        if abs(blob.polarity - score[0]) > 1e-9 or abs(blob.subjectivity - score[1]) > 1e-9
+    ]
+
+    count = len(corpus)
+    print(f"textblob        {count / textblob_seconds:10.0f} texts/s")
+    print(f"lexicon (cold)  {count / lexicon_seconds:10.0f} texts/s")
+    print(f"lexicon (memo)  {count / memo_seconds:10.0f} texts/s")
+    print(f"{count} texts, {len(mismatches)} mismatches")
+
+    for text, wanted, got in mismatches[:10]:
+        print(f"  {text!r}: textblob {wanted} lexicon {got}")
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Throughput of the embedded storage backends on the chat hot path.
+
+    python -m benchmarks.storage_benchmark --messages 5000 --senders 50
+
+Each sender writes messages into its own conversation through the async
+storage API (write buffer included), then every conversation's newest page
+and inbox are read back. The SQLite file goes to a temporary directory.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+from app.services.memory_storage import MemoryStorage
+from app.services.sqlite_storage import SQLiteStorage
+
+
+async def run(storage, messages, senders):
+    users = [await storage.create_user({'email': f'user{i}@example.com', 'name': f'User {i}',
+                                        'preferred_language': 'hindi'})
+             for i in range(senders + 1)]
+    hub = users[0]
+    conversations = [await storage.create_conversation({
+        'participant1_id': user['id'], 'participant2_id': hub['id'],
+        'created_at': datetime.utcnow(), 'last_message_at': None
+    }) for user in users[1:]]
+
+    write_latencies = []
+
+    async def sender(user, conversation):
+        for index in range(messages // senders):
+            started = time.perf_counter()
+            await storage.create_message({
+                'conversation_id': conversation['id'], 'sender_id': user['id'],
+                'text': f'message {index}', 'translated_text': f'translated {index}',
+                'timestamp': datetime.utcnow(), 'read': False
+            }, hub['id'])
+            write_latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(sender(user, conversation) for user, conversation in zip(users[1:], conversations)))
+    write_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for conversation in conversations:
+        await storage.get_messages(conversation['id'], 50, latest=True)
+    inbox, _ = await storage.get_user_inbox(hub['id'], 20)
+    read_elapsed = time.perf_counter() - started
+
+    write_latencies.sort()
+    print(f"{storage.name:>7}: writes {len(write_latencies) / write_elapsed:8.0f} msg/s  "
+          f"p50 {statistics.median(write_latencies):6.2f} ms  "
+          f"p99 {write_latencies[int(len(write_latencies) * 0.99) - 1]:6.2f} ms  "
+          f"reads {(len(conversations) + 1) / read_elapsed:8.0f} pages/s  "
+          f"batches {storage.writes.stats['batches']}")
+    assert inbox[0]['unread_count'] == messages // senders
+    await storage.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--senders", type=int, default=50)
+    args = parser.parse_args()
+
+    asyncio.run(run(MemoryStorage(), args.messages, args.senders))
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(SQLiteStorage(os.path.join(directory, 'chat.sqlite3')), args.messages, args.senders))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Local stand-in for the Google Translate mobile page used by deep-translator.
+
+Serves GET /m?sl=..&tl=..&q=.. with HTTP/1.1 keep-alive and a configurable
+delay, so translator clients can be benchmarked without network access.
+
+    python -m benchmarks.stub_translate_server --port 8765 --delay-ms 20
+
+Point the app at it with TRANSLATOR_BASE_URL=http://127.0.0.1:8765/m
+"""
+import argparse
+import html
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class StubTranslateHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    delay_seconds = 0.0
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/m":
+            self.send_error(404)
+            return
+
+        params = parse_qs(url.query)
+        text = params.get("q", [""])[0]
+        target = params.get("tl", [""])[0]
+
+        if self.delay_seconds:
+            time.sleep(self.delay_seconds)
+
+        # Keep line breaks so packed batch requests split back correctly
+        translated = "\n".join(f"[{target}] {line}" for line in text.split("\n"))
+        body = f'<html><body><div class="result-container">{html.escape(translated)}</div></body></html>'
+        payload = body.encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(host: str = "127.0.0.1", port: int = 0, delay_ms: float = 0.0) -> ThreadingHTTPServer:
+    """Start the stub in a daemon thread and return the running server"""
+    handler = type("Handler", (StubTranslateHandler,), {"delay_seconds": delay_ms / 1000})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub translation server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = start_server(args.host, args.port, args.delay_ms)
+    print(f"Stub translate server on http://{args.host}:{server.server_port}/m")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Compare a new GoogleTranslator per call against the pooled keep-alive clients.
+
+    python -m benchmarks.translator_pool_benchmark --calls 500
+
+Runs against the local stub server, so no network access is needed.
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from deep_translator import GoogleTranslator
+
+from app.services.translator_pool import TranslatorClientPool
+from .stub_translate_server import start_server
+
+
+def run(label, translate, calls, workers):
+    latencies = []
+
+    def one(i):
+        started = time.perf_counter()
+        translate(f"hello number {i}")
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(one, range(calls)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"{label:<10} {calls / elapsed:8.1f} req/s   "
+          f"p50 {statistics.median(latencies):6.2f} ms   "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1]:6.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = start_server(delay_ms=args.delay_ms)
+    base_url = f"http://127.0.0.1:{server.server_port}/m"
+
+    def fresh(text):
+        translator = GoogleTranslator(source="en", target="hi")
+        translator._base_url = base_url
+        return translator.translate(text)
+
+    pool = TranslatorClientPool(max_size=args.workers, base_url=base_url)
+
+    run("fresh", fresh, args.calls, args.workers)
+    run("pooled", lambda text: pool.translate(text, "en", "hi"), args.calls, args.workers)
+
+    info = pool.info()
+    print(f"pooled: {info['created']} clients created, {info['new_connections']} connections opened, "
+          f"avg connect {info['avg_connect_ms']} ms, avg transfer {info['avg_transfer_ms']} ms")
+
+    pool.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Compare one store round trip per write against the group-commit write buffer.
+
+    python -m benchmarks.write_buffer_benchmark --messages 2000 --senders 50
+
+Runs against an in-process stand-in store whose commits sleep for
+--rtt-ms on a thread, like a Firestore round trip, so no credentials or
+network access are needed. The direct path does what send_message used
+to do: insert the message, then update the conversation timestamp.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from app.services.write_buffer import WriteBuffer
+
+
+class StandInStore:
+    """Dict-backed store applying each commit atomically after a simulated round trip"""
+
+    def __init__(self, rtt_ms: float, threads: int):
+        self.rtt = rtt_ms / 1000
+        self.executor = ThreadPoolExecutor(max_workers=threads)
+        self.docs = {}
+        self.round_trips = 0
+        self.writes = 0
+
+    def _apply(self, ops):
+        time.sleep(self.rtt)
+        for kind, collection, doc_id, data in ops:
+            if kind == 'set':
+                self.docs[(collection, doc_id)] = dict(data)
+            else:
+                self.docs.setdefault((collection, doc_id), {}).update(data)
+
+    async def commit(self, ops):
+        self.round_trips += 1
+        self.writes += len(ops)
+        await asyncio.get_event_loop().run_in_executor(self.executor, self._apply, ops)
+
+
+def message_ops(sender, index, conversations):
+    now = datetime.utcnow()
+    conversation_id = f"conv-{sender % conversations}"
+    message_id = f"msg-{sender}-{index}"
+    return [
+        ('set', 'messages', message_id, {'conversation_id': conversation_id, 'text': 'hi', 'timestamp': now}),
+        ('update', 'conversations', conversation_id, {'last_message_at': now})
+    ]
+
+
+async def run(label, send, store, messages, senders, conversations):
+    latencies = []
+    per_sender = messages // senders
+
+    async def sender(number):
+        for index in range(per_sender):
+            started = time.perf_counter()
+            await send(message_ops(number, index, conversations))
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(sender(number) for number in range(senders)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{label:>9}: {len(latencies) / elapsed:8.0f} msg/s  "
+          f"p50 {statistics.median(latencies):7.2f} ms  p99 {p99:7.2f} ms  "
+          f"round trips {store.round_trips:6d}  writes {store.writes:6d}")
+
+
+async def main_async(args):
+    direct_store = StandInStore(args.rtt_ms, args.threads)
+
+    async def direct(ops):
+        for op in ops:
+            await direct_store.commit([op])
+
+    await run("direct", direct, direct_store, args.messages, args.senders, args.conversations)
+
+    buffered_store = StandInStore(args.rtt_ms, args.threads)
+    buffer = WriteBuffer(buffered_store.commit, window=args.window_ms / 1000, max_ops=args.max_ops)
+    await run("buffered", buffer.submit, buffered_store, args.messages, args.senders, args.conversations)
+    await buffer.close()
+
+    info = buffer.info()
+    print(f"buffered: {info['batches']} batches, avg {info['avg_batch_size']} writes, "
+          f"{info['coalesced']} timestamp updates coalesced")
+
+    # Every acked message is stored and each conversation carries its newest timestamp
+    assert buffered_store.docs.keys() == direct_store.docs.keys()
+    newest = {}
+    for (collection, _), doc in buffered_store.docs.items():
+        if collection == 'messages':
+            conversation_id = doc['conversation_id']
+            newest[conversation_id] = max(newest.get(conversation_id, doc['timestamp']), doc['timestamp'])
+    for conversation_id, timestamp in newest.items():
+        assert buffered_store.docs[('conversations', conversation_id)]['last_message_at'] == timestamp
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--senders", type=int, default=50)
+    parser.add_argument("--conversations", type=int, default=10)
+    parser.add_argument("--rtt-ms", type=float, default=20.0)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--window-ms", type=float, default=10.0)
+    parser.add_argument("--max-ops", type=int, default=400)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Create the email index entries of users registered before the index.
+
+    python -m scripts.backfill_email_index --dry-run
+    python -m scripts.backfill_email_index --page-size 300
+
+Users are read page by page and each one gets a user_emails/{email key}
+document pointing at it, unless the key is already indexed. When two
+accounts share an address (case or whitespace variants that the old
+unchecked registration let through) the first one indexed keeps it and
+the others are reported as conflicts. Entries are written with create(),
+which fails rather than overwrite an entry a registration wrote in the
+meantime, so the backfill can run while the app is serving and can be
+rerun safely. Keep EMAIL_INDEX_LEGACY_LOOKUP=true until it has finished.
+"""
+import argparse
+
+from google.api_core.exceptions import AlreadyExists
+
+from app.services.firebase_service import FirebaseService
+from app.services.storage_base import EMAIL_INDEX, email_key
+
+# Firestore allows 500 writes per batch
+MAX_BATCH_WRITES = 400
+
+
+def create_entries(db, entries, indexed, stats):
+    """
+    Create index entries in one batch. If a registration indexed one of the
+    emails since it was checked, the batch fails as a whole, so create them
+    one by one and report the ones taken.
+    """
+    batch = db.batch()
+    for ref, entry in entries:
+        batch.create(ref, entry)
+    try:
+        batch.commit()
+        return
+    except AlreadyExists:
+        pass
+
+    for ref, entry in entries:
+        try:
+            ref.create(entry)
+        except AlreadyExists:
+            stats['created'] -= 1
+            owner = ref.get().to_dict()['user_id']
+            indexed[ref.id] = owner
+            if owner == entry['user_id']:
+                stats['existing'] += 1
+            else:
+                stats['conflicts'] += 1
+                print(f"Conflict: user {entry['user_id']} shares {entry['email']} with user {owner}")
+
+
+def backfill(db, page_size, dry_run):
+    stats = {'users': 0, 'created': 0, 'existing': 0, 'conflicts': 0, 'skipped': 0}
+    users = db.collection('users').order_by('__name__').limit(page_size)
+    cursor = None
+    indexed = {}
+
+    while True:
+        query = users.start_after(cursor) if cursor is not None else users
+        page = list(query.stream())
+        if not page:
+            break
+        cursor = page[-1]
+
+        entries = []
+        for doc in page:
+            stats['users'] += 1
+            email = doc.to_dict().get('email')
+            if not email:
+                stats['skipped'] += 1
+                continue
+
+            key = email_key(email)
+            owner = indexed.get(key)
+            if owner is None:
+                existing = db.collection(EMAIL_INDEX).document(key).get()
+                owner = existing.to_dict()['user_id'] if existing.exists else None
+                if owner is not None:
+                    indexed[key] = owner
+
+            if owner == doc.id:
+                stats['existing'] += 1
+                continue
+            if owner is not None:
+                stats['conflicts'] += 1
+                print(f"Conflict: user {doc.id} shares {email} with user {owner}")
+                continue
+
+            indexed[key] = doc.id
+            stats['created'] += 1
+            entries.append((db.collection(EMAIL_INDEX).document(key), {'user_id': doc.id, 'email': email}))
+            if len(entries) >= MAX_BATCH_WRITES:
+                if not dry_run:
+                    create_entries(db, entries, indexed, stats)
+                entries = []
+
+        if entries and not dry_run:
+            create_entries(db, entries, indexed, stats)
+        print(f"{'[dry run] ' if dry_run else ''}{stats}")
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--page-size", type=int, default=300)
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    args = parser.parse_args()
+
+    backfill(FirebaseService().db, args.page_size, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
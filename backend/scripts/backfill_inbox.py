@@ -0,0 +1,97 @@
+"""
+Create the per-user inbox entries of conversations that predate the inbox.
+
+    python -m scripts.backfill_inbox --dry-run
+    python -m scripts.backfill_inbox --page-size 300
+
+Conversations are read page by page and each participant without an entry
+gets one under user_inbox/{user_id}/conversations. Entries are written
+with create(), which fails rather than overwrite an entry a new message
+wrote in the meantime, so the backfill can run while the app is serving
+and can be rerun safely. Run it after scripts.migrate_conversation_ids.
+"""
+import argparse
+
+from google.api_core.exceptions import AlreadyExists
+
+from app.services.firebase_service import FirebaseService
+from app.services.storage_base import inbox_collection, inbox_entry
+
+# Firestore allows 500 writes per batch
+MAX_BATCH_WRITES = 400
+
+
+def create_entries(db, entries, stats):
+    """
+    Create inbox entries in one batch. If a message created one of them
+    since it was checked, the batch fails as a whole, so create them one
+    by one and count the ones that now exist.
+    """
+    batch = db.batch()
+    for ref, entry in entries:
+        batch.create(ref, entry)
+    try:
+        batch.commit()
+        return
+    except AlreadyExists:
+        pass
+
+    for ref, entry in entries:
+        try:
+            ref.create(entry)
+        except AlreadyExists:
+            stats['created'] -= 1
+            stats['existing'] += 1
+
+
+def backfill(db, page_size, dry_run):
+    stats = {'conversations': 0, 'created': 0, 'existing': 0, 'skipped': 0}
+    conversations = db.collection('conversations').order_by('__name__').limit(page_size)
+    cursor = None
+
+    while True:
+        query = conversations.start_after(cursor) if cursor is not None else conversations
+        page = list(query.stream())
+        if not page:
+            break
+        cursor = page[-1]
+
+        entries = []
+        for doc in page:
+            stats['conversations'] += 1
+            conversation = doc.to_dict()
+            if not conversation.get('participant1_id') or not conversation.get('participant2_id'):
+                stats['skipped'] += 1
+                continue
+            conversation['id'] = doc.id
+
+            for user_id in (conversation['participant1_id'], conversation['participant2_id']):
+                ref = db.collection(inbox_collection(user_id)).document(doc.id)
+                if ref.get().exists:
+                    stats['existing'] += 1
+                    continue
+                stats['created'] += 1
+                entries.append((ref, inbox_entry(conversation, user_id)))
+                if len(entries) >= MAX_BATCH_WRITES:
+                    if not dry_run:
+                        create_entries(db, entries, stats)
+                    entries = []
+
+        if entries and not dry_run:
+            create_entries(db, entries, stats)
+        print(f"{'[dry run] ' if dry_run else ''}{stats}")
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--page-size", type=int, default=300)
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    args = parser.parse_args()
+
+    backfill(FirebaseService().db, args.page_size, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Re-key conversations to the deterministic participant-pair document ID.
+
+    python -m scripts.migrate_conversation_ids --dry-run
+    python -m scripts.migrate_conversation_ids --page-size 300
+
+Conversations are read page by page. Each one stored under a random ID is
+written to its canonical ID, merged with the copy already there if the pair
+was duplicated. Its messages are then re-pointed in batches and both
+participants' inbox entries are moved to the new ID. The old document is
+deleted last, so messages and inbox entries always reference a
+conversation that exists. The migration can be stopped and rerun safely.
+Run it before turning CONVERSATION_LEGACY_LOOKUP off.
+"""
+import argparse
+
+from app.services.firebase_service import FirebaseService
+from app.services.storage_base import conversation_id_for, inbox_collection
+
+# Firestore allows 500 writes per batch
+MAX_BATCH_WRITES = 400
+
+
+def merge_conversations(existing, duplicate):
+    """Keep the earliest creation and the latest activity of two copies of a conversation"""
+    merged = dict(existing)
+    created = [value for value in (existing.get('created_at'), duplicate.get('created_at')) if value]
+    last = [value for value in (existing.get('last_message_at'), duplicate.get('last_message_at')) if value]
+    merged['created_at'] = min(created) if created else None
+    merged['last_message_at'] = max(last) if last else None
+    return merged
+
+
+def move_messages(db, old_id, new_id, page_size, dry_run):
+    messages = db.collection('messages').where('conversation_id', '==', old_id)
+
+    if dry_run:
+        return sum(1 for _ in messages.select(['conversation_id']).stream())
+
+    moved = 0
+    while True:
+        # Updated messages drop out of the query, so always read the first page
+        page = list(messages.limit(min(page_size, MAX_BATCH_WRITES)).stream())
+        if not page:
+            return moved
+        batch = db.batch()
+        for doc in page:
+            batch.update(doc.reference, {'conversation_id': new_id})
+        batch.commit()
+        moved += len(page)
+
+
+def merge_inbox_entries(existing, duplicate):
+    """One inbox entry for two copies of a conversation: the latest activity and both unread counts"""
+    latest = max((existing, duplicate), key=lambda entry: (entry.get('updated_at') is not None, entry.get('updated_at') or 0))
+    merged = dict(latest)
+    merged['unread_count'] = (existing.get('unread_count') or 0) + (duplicate.get('unread_count') or 0)
+    merged['created_at'] = min(
+        [value for value in (existing.get('created_at'), duplicate.get('created_at')) if value],
+        default=None
+    )
+    return merged
+
+
+def move_inbox_entries(db, data, old_id, new_id, dry_run):
+    """Move each participant's inbox entry from the old conversation ID to the new one"""
+    moved = 0
+    for user_id in (data['participant1_id'], data['participant2_id']):
+        inbox = db.collection(inbox_collection(user_id))
+        old = inbox.document(old_id).get()
+        if not old.exists:
+            continue
+        moved += 1
+        if dry_run:
+            continue
+        target_ref = inbox.document(new_id)
+        target = target_ref.get()
+        entry = merge_inbox_entries(target.to_dict(), old.to_dict()) if target.exists else old.to_dict()
+        entry['id'] = new_id
+        batch = db.batch()
+        batch.set(target_ref, entry)
+        batch.delete(old.reference)
+        batch.commit()
+    return moved
+
+
+def rekey(db, doc, page_size, dry_run):
+    data = doc.to_dict()
+    new_id = conversation_id_for(data['participant1_id'], data['participant2_id'])
+    target_ref = db.collection('conversations').document(new_id)
+    target = target_ref.get()
+
+    if target.exists:
+        merged = merge_conversations(target.to_dict(), data)
+    else:
+        merged = dict(data)
+    merged['id'] = new_id
+
+    if not dry_run:
+        target_ref.set(merged)
+    moved = move_messages(db, doc.id, new_id, page_size, dry_run)
+    inbox_moved = move_inbox_entries(db, data, doc.id, new_id, dry_run)
+    if not dry_run:
+        doc.reference.delete()
+
+    return target.exists, moved, inbox_moved
+
+
+def migrate(db, page_size, dry_run):
+    stats = {'scanned': 0, 'canonical': 0, 'rekeyed': 0, 'merged': 0, 'skipped': 0,
+             'messages_moved': 0, 'inbox_entries_moved': 0}
+    conversations = db.collection('conversations').order_by('__name__').limit(page_size)
+    cursor = None
+
+    while True:
+        query = conversations.start_after(cursor) if cursor is not None else conversations
+        page = list(query.stream())
+        if not page:
+            break
+        cursor = page[-1]
+
+        for doc in page:
+            stats['scanned'] += 1
+            data = doc.to_dict()
+            if not data.get('participant1_id') or not data.get('participant2_id'):
+                stats['skipped'] += 1
+                continue
+            if doc.id == conversation_id_for(data['participant1_id'], data['participant2_id']):
+                stats['canonical'] += 1
+                continue
+
+            merged, moved, inbox_moved = rekey(db, doc, page_size, dry_run)
+            stats['merged' if merged else 'rekeyed'] += 1
+            stats['messages_moved'] += moved
+            stats['inbox_entries_moved'] += inbox_moved
+
+        print(f"{'[dry run] ' if dry_run else ''}{stats}")
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--page-size", type=int, default=300)
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    args = parser.parse_args()
+
+    migrate(FirebaseService().db, args.page_size, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
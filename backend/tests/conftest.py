@@ -0,0 +1,7 @@
+import os
+
+# Every test runs offline: in-memory storage, the local translation
+# provider and no translation cache file
+os.environ.setdefault('STORAGE_BACKEND', 'memory')
+os.environ.setdefault('TRANSLATION_PROVIDERS', 'local')
+os.environ.setdefault('TRANSLATION_CACHE_PATH', '')
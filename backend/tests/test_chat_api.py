@@ -0,0 +1,104 @@
+import asyncio
+
+import httpx
+
+from app.core.config import settings
+from app.main import app
+
+
+async def register(client, name):
+    response = await client.post('/auth/register', json={
+        'email': f'{name}@example.com',
+        'name': name,
+        'preferred_language': 'english',
+        'password': 'password123'
+    })
+    response.raise_for_status()
+    body = response.json()
+    return body['user']['id'], {'Authorization': f"Bearer {body['access_token']}"}
+
+
+def test_only_participants_mark_messages_read():
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            alice, alice_auth = await register(client, 'read-alice')
+            bob, bob_auth = await register(client, 'read-bob')
+            _, mallory_auth = await register(client, 'read-mallory')
+
+            conversation = (await client.post('/chat/conversations', headers=alice_auth, json={
+                'participant1_id': alice, 'participant2_id': bob
+            })).json()
+            message = (await client.post('/chat/messages', headers=alice_auth, json={
+                'conversation_id': conversation['id'], 'sender_id': alice, 'text': 'hello', 'language': 'english'
+            })).json()
+
+            return [
+                (await client.put(f"/chat/messages/{message['id']}/read", headers=mallory_auth)).status_code,
+                (await client.put('/chat/messages/does-not-exist/read', headers=bob_auth)).status_code,
+                (await client.put(f"/chat/messages/{message['id']}/read")).status_code,
+                (await client.put(f"/chat/messages/{message['id']}/read", headers=bob_auth)).status_code
+            ]
+
+    assert asyncio.run(scenario()) == [403, 404, 401, 200]
+
+
+def test_admin_and_provider_routes_require_auth(monkeypatch):
+    monkeypatch.setattr(settings, 'ADMIN_EMAILS', 'Admin-Carol@example.com')
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            _, user_auth = await register(client, 'admin-dave')
+            _, admin_auth = await register(client, 'admin-carol')
+            translate = {'text': 'hello', 'target_language': 'spanish', 'source_language': 'english'}
+            return [
+                (await client.delete('/admin/token-cache')).status_code,
+                (await client.delete('/admin/token-cache', headers=user_auth)).status_code,
+                (await client.get('/admin/storage', headers=admin_auth)).status_code,
+                (await client.post('/chat/translate', json=translate)).status_code,
+                (await client.post('/chat/translate/batch', json={'texts': ['hello']})).status_code,
+                (await client.post('/chat/analyze-sentiment', json={'text': 'great'})).status_code,
+                (await client.post('/chat/translate', json=translate, headers=user_auth)).status_code
+            ]
+
+    assert asyncio.run(scenario()) == [401, 403, 200, 401, 401, 401, 200]
+
+
+def test_language_change_is_validated_and_self_only():
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            erin, erin_auth = await register(client, 'lang-erin')
+            frank, _ = await register(client, 'lang-frank')
+            statuses = [
+                (await client.put(f'/auth/user/{frank}/language', headers=erin_auth,
+                                  json={'preferred_language': 'tamil'})).status_code,
+                (await client.put(f'/auth/user/{erin}/language', headers=erin_auth,
+                                  json={'preferred_language': 'klingon'})).status_code,
+                (await client.put(f'/auth/user/{erin}/language', headers=erin_auth,
+                                  json={'preferred_language': 'Tamil'})).status_code
+            ]
+            user = (await client.get(f'/auth/user/{erin}', headers=erin_auth)).json()
+            return statuses, user['preferred_language']
+
+    assert asyncio.run(scenario()) == ([403, 400, 200], 'tamil')
+
+
+def test_batch_translation_rejects_oversized_and_non_string_lists(monkeypatch):
+    monkeypatch.setattr(settings, 'TRANSLATION_BATCH_MAX_TEXTS', 3)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            _, auth = await register(client, 'batch-gina')
+            return [
+                (await client.post('/chat/translate/batch', headers=auth,
+                                   json={'texts': ['hi'] * 4})).status_code,
+                (await client.post('/chat/translate/batch', headers=auth,
+                                   json={'texts': ['hi', 5]})).status_code,
+                (await client.post('/chat/translate/batch', headers=auth,
+                                   json={'texts': ['hi', 'there']})).status_code
+            ]
+
+    assert asyncio.run(scenario()) == [400, 400, 200]
@@ -0,0 +1,17 @@
+from textblob import TextBlob
+
+from app.services.lexicon_sentiment import LexiconSentimentScorer
+from benchmarks.sentiment_parity import build_corpus
+
+
+def test_lexicon_matches_textblob():
+    corpus = build_corpus(random_texts=500, seed=1)
+    scorer = LexiconSentimentScorer(memo_size=0)
+
+    mismatches = []
+    for text, score in zip(corpus, scorer.score_batch(corpus)):
+        blob = TextBlob(text).sentiment
+        if abs(blob.polarity - score[0]) > 1e-9 or abs(blob.subjectivity - score[1]) > 1e-9:
+            mismatches.append((text, (blob.polarity, blob.subjectivity), score))
+
+    assert mismatches == []
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from app.services import message_enricher as enricher_module
+from app.services.memory_storage import MemoryStorage
+from app.services.message_enricher import MessageEnricher
+from app.services.sqlite_storage import SQLiteStorage
+
+
+def run_enricher(monkeypatch, settle):
+    storage = MemoryStorage()
+    published = []
+
+    async def broadcast_localized(event, conversation_id, data):
+        published.append(data)
+
+    monkeypatch.setattr(enricher_module, 'storage', storage)
+    monkeypatch.setattr(enricher_module, 'broadcast_localized', broadcast_localized)
+    enricher = MessageEnricher(workers=1, max_queue=10, max_attempts=1, retry_seconds=0, resume_after_seconds=0)
+
+    async def scenario():
+        conversation = await storage.create_conversation({'participant1_id': 'alice', 'participant2_id': 'bob'})
+        first = await storage.create_message({
+            'conversation_id': conversation['id'],
+            'sender_id': 'alice',
+            'text': 'hello',
+            'translated_language': 'spanish',
+            'enrichment': 'pending'
+        }, 'bob')
+        await settle(enricher, first)
+        inbox, _ = await storage.get_user_inbox('bob')
+        stored = await storage.get_message(first['id'])
+
+        # An older message finishing late leaves the newer preview alone
+        await storage.create_message({
+            'conversation_id': conversation['id'],
+            'sender_id': 'alice',
+            'text': 'newer'
+        }, 'bob')
+        await settle(enricher, first)
+        later, _ = await storage.get_user_inbox('bob')
+        await storage.close()
+        return stored, inbox[0], later[0], published
+
+    return asyncio.run(scenario())
+
+
+def test_enrichment_updates_recipient_preview(monkeypatch):
+    async def translate_text(text, source_language, target_language, raise_errors=False):
+        return 'hola'
+
+    monkeypatch.setattr(enricher_module.translation_service, 'translate_text', translate_text)
+    stored, entry, later, _ = run_enricher(monkeypatch, MessageEnricher.enrich)
+
+    assert stored['translated_text'] == 'hola'
+    assert entry['last_message_preview'] == 'hola'
+    assert later['last_message_preview'] == 'newer'
+
+
+def test_give_up_settles_neutral_on_original_text(monkeypatch):
+    stored, entry, _, published = run_enricher(monkeypatch, MessageEnricher._give_up)
+
+    assert stored['enrichment'] == 'failed'
+    assert stored['translated_text'] == 'hello'
+    assert (stored['sentiment'], stored['sentiment_emoji'], stored['sentiment_score']) == ('neutral', '😐', 0.0)
+    assert published[0]['sentiment'] == 'neutral'
+    assert entry['last_message_preview'] == 'hello'
+
+
+@pytest.mark.parametrize('backend', ['memory', 'sqlite'])
+def test_inbox_preview_only_replaces_its_own_message(backend, tmp_path):
+    storage = MemoryStorage() if backend == 'memory' else SQLiteStorage(str(tmp_path / 'chat.sqlite3'))
+
+    async def scenario():
+        conversation = await storage.create_conversation({'participant1_id': 'alice', 'participant2_id': 'bob'})
+        first = await storage.create_message({'conversation_id': conversation['id'], 'sender_id': 'alice', 'text': 'hello'}, 'bob')
+        second = await storage.create_message({'conversation_id': conversation['id'], 'sender_id': 'alice', 'text': 'newer'}, 'bob')
+        stale = await storage.update_inbox_preview('bob', conversation['id'], first['id'], 'hola')
+        current = await storage.update_inbox_preview('bob', conversation['id'], second['id'], 'nuevo')
+        inbox, _ = await storage.get_user_inbox('bob')
+        await storage.close()
+        return stale, current, inbox[0]['last_message_preview']
+
+    assert asyncio.run(scenario()) == (False, True, 'nuevo')
@@ -0,0 +1,25 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.password_hasher import PasswordHasher, PasswordHasherBusy, PasswordHasherUnavailable
+
+
+def test_timed_out_call_keeps_its_slot_until_the_worker_finishes():
+    hasher = PasswordHasher(workers=1, max_pending=1, timeout=30, rounds=4)
+
+    async def scenario():
+        # Warm the pool first, so the slow call below is already running when it times out
+        await hasher._submit(time.sleep, 0)
+        hasher.timeout = 0.05
+        with pytest.raises(PasswordHasherUnavailable):
+            await hasher._submit(time.sleep, 0.5)
+        with pytest.raises(PasswordHasherBusy):
+            await hasher._submit(time.sleep, 0)
+        await asyncio.sleep(1)
+        pending = hasher.info()['pending']
+        await hasher.stop()
+        return pending
+
+    assert asyncio.run(scenario()) == 0
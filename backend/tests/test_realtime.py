@@ -0,0 +1,60 @@
+import asyncio
+
+import app.main as main
+from app.services import realtime
+from app.services.room_languages import RoomLanguageIndex
+
+
+def test_socket_message_drops_client_translation(monkeypatch):
+    sent = []
+
+    async def room_member(sid, conversation_id):
+        return 'alice'
+
+    async def emit(event, data, **kwargs):
+        sent.append((event, data))
+
+    monkeypatch.setattr(main, '_room_member', room_member)
+    monkeypatch.setattr(realtime.sio, 'emit', emit)
+
+    asyncio.run(main.send_message('sid-a', {
+        'conversation_id': 'room-1',
+        'text': 'hello',
+        'sender_id': 'mallory',
+        'translated_text': 'forged',
+        'translated_language': 'english'
+    }))
+
+    (event, data), = sent
+    assert event == 'new_message'
+    assert data['sender_id'] == 'alice'
+    assert data['text'] == 'hello'
+    assert 'translated_text' not in data
+
+
+def test_broadcast_uses_the_message_language(monkeypatch):
+    detected, translated, sent = [], [], []
+
+    def detect_language(text):
+        detected.append(text)
+        return 'english'
+
+    async def translate_text(text, source_language, target_language):
+        translated.append(source_language)
+        return f'[{target_language}] {text}'
+
+    async def emit(event, data, **kwargs):
+        sent.append(data)
+
+    monkeypatch.setattr(realtime.translation_service, 'detect_language', detect_language)
+    monkeypatch.setattr(realtime.translation_service, 'translate_text', translate_text)
+    monkeypatch.setattr(realtime.sio, 'emit', emit)
+    monkeypatch.setattr(realtime, 'room_languages', RoomLanguageIndex())
+    realtime.room_languages.join('room-1', 'sid-a', 'alice', 'tamil')
+
+    asyncio.run(realtime.broadcast_localized('new_message', 'room-1', {'text': 'namaste', 'language': 'hindi'}))
+    asyncio.run(realtime.broadcast_localized('new_message', 'room-1', {'text': 'hello', 'language': 'klingon'}))
+
+    assert translated == ['hindi', 'english']
+    assert detected == ['hello']
+    assert sent[0]['translated_text'] == '[tamil] namaste'
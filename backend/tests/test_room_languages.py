@@ -0,0 +1,17 @@
+from app.services.room_languages import RoomLanguageIndex
+
+
+def test_language_change_moves_open_connections():
+    index = RoomLanguageIndex()
+    index.join('room-1', 'sid-a', 'alice', 'hindi')
+    index.join('room-2', 'sid-a', 'alice', 'hindi')
+    index.join('room-1', 'sid-b', 'bob', 'english')
+
+    assert index.set_user_language('alice', 'tamil') == 2
+    assert index.languages('room-1') == {'tamil': ('sid-a',), 'english': ('sid-b',)}
+    assert index.languages('room-2') == {'tamil': ('sid-a',)}
+
+    # A rejoin after the change keeps the new language, and a disconnect forgets the user
+    index.drop('sid-a')
+    assert index.set_user_language('alice', 'english') == 0
+    assert index.languages('room-1') == {'english': ('sid-b',)}
@@ -0,0 +1,20 @@
+import asyncio
+
+from app.services.sentiment_engine import SentimentEngine
+
+
+def test_stop_fails_queued_requests():
+    async def scenario():
+        engine = SentimentEngine(workers=1, max_queue=100, batch_size=1, batch_window=0.001)
+        engine.start()
+        start_method = engine._pool._mp_context.get_start_method()
+        calls = [asyncio.ensure_future(engine.score(f'great day {number}')) for number in range(20)]
+        await asyncio.sleep(0)
+        await engine.stop()
+        results = await asyncio.wait_for(asyncio.gather(*calls, return_exceptions=True), 5)
+        return start_method, results, engine.stats
+
+    start_method, results, stats = asyncio.run(scenario())
+    assert start_method == 'spawn'
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
+    assert stats['cancelled'] == 20
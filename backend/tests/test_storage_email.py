@@ -0,0 +1,26 @@
+import asyncio
+
+from app.services.memory_storage import MemoryStorage
+
+
+def test_legacy_email_lookups_are_cached():
+    storage = MemoryStorage()
+    legacy = {'id': 'user-1', 'email': 'old@example.com', 'name': 'Old'}
+    queries = []
+
+    def find_legacy(email):
+        queries.append(email)
+        return dict(legacy) if email == legacy['email'] else None
+
+    storage._find_legacy_user_by_email = find_legacy
+
+    async def scenario():
+        found = [await storage.get_user_by_email('old@example.com') for _ in range(3)]
+        missing = [await storage.get_user_by_email('typo@example.com') for _ in range(3)]
+        await storage.close()
+        return found, missing
+
+    found, missing = asyncio.run(scenario())
+    assert [user['id'] for user in found] == ['user-1'] * 3
+    assert missing == [None] * 3
+    assert queries == ['old@example.com', 'typo@example.com']
@@ -0,0 +1,35 @@
+import asyncio
+import time
+
+from app.core.config import settings
+from app.services.sentiment_engine import LoopLagMonitor
+from app.services.sqlite_storage import SQLiteStorage
+
+
+def test_blocking_storage_calls_keep_the_loop_responsive(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / 'chat.sqlite3'))
+    read_document = storage._get_document
+
+    def slow_get_document(collection, document_id):
+        # Stands in for a slow network round trip to the database
+        time.sleep(0.2)
+        return read_document(collection, document_id)
+
+    storage._get_document = slow_get_document
+    calls = settings.DB_IO_THREADS * 2
+
+    async def scenario():
+        monitor = LoopLagMonitor(interval=0.01)
+        monitor.start()
+        started = time.perf_counter()
+        await asyncio.gather(*(storage.get_user_by_id(f'user-{number}') for number in range(calls)))
+        elapsed = time.perf_counter() - started
+        monitor.stop()
+        await storage.close()
+        return elapsed, monitor.info()
+
+    elapsed, lag = asyncio.run(scenario())
+    # The calls overlap on the I/O pool instead of running one after another
+    assert elapsed < calls * 0.2 / 2
+    assert lag['samples'] > 10
+    assert lag['max_ms'] < 100
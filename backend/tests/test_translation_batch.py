@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services.translation_scheduler import PRIORITY_BULK, PRIORITY_INTERACTIVE, TranslationScheduler
+from app.services.translation_service import BATCH_DELIMITER, TranslationService
+
+
+def test_failed_chunk_fallback_is_capped():
+    service = TranslationService()
+
+    async def packed_calls_fail(text, source_code, target_code):
+        if BATCH_DELIMITER in text:
+            raise RuntimeError('provider rejected the request')
+        return f'[{target_code}] {text}'
+
+    service._call_providers = packed_calls_fail
+    texts = [f'message number {number}' for number in range(20)]
+    results = asyncio.run(service.translate_batch_detailed(texts, 'english', 'spanish'))
+
+    limit = settings.TRANSLATION_BATCH_FALLBACK_MAX_ITEMS
+    # One packed request plus one per retried item
+    assert service.scheduler.quota.used == 1 + limit
+    assert [r['error'] for r in results[:limit]] == [None] * limit
+    assert all(r['error'] == 'provider rejected the request' for r in results[limit:])
+    assert all(r['translated_text'] == r['original_text'] for r in results[limit:])
+
+
+def test_scheduler_rejects_unknown_priority():
+    scheduler = TranslationScheduler(rate_per_second=10, burst=10, daily_quota=100,
+                                     quota_reserve=0, max_queued_low_priority=10)
+    with pytest.raises(ValueError):
+        asyncio.run(scheduler.acquire(7))
+
+
+def test_interactive_call_does_not_join_bulk_call():
+    service = TranslationService()
+    fetched = []
+
+    async def fetch(text, source_code, target_code, priority):
+        fetched.append(priority)
+        await asyncio.sleep(0.01)
+        return f'[{target_code}] {text}'
+
+    service._fetch_translation = fetch
+
+    async def scenario():
+        return await asyncio.gather(
+            service.translate_text('good morning', 'english', 'spanish', priority=PRIORITY_BULK),
+            service.translate_text('good morning', 'english', 'spanish', priority=PRIORITY_INTERACTIVE),
+            service.translate_text('good morning', 'english', 'spanish', priority=PRIORITY_INTERACTIVE)
+        )
+
+    asyncio.run(scenario())
+    assert sorted(fetched) == [PRIORITY_INTERACTIVE, PRIORITY_BULK]
@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+from app.services.translation_cache import TranslationCache
+
+
+def test_expired_entry_is_not_reloaded_from_disk(tmp_path):
+    async def scenario():
+        cache = TranslationCache(ttl_seconds=60, db_path=str(tmp_path / 'cache.sqlite3'))
+        await cache.set('hello', 'en', 'es', 'hola')
+        # Age both tiers past the TTL
+        cache._memory[cache.make_key('hello', 'en', 'es')] = ('hola', time.time() - 1)
+        await cache._run_disk(cache._db.execute, "UPDATE translations SET created_at = ?", (time.time() - 120,))
+        try:
+            return await cache.get('hello', 'en', 'es'), cache.stats
+        finally:
+            cache.close()
+
+    translation, stats = asyncio.run(scenario())
+    assert translation is None
+    assert stats['expirations'] == 1
+    assert stats['misses'] == 1
+
+
+def test_disk_tier_survives_restart_and_is_pruned(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+
+    async def fill():
+        cache = TranslationCache(db_path=path, max_disk_entries=3)
+        for number in range(5):
+            await cache.set(f'text {number}', 'en', 'es', f'texto {number}')
+        cache._prune_disk()
+        try:
+            return await cache.info()
+        finally:
+            cache.close()
+
+    async def reopen():
+        cache = TranslationCache(db_path=path)
+        try:
+            return await cache.get('text 4', 'en', 'es'), await cache.get('text 0', 'en', 'es')
+        finally:
+            cache.close()
+
+    info = asyncio.run(fill())
+    assert info['disk_entries'] == 3
+    assert info['pruned'] == 2
+    assert asyncio.run(reopen()) == ('texto 4', None)
@@ -0,0 +1,49 @@
+import asyncio
+import gc
+import time
+
+from app.core.config import settings
+from app.services.translation_service import LocalProvider, TranslationService
+
+
+class SlowFailingProvider(LocalProvider):
+    name = 'slow'
+
+    def translate(self, text, source_code, target_code):
+        time.sleep(0.3)
+        raise RuntimeError('slow provider failed')
+
+
+def call_with_providers(monkeypatch, hedging):
+    monkeypatch.setattr(settings, 'TRANSLATION_HEDGING', hedging)
+    monkeypatch.setattr(settings, 'TRANSLATION_HEDGE_DELAY_MS', 20)
+    service = TranslationService()
+    slow, backup = SlowFailingProvider(), LocalProvider()
+    service.providers = [slow, backup]
+    errors = []
+
+    async def scenario():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+        translation = await service._call_providers('hello', 'en', 'es')
+        # Let the losing call finish and be collected
+        await asyncio.sleep(0.5)
+        gc.collect()
+        return translation
+
+    return asyncio.run(scenario()), slow, backup, errors
+
+
+def test_hedging_is_opt_in(monkeypatch):
+    translation, slow, backup, _ = call_with_providers(monkeypatch, hedging=False)
+    assert translation == '[es] hello'
+    # The backup only ran once the first provider had failed
+    assert slow.stats['errors'] == 1
+    assert backup.stats['calls'] == 1
+
+
+def test_losing_hedged_call_error_is_retrieved(monkeypatch):
+    translation, slow, backup, errors = call_with_providers(monkeypatch, hedging=True)
+    assert translation == '[es] hello'
+    assert backup.stats['backup_wins'] == 1
+    assert slow.stats['errors'] == 1
+    assert errors == []
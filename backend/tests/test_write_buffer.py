@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from app.services.memory_storage import MemoryStorage
+from app.services.sqlite_storage import SQLiteStorage
+from app.services.write_buffer import WriteBuffer
+
+
+def make_storage(backend, tmp_path):
+    if backend == 'memory':
+        return MemoryStorage()
+    return SQLiteStorage(str(tmp_path / 'chat.sqlite3'))
+
+
+@pytest.mark.parametrize('backend', ['memory', 'sqlite'])
+def test_bad_update_does_not_fail_its_batch(backend, tmp_path):
+    storage = make_storage(backend, tmp_path)
+
+    async def scenario():
+        conversation = await storage.create_conversation({'participant1_id': 'alice', 'participant2_id': 'bob'})
+        message, marked = await asyncio.gather(
+            storage.create_message({
+                'conversation_id': conversation['id'],
+                'sender_id': 'alice',
+                'text': 'hello'
+            }, 'bob'),
+            storage.mark_message_read('does-not-exist')
+        )
+        stored = await storage.get_messages(conversation['id'])
+        await storage.close()
+        return message, marked, stored
+
+    message, marked, stored = asyncio.run(scenario())
+    assert message is not None
+    assert marked is False
+    assert [m['id'] for m in stored] == [message['id']]
+
+
+def test_failed_batch_is_retried_per_submission():
+    committed = []
+
+    async def commit(ops):
+        if any(doc_id == 'bad' for _, _, doc_id, _ in ops):
+            raise KeyError('No document to update')
+        committed.extend(ops)
+
+    async def scenario():
+        buffer = WriteBuffer(commit, window=0.01, max_ops=100)
+        return await asyncio.gather(
+            buffer.submit([('set', 'messages', 'first', {'text': 'one'})]),
+            buffer.submit([('update', 'messages', 'bad', {'read': True})]),
+            buffer.submit([('set', 'messages', 'second', {'text': 'two'})]),
+            return_exceptions=True
+        ), buffer.stats
+
+    results, stats = asyncio.run(scenario())
+    assert results[0] is None and results[2] is None
+    assert isinstance(results[1], KeyError)
+    assert [doc_id for _, _, doc_id, _ in committed] == ['first', 'second']
+    assert stats['isolated_retries'] == 1
+
+
+def test_update_of_queued_document_skips_validation():
+    checked = []
+
+    async def commit(ops):
+        pass
+
+    async def validate(ops):
+        checked.extend(ops)
+
+    async def scenario():
+        buffer = WriteBuffer(commit, window=0.01, max_ops=100, validate=validate)
+        await asyncio.gather(
+            buffer.submit([('set', 'messages', 'new', {'text': 'hi'})]),
+            buffer.submit([('update', 'messages', 'new', {'read': True})]),
+            buffer.submit([('update', 'messages', 'old', {'read': True})])
+        )
+
+    asyncio.run(scenario())
+    assert [doc_id for _, _, doc_id, _ in checked] == ['old']
@@ -12,7 +12,7 @@ export default function Chat() {
   const { conversationId } = useParams();
   const navigate = useNavigate();
   const { user } = useAuthStore();
-  const { messages, loadMessages, sendMessage, addMessage } = useChatStore();
+  const { messages, loadMessages, sendMessage, addMessage, updateMessage } = useChatStore();
   const { isDarkMode, toggleTheme } = useThemeStore();
   const [messageText, setMessageText] = useState('');
   const [isConnected, setIsConnected] = useState(false);
@@ -56,6 +56,11 @@ export default function Chat() {
         }
       });
 
+      // Translation and sentiment arrive after the message itself
+      socketService.onMessageEnriched((data) => {
+        updateMessage(data);
+      });
+
       socketService.onUserTyping((data) => {
         if (data.user_id !== user.id) {
           setPartnerTyping(data.is_typing);
@@ -127,11 +132,11 @@ export default function Chat() {
       handleTyping(false);
 
       try {
+        // The server broadcasts the stored message to the conversation
         const savedMessage = await sendMessage(messageData);
-        socketService.sendMessage({
-          ...savedMessage,
-          timestamp: savedMessage.timestamp || new Date().toISOString(),
-        });
+        if (!savedMessage) {
+          throw new Error('Message was not saved');
+        }
       } catch (error) {
         console.error('Error sending message:', error);
         setMessageText(messageData.text);
@@ -17,6 +17,8 @@ class SocketService {
     console.log('Connecting to socket server:', SOCKET_URL);
     
     this.socket = io(SOCKET_URL, {
+      // Read on every (re)connect so a fresh login is picked up
+      auth: (cb) => cb({ token: localStorage.getItem('access_token') }),
       transports: ['websocket', 'polling'],
       reconnection: true,
       reconnectionAttempts: 5,
@@ -123,6 +125,12 @@ class SocketService {
     }
   }
 
+  onMessageEnriched(callback) {
+    if (this.socket) {
+      this.socket.on('message_enriched', callback);
+    }
+  }
+
   onJoinedConversation(callback) {
     if (this.socket) {
       this.socket.on('joined_conversation', callback);
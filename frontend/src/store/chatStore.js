@@ -60,6 +60,12 @@ const useChatStore = create((set, get) => ({
     });
   },
 
+  updateMessage: (fields) => {
+    set((state) => ({
+      messages: state.messages.map((m) => (m.id === fields.id ? { ...m, ...fields } : m)),
+    }));
+  },
+
   sendMessage: async (messageData) => {
     try {
       const message = await chatAPI.sendMessage(messageData);